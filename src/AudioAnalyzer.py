@@ -1,8 +1,7 @@
 '''
-Following features might be implemented:
-(1) Dynamic range compression
-(2) Limiter
-(3) Noise reduction
+Main window of the audio analyzer. The processing chain runs in update():
+capture, metering and tone tracking on the raw stream, then filtering,
+noise reduction and dynamics, and finally the STFT, averaging and views.
 '''
 import os.path
 
@@ -17,7 +16,6 @@ from PyQt5.QtWidgets import QApplication
 
 from scipy.fftpack import fft
 from scipy.fftpack import fftshift
-from scipy.signal import lfilter
 from scipy.signal import freqz
 
 from progress.bar import ChargingBar
@@ -27,13 +25,27 @@ from datetime import datetime
 from time import time
 
 from HelpWindow import HelpWindow
+from Capture import *
+from Ingest import *
+from Spectrum import *
+from Bands import *
+from Tones import *
+from Peaks import *
+from Metering import *
+from MeterWidget import *
+from Dynamics import *
+from NoiseReduction import *
+from NoiseFloor import *
+from Resampling import *
+from Hum import *
+from Zoom import *
+from CrossSpectrum import *
 from Filtering import *
 from Windowing import *
 from DeviceInfo import *
 from Log import *
 
 import platform
-import math
 import numpy as np
 import pyqtgraph as pg
 import matplotlib as mpl
@@ -61,8 +73,6 @@ class MainWindow(QtWidgets.QMainWindow):
         print(f"Welcome to Real-Time Audio Analyzer")
         print()
 
-        self.iter_count = 0
-
         with ChargingBar('Loading...') as bar:
             # Command-line arguments as list elements
             self.arg_quiet   = cmd_args[0]
@@ -70,6 +80,16 @@ class MainWindow(QtWidgets.QMainWindow):
             self.arg_nologs  = cmd_args[2]
             self.arg_rate    = cmd_args[3]
             self.arg_fname   = cmd_args[4]
+            self.arg_capture = cmd_args[5]
+            self.arg_fft_backend = cmd_args[6]
+            self.arg_fft_workers = cmd_args[7]
+            self.arg_block_size  = cmd_args[8]
+            self.arg_fft_size    = cmd_args[9]
+            self.arg_hop_size    = cmd_args[10]
+            self.arg_zero_pad    = cmd_args[11]
+            self.arg_watch_tones = cmd_args[12]
+            self.arg_decimate    = cmd_args[13]
+            self.arg_channels    = cmd_args[14]
 
             for _ in range(4):
                 bar.next()
@@ -184,6 +204,25 @@ class MainWindow(QtWidgets.QMainWindow):
             # Filter order combobox onSelect event
             self.box_FilterOrder.activated.connect(self.showBoxFilterOrderCurrentText)
 
+            # Any change of the filter settings updates the cached filter
+            # design, so update() does not parse or design anything. The
+            # filter chain carries its state from chunk to chunk. The
+            # panel filter is one stage of the chain; FIR approximations
+            # run in the overlap-save filter instead.
+            self.filterChain = FilterChain()
+            self.firFilter = OverlapSaveFilter(blockSize = self.arg_block_size,
+                                               workers   = self.arg_fft_workers)
+            self.chkBox_filterEn.stateChanged.connect(self.updateFilterDesign)
+            self.box_FilterType.currentIndexChanged.connect(self.updateFilterDesign)
+            self.box_Approx.currentIndexChanged.connect(self.updateFilterDesign)
+            self.box_FilterOrder.currentIndexChanged.connect(self.updateFilterDesign)
+            self.txt_Cutoff_1.textChanged.connect(self.updateFilterDesign)
+            self.txt_Cutoff_2.textChanged.connect(self.updateFilterDesign)
+
+            # Window changes update the analysis window of the STFT engine
+            self.chkBox_windowEn.stateChanged.connect(self.updateAnalysisWindow)
+            self.box_Window.currentIndexChanged.connect(self.updateAnalysisWindow)
+
             # Default visibility for higher cutoff freq. options
             self.lbl_Cutoff_2.setVisible(False)
             self.txt_Cutoff_2.setVisible(False)
@@ -264,73 +303,1831 @@ class MainWindow(QtWidgets.QMainWindow):
             self.graphWidget_TimeDomain.setMouseEnabled(x = False, y = False)
             self.graphWidget_FreqDomain.setMouseEnabled(x = False, y = False)
 
-            # PyAudio object initialization
-            self.FORMAT   = pyaudio.paInt16
-            self.CHANNELS = 1
-            self.CHUNK = 1024 * 2
+            # Spectrogram (waterfall) view below the spectrum. Hidden until
+            # it is enabled in the Analysis menu.
+            self.setupSpectrogramView()
+
+            # Level meter strip between the waveform and the spectrum
+            self.meterWidget = MeterWidget()
+            self.vert_Layout.insertWidget(1, self.meterWidget)
+
+            # Fractional-octave band view, hidden while no band fraction
+            # is selected in the Analysis menu.
+            self.setupBandView()
+
+            # Zoom FFT view. The span is selected with a region on the
+            # spectrum plot.
+            self.setupZoomView()
+
+            # Transfer function view (magnitude, phase and coherence) next
+            # to the spectrum, hidden until a two-channel estimator is on.
+            self.setupCrossView()
+
+            # PyAudio object initialization
+            self.FORMAT   = pyaudio.paInt16
+            self.CHANNELS = self.arg_channels
+            self.CHUNK = self.arg_block_size
+
+            # Channel that feeds the meter, the tone tracker and the
+            # spectrum analysis, and whether the other channels are drawn
+            # on the spectrum
+            self.CHANNEL = 0
+            self.CHANNELS_SHOW = True
+
+            # Transfer function estimator (Off, H1 or H2) and its reference
+            # channel. The response is the analyzed channel (the next one
+            # if the reference is analyzed).
+            self.CROSS_MODE = 'Off'
+            self.CROSS_REFERENCE = 0
+
+            # Analysis frame length, hop size and zero-padding factor. The
+            # FFT length is independent of the capture block size.
+            self.FFT_SIZE = self.arg_fft_size if self.arg_fft_size else self.CHUNK
+            self.HOP_SIZE = self.arg_hop_size if self.arg_hop_size else self.FFT_SIZE
+            self.ZERO_PAD = self.arg_zero_pad
+
+            # Decimation factor of the analysis chain (1 = full band)
+            self.DECIMATION = self.arg_decimate
+
+            # Spectral averaging settings: exponential time constant (s),
+            # number of linear averages and peak-hold decay (dB/s)
+            self.AVG_MODE = 'None'
+            self.AVG_TAU = 1.0
+            self.AVG_COUNT = 8
+            self.PEAK_DECAY = 20.0
+
+            # Spectrogram history length (rows) and displayed level range (dB)
+            self.SPECTROGRAM_ROWS = 1200
+            self.SPECTROGRAM_LEVELS = (-100, 0)
+
+            # Octave band fraction (None, 1, 3 or 6) and lowest shown level (dB)
+            self.BAND_FRACTION = None
+            self.BAND_FLOOR = -120
+
+            # Watched tones: default bandwidth (Hz) and threshold (dBFS).
+            # In tone-tracking-only mode the FFT and the plots are skipped.
+            self.TONE_BANDWIDTH = 10.0
+            self.TONE_THRESHOLD = -40.0
+            self.TONES_ONLY = False
+
+            # Peak picking: number of peaks, level above the median floor
+            # (dB), minimum prominence (dB) and sub-bin interpolation
+            self.PEAK_COUNT = 5
+            self.PEAK_THRESHOLD = 20.0
+            self.PEAK_PROMINENCE = 6.0
+            self.PEAK_INTERP = 'Gaussian'
+
+            # Per-bin noise floor estimator (Median or Minimum) and whether
+            # it is drawn on the spectrum
+            self.FLOOR_MODE = 'Median'
+            self.FLOOR_SHOW = False
+
+            # Frequency weighting (Z, A or C) of the meter and the spectrum
+            self.WEIGHTING = 'Z'
+
+            # Noise reduction gain rule (Off, Spectral Subtraction, Wiener)
+            # and noise profile source (Snapshot, Continuous). Snapshot
+            # keeps stationary tones for the peak and tone trackers.
+            self.NR_METHOD = 'Off'
+            self.NR_PROFILE = 'Snapshot'
+
+            # Dynamic range processing stages (disabled by default)
+            self.COMPRESSOR_EN = False
+            self.LIMITER_EN = False
+
+            # Mains hum removal: mains frequency (None, 50 or 60 Hz), number
+            # of notched harmonics and drift tracking of the notch comb
+            self.HUM_MAINS = None
+            self.HUM_HARMONICS = HUM_HARMONICS
+            self.HUM_TRACK = False
+            self.humTracker = None
+
+            # Ring buffer size (in chunks) for the callback capture mode
+            self.RING_CHUNKS = 16
+
+            # Amplitude factor (default = 1)
+            self.GAIN = 1.0
+            self.ingest = FrameIngest(size = self.CHUNK, gain = self.GAIN, channels = self.CHANNELS)
+
+            for _ in range(5):
+                bar.next()
+
+            # Note: Some Mac systems have sound cards having a sampling
+            # rate of 48 kHz.
+            if self.opSystem == "Darwin":
+                if self.arg_rate == 44100 or self.arg_rate == 48000:
+                    self.RATE = 48000
+                else:
+                    self.RATE = self.arg_rate
+            else:
+                if self.arg_rate == 44100 or self.arg_rate == 48000:
+                    self.RATE = 44100
+                else:
+                    self.RATE = self.arg_rate
+
+            self.p = pyaudio.PyAudio()
+
+            for _ in range(18):
+                bar.next()
+
+            # Get audio device and PyAudio related info
+            # getDeviceInfo(self.txt_Status, self.p)
+
+            self.chosen_device_index = -1
+            for x in range(0, self.p.get_device_count()):
+                self.info = self.p.get_device_info_by_index(x)
+
+                if self.info["name"] == "pulse":
+                    self.chosen_device_index = self.info["index"]
+                    print(f"Chosen index: {self.chosen_device_index}")
+
+            # Try to start streaming the audio input. In callback mode,
+            # PortAudio fills a ring buffer from its own thread and
+            # update() only takes whole frames out of it.
+            self.capture = None
+            self.droppedFrames = 0
+            self.overflowCount = 0
+
+            try:
+                if self.arg_capture == 'callback':
+                    self.capture = AudioCapture(pInst           = self.p,
+                                                format          = self.FORMAT,
+                                                channels        = self.CHANNELS,
+                                                rate            = self.RATE,
+                                                deviceIndex     = self.chosen_device_index,
+                                                framesPerBuffer = self.CHUNK,
+                                                bufferFrames    = self.RING_CHUNKS * self.CHUNK)
+                    self.stream = self.capture.stream
+                else:
+                    self.stream = self.p.open(
+                        format             = self.FORMAT,
+                        channels           = self.CHANNELS,
+                        rate               = self.RATE,
+                        input_device_index = self.chosen_device_index,
+                        input              = True,
+                        output             = False,
+                        frames_per_buffer  = self.CHUNK
+                    )
+            except OSError:
+                print("No audio input device is found.")
+                sys.exit()
+                # Might want to change this from exit() to wait
+                # for user input.
+            
+            for _ in range(25):
+                bar.next()
+
+            self.x = np.arange(0, 2 * self.CHUNK, 2)
+            self.configureAnalysis()
+            self.configureChannels()
+            self.configureCross()
+            self.configureTones()
+            self.meter = LevelMeter(fs = self.RATE, blockSize = self.CHUNK)
+            self.weightFilter = StreamingFilter(designWeighting(self.WEIGHTING, self.RATE))
+
+            self.noiseReducer = NoiseReducer(fs = self.RATE, blockSize = self.CHUNK, profile = self.NR_PROFILE)
+
+            # The gain computer runs on control frames, so dynamics are only
+            # available if the block size is a multiple of the frame size.
+            if self.CHUNK % CONTROL_SIZE == 0:
+                self.compressor = Compressor(fs = self.RATE, blockSize = self.CHUNK)
+                self.limiter = Limiter(fs = self.RATE, blockSize = self.CHUNK)
+            else:
+                self.compressor = None
+                self.limiter = None
+            self.setupAnalysisMenu()
+
+            # Initial filter design from the default GUI settings
+            self.updateFilterDesign()
+        
+        print(f"Program loading done...")
+        print()
+
+
+    def start(self):
+        """
+        Starts up the application (QtGui.QApplication).
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if (sys.flags.interactive != 1) or not hasattr(QtCore, 'PYQT_VERSION'):
+            QtGui.QApplication.instance().exec_()
+
+
+    def setPlotData(self, name, data_x, data_y):
+        """
+        Sets up the plot data into graph widget object. For the time-domain 
+        waveform and the frequency spectrum, the plot properties are passed
+        and the processed data is set to the traces.
+
+        Parameters
+        ----------
+            name : str
+                Trace name (waveform, spectrum, floor, peaks or channel<k>)
+                to set the graph widget.
+            data_x : int
+                Data to be shown in x-axis.
+            data_y : int
+                Data to be shown in y-axis.
+        
+        Returns
+        -------
+            None
+        """
+        if name in self.traces:
+            self.traces[name].setData(data_x, data_y)
+
+        else:
+            if name == 'waveform':
+                self.traces[name] = self.graphWidget_TimeDomain.plot(pen = pg.mkPen('r', width = 5))
+                self.graphWidget_TimeDomain.setXRange(min = 0,
+                                                      max = 2 * self.CHUNK,
+                                                      padding = 0.5,
+                                                      update = True)
+                self.graphWidget_TimeDomain.setYRange(min = -16000, 
+                                                      max = 16000,
+                                                      padding = 0.5,
+                                                      update = True)
+                                                      
+            if name == 'spectrum':
+                self.traces[name] = self.graphWidget_FreqDomain.plot(pen = pg.mkPen('r', width = 5))
+                self.graphWidget_FreqDomain.setLogMode(x = True, y = True)
+                self.graphWidget_FreqDomain.setXRange(min = np.log10(20), 
+                                                      max = np.log10(self.ANALYSIS_RATE / 2), 
+                                                      padding = 0.1,
+                                                      update = True)
+                self.graphWidget_FreqDomain.setYRange(min = -4,
+                                                      max = 2, 
+                                                      padding = 0.1,
+                                                      update = True)
+
+            if name == 'zoom':
+                self.traces[name] = self.graphWidget_Zoom.plot(pen = pg.mkPen('r', width = 3))
+                self.graphWidget_Zoom.setLogMode(x = False, y = True)
+                self.traces[name].setData(data_x, data_y)
+
+            if name.startswith('channel'):
+                color = pg.intColor(int(name[len('channel'):]), hues = self.CHANNELS)
+                self.traces[name] = self.graphWidget_FreqDomain.plot(pen = pg.mkPen(color, width = 2))
+                self.graphWidget_FreqDomain.setLogMode(x = True, y = True)
+                self.traces[name].setData(data_x, data_y)
+
+            if name == 'floor':
+                self.traces[name] = self.graphWidget_FreqDomain.plot(pen = pg.mkPen('c', width = 2, style = QtCore.Qt.DashLine))
+                self.traces[name].setData(data_x, data_y)
+
+            if name == 'peaks':
+                self.traces[name] = self.graphWidget_FreqDomain.plot(pen = None,
+                                                                     symbol = 't',
+                                                                     symbolSize = 10,
+                                                                     symbolBrush = 'y')
+                self.traces[name].setData(data_x, data_y)
+
+
+    def update(self):
+        """
+        Reads the audio stream and displays the raw data on the waveform graph widget.
+        Based on the options passed to the main window object such as filtering and
+        time-domain windowing, the raw data is processed. The processed data is then
+        converted to frequency domain using FFT (named as sp_data).
+
+        In callback mode, every block waiting in the ring buffer is run through
+        the stateful stages by processBlock(), so the capture does not depend on
+        the repaint rate. The plots are updated once per tick.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.newSpectrum = False
+        self.crossUpdated = False
+        self.zoomData = None
+
+        # Get time-domain data (audio stream). In callback mode, skip this
+        # tick if a whole frame has not been captured yet. The samples are
+        # viewed as int16 and scaled into a preallocated float buffer.
+        if self.capture is not None:
+            blocks = 0
+
+            while self.capture.read(self.ingest.raw):
+                self.processBlock(self.ingest.fromRaw())
+                blocks += 1
+
+            self.checkCaptureStatus()
+
+            if blocks == 0:
+                return
+        else:
+            td_data = self.stream.read(self.CHUNK, exception_on_overflow = False)
+            self.processBlock(self.ingest.fromBytes(td_data))
+
+        if self.TONES_ONLY:
+            return
+
+        self.updatePlots()
+
+
+    def processBlock(self, samples):
+        """
+        Runs one captured block through the stateful stages: metering, tone
+        tracking, filtering, noise reduction, dynamics, the zoom FFT, the
+        cross-spectrum and the STFT with its averages. The results needed
+        by updatePlots() are kept on the object.
+
+        Parameters
+        ----------
+            samples : ndarray
+                (channels, frames) block of samples.
+        
+        Returns
+        -------
+            None
+        """
+        # Samples are (channels, frames). The selected channel feeds the
+        # single-channel stages.
+        data_int = samples[self.CHANNEL]
+        self.blockData = data_int
+
+        # Level metering on the frequency-weighted stream (A, C or Z). The
+        # readings stay available in self.meterReading while the meter
+        # widget is hidden.
+        weighted = self.weightFilter.process(data_int)
+        self.meterReading = self.meter.process(weighted)
+
+        # Watched tones are tracked on the raw stream, independent of the
+        # FFT and the plots.
+        if self.tones is not None:
+            self.reportTones(self.tones.process(data_int))
+
+        if self.TONES_ONLY:
+            return
+
+        # The hum notch comb follows small drifts of the mains frequency.
+        # It is retuned without restarting the filter state.
+        if self.humTracker is not None:
+            frequency = self.humTracker.process(data_int)
+
+            if abs(frequency - self.humFrequency) > HUM_RETUNE:
+                self.humFrequency = round(frequency, 2)
+                self.filterChain.setStage(HUM_STAGE,
+                                          designHumComb(self.humFrequency, self.RATE, self.HUM_HARMONICS),
+                                          keepState = True)
+
+        # Filtering the raw audio data: bandpass, highpass or no filter,
+        # followed by the other filter chain stages in one SOS cascade.
+        # The stateful filter runs on the continuous stream before the
+        # window is applied, so its output is correct across chunks. The
+        # design is kept up to date by updateFilterDesign().
+        # All channels are filtered in one call along the last axis.
+        y_channels = self.filterChain.process(samples)
+        y_channels = self.firFilter.process(y_channels)
+        y_filtered = y_channels[self.CHANNEL]
+        self.blockChannels = y_channels
+
+        # Averaged cross-spectrum between the reference and the response
+        if self.cross is not None:
+            self.cross.push(y_channels[self.CROSS_REFERENCE], y_channels[self.crossResponse])
+
+            if self.cross.process():
+                self.crossUpdated = True
+
+        # STFT-domain noise reduction with overlap-add resynthesis
+        if self.NR_METHOD != 'Off':
+            y_filtered = self.noiseReducer.process(y_filtered)
+
+            if self.nrLearning and not self.noiseReducer.isLearning():
+                self.nrLearning = False
+                self.txt_Status.append(f"<b>Noise Reduction :</b> Noise profile is learned.")
+
+        # Dynamic range processing: compressor, then limiter. The gain
+        # reduction of the active stages is shown on the level meter.
+        self.gainReduction = 0.0
+
+        if self.COMPRESSOR_EN:
+            y_filtered = self.compressor.process(y_filtered)
+            self.gainReduction += self.compressor.gainReduction
+
+        if self.LIMITER_EN:
+            y_filtered = self.limiter.process(y_filtered)
+            self.gainReduction += self.limiter.gainReduction
+
+        # Zoom FFT of the selected span on the full-rate stream
+        if self.zoom is not None:
+            self.zoom.push(y_filtered)
+            zoomData = self.zoom.process()
+
+            if zoomData is not None:
+                self.zoomData = zoomData
+
+        # Low-band analysis: anti-alias filter and downsampling
+        if self.decimator is not None:
+            y_filtered = self.decimator.process(y_filtered)
+
+        # STFT: frames of FFT_SIZE samples are taken every HOP_SIZE samples
+        # and all frames pending since the last block are windowed and
+        # transformed in one batch.
+        self.stft.push(y_filtered)
+        spectra = self.stft.process()
+        self.checkAnalysisStatus()
+
+        if spectra is None:
+            return
+
+        # Frequency weighting of the spectrum as a per-bin gain, so the
+        # weighting filter does not run a second time.
+        if self.weightGain is not None:
+            spectra *= self.weightGain
+
+        # The noise floor of every bin is tracked on the unaveraged power
+        # spectra. Peak thresholds are relative to it.
+        power = self.powerBuffer[:len(spectra)]
+        np.square(spectra, out = power)
+        self.noiseFloor.update(power)
+
+        # Every new spectrum goes into the average, the result is shown.
+        self.sp_data = self.averager.update(spectra)
+        self.newSpectrum = True
+
+        # The shown spectrum is also written to the spectrogram history.
+        self.spectrogram.push(self.sp_data[np.newaxis])
+
+
+    def updatePlots(self):
+        """
+        Draws the results of the blocks processed in this tick: the newest
+        waveform block, the meter readings, the channel spectra, the zoom
+        FFT, the transfer function and the averaged spectrum with its peaks.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.meterWidget.isVisible():
+            self.meterWidget.setReading(self.meterReading)
+            self.meterWidget.setGainReduction(self.gainReduction)
+
+        self.setPlotData(name = 'waveform',
+                         data_x = self.x,
+                         data_y = self.blockData)
+
+        if self.CHANNELS > 1 and self.CHANNELS_SHOW:
+            self.updateChannelSpectra(self.blockChannels)
+
+        if self.crossUpdated:
+            self.crossCurves['magnitude'].setData(self.crossFreqs, self.cross.magnitude[1:])
+            self.crossCurves['phase'].setData(self.crossFreqs, self.cross.phase[1:])
+            self.crossCurves['coherence'].setData(self.crossFreqs, self.cross.coherence[1:])
+
+        if self.zoomData is not None:
+            self.setPlotData(name = 'zoom',
+                             data_x = self.zoom.frequencies(),
+                             data_y = self.zoomData)
+
+        if not self.newSpectrum:
+            return
+
+        sp_data = self.sp_data
+
+        if self.graphWidget_Spectrogram.isVisible():
+            self.spectrogramImage.setImage(self.spectrogram.view(),
+                                           autoLevels = False,
+                                           levels = self.SPECTROGRAM_LEVELS)
+
+        # Band levels are one sparse product over the shown spectrum.
+        if self.bands is not None:
+            bandLevels(self.bands, sp_data, out = self.bandData)
+            self.bandBars.setOpts(height = self.bandData - self.BAND_FLOOR)
+
+        self.setPlotData(name = 'spectrum',
+                         data_x = self.f,
+                         data_y = sp_data)
+
+        # Strongest peaks with sub-bin frequency and amplitude. The DC bin
+        # is never a peak.
+        self.peaks = findPeaks(mag           = sp_data,
+                               f             = self.f,
+                               count         = self.PEAK_COUNT,
+                               threshold     = self.PEAK_THRESHOLD,
+                               prominence    = self.PEAK_PROMINENCE,
+                               interpolation = self.PEAK_INTERP,
+                               floor         = self.noiseFloor.level)
+
+        if self.FLOOR_SHOW:
+            np.sqrt(self.noiseFloor.floor, out = self.floorData)
+            self.setPlotData(name = 'floor',
+                             data_x = self.f,
+                             data_y = self.floorData)
+
+        self.setPlotData(name = 'peaks',
+                         data_x = self.peaks.freqs,
+                         data_y = self.peaks.amplitudes)
+
+        if len(self.peaks.freqs) == 0:
+            return
+
+        self.maxValFreq = self.peaks.freqs[0]
+
+        # Show the frequency at which the audio signal has the greatest
+        # value. Watched tones (--watch-tone) are tracked separately.
+        if (20 < self.maxValFreq < 20000) and (self.arg_verbose):
+            print(f"Frequency: {self.maxValFreq:.2f} Hz.")
+            print("Peaks: " + ", ".join(f"{fp:.2f} Hz ({20 * np.log10(amp):.1f} dB, {prom:.1f} dB prominence)"
+                                        for fp, amp, prom in zip(*self.peaks)))
+            freqVal = self.maxValFreq
+            self.statusText = "<b>Frequency:</b> {num:.2f} Hz."
+            self.txt_Freq_Status.append(self.statusText.format(num = freqVal))
+        
+
+    def configureChannels(self):
+        """
+        Builds the spectra of all input channels: one windowed batch FFT
+        of the latest filtered block of every channel, drawn as one trace
+        per channel next to the analyzed channel.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.channelFFT = FFTEngine(self.CHUNK,
+                                    workers  = self.arg_fft_workers,
+                                    backend  = self.arg_fft_backend,
+                                    scale    = 1 / (128 * self.CHUNK),
+                                    maxBatch = self.CHANNELS)
+        self.channelFrames = np.zeros((self.CHANNELS, self.CHUNK))
+        self.channelFreqs = self.channelFFT.frequencies(self.RATE)
+        self.channelGain = weightingGain(self.WEIGHTING, self.RATE, self.CHUNK)
+
+
+    def updateChannelSpectra(self, y):
+        """
+        Windows and transforms the latest block of every channel in one
+        2D FFT and draws the spectra of the channels that are not
+        analyzed.
+
+        Parameters
+        ----------
+            y : ndarray
+                (channels, samples) filtered block.
+        
+        Returns
+        -------
+            None
+        """
+        if self.channelWindow is None:
+            np.copyto(self.channelFrames, y)
+        else:
+            np.multiply(y, self.channelWindow, out = self.channelFrames)
+
+        mag = self.channelFFT.magnitude(self.channelFrames)
+
+        if self.channelGain is not None:
+            mag *= self.channelGain
+
+        for k in range(self.CHANNELS):
+            if k != self.CHANNEL:
+                self.setPlotData(name = f'channel{k}',
+                                 data_x = self.channelFreqs,
+                                 data_y = mag[k])
+
+
+    def configureAnalysis(self):
+        """
+        Builds the analysis chain for the current frame length, hop size,
+        zero-padding factor, sampling rate and decimation factor: the
+        decimator, the sliding analysis buffer, the FFT engine and the
+        frequency axis.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        # Optional decimation in front of the STFT. The analysis chain runs
+        # at the decimated rate, so the same FFT size covers a narrower band
+        # with a finer resolution.
+        self.ANALYSIS_RATE = self.RATE / self.DECIMATION
+
+        if self.DECIMATION > 1:
+            self.decimator = Decimator(factor = self.DECIMATION, blockSize = self.CHUNK)
+        else:
+            self.decimator = None
+
+        # STFT engine with preallocated frame and spectrum buffers. Frames
+        # are zero-padded to ZERO_PAD times the frame length.
+        self.stft = STFTEngine(frameSize = self.FFT_SIZE,
+                               hopSize   = self.HOP_SIZE,
+                               blockSize = self.CHUNK // self.DECIMATION + 1,
+                               nfft      = self.FFT_SIZE * self.ZERO_PAD,
+                               workers   = self.arg_fft_workers,
+                               backend   = self.arg_fft_backend,
+                               scale     = 1 / (128 * self.FFT_SIZE))
+
+        self.f = self.stft.frequencies(self.ANALYSIS_RATE)
+        self.stftDropped = 0
+        self.updateAnalysisWindow()
+
+        if 'spectrum' in self.traces:
+            self.graphWidget_FreqDomain.setXRange(min = np.log10(20), 
+                                                  max = np.log10(self.ANALYSIS_RATE / 2), 
+                                                  padding = 0.1,
+                                                  update = True)
+
+        # Per-bin noise floor of the power spectra and its magnitude for
+        # the spectrum plot
+        self.noiseFloor = NoiseFloor(nbins     = self.stft.nbins,
+                                     frameRate = self.ANALYSIS_RATE / self.HOP_SIZE,
+                                     mode      = self.FLOOR_MODE)
+        self.powerBuffer = np.zeros_like(self.stft.fftEngine.magBuffer)
+        self.floorData = np.zeros(self.stft.nbins)
+
+        # Per-bin gain of the frequency weighting (None for Z)
+        self.weightGain = weightingGain(self.WEIGHTING, self.ANALYSIS_RATE, self.FFT_SIZE * self.ZERO_PAD)
+
+        # Spectral averaging between the FFT and the spectrum plot
+        self.averager = SpectralAverager(nbins     = self.stft.nbins,
+                                         frameRate = self.ANALYSIS_RATE / self.HOP_SIZE,
+                                         mode      = self.AVG_MODE,
+                                         tau       = self.AVG_TAU,
+                                         count     = self.AVG_COUNT,
+                                         decay     = self.PEAK_DECAY)
+
+        # Spectrogram history. A row is added for every update that
+        # produces a spectrum. Rows are scaled to seconds and bins to Hz.
+        self.spectrogram = SpectrogramBuffer(rows  = self.SPECTROGRAM_ROWS,
+                                             nbins = self.stft.nbins)
+
+        rowTime = max(self.CHUNK / self.RATE, self.HOP_SIZE / self.ANALYSIS_RATE)
+        spectrogramTransform = QtGui.QTransform()
+        spectrogramTransform.scale(rowTime, self.f[1])
+        self.spectrogramImage.setTransform(spectrogramTransform)
+
+        self.configureBands()
+
+
+    def configureBands(self):
+        """
+        Looks up the octave band matrix for the current sampling rate, FFT
+        size and band fraction, and rebuilds the bar graph. With no band
+        fraction selected, band levels are not computed.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.BAND_FRACTION is None:
+            self.bands = None
+            return
+
+        self.bands = bandMatrix(fs       = self.ANALYSIS_RATE,
+                                nfft     = self.FFT_SIZE * self.ZERO_PAD,
+                                fraction = self.BAND_FRACTION)
+        self.bandData = np.full(len(self.bands.centers), float(self.BAND_FLOOR))
+
+        index = np.arange(len(self.bands.centers))
+        self.bandBars.setOpts(x = index, 
+                              height = np.zeros(len(index)),
+                              y0 = self.BAND_FLOOR,
+                              width = 0.8)
+
+        # One labelled tick per octave
+        ticks = [(i, f"{fc / 1000:.3g}k" if fc >= 1000 else f"{fc:.3g}") 
+                 for i, fc in zip(index, self.bands.centers) 
+                 if i % self.BAND_FRACTION == 0]
+        self.graphWidget_Bands.getAxis('bottom').setTicks([ticks])
+        self.graphWidget_Bands.setXRange(min = -1, max = len(index), padding = 0)
+
+
+    def setupBandView(self):
+        """
+        Adds the octave band graph widget to the graph layout. Band levels
+        are drawn as bars starting from BAND_FLOOR.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.graphWidget_Bands = pg.PlotWidget()
+        self.graphWidget_Bands.setLabels(title = '<b><font face="Arial" style="color:white">OCTAVE BANDS</font></b>')
+        self.graphWidget_Bands.setLabel('left', 'Level (dB)')
+        self.graphWidget_Bands.setLabel('bottom', 'Frequency (Hz)')
+        self.graphWidget_Bands.getAxis("bottom").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Bands.getAxis("left").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Bands.setMouseEnabled(x = False, y = False)
+        self.graphWidget_Bands.setYRange(min = -100, 
+                                         max = 0,
+                                         padding = 0.1,
+                                         update = True)
+
+        self.bandBars = pg.BarGraphItem(x = [], height = [], width = 0.8, brush = 'r')
+        self.graphWidget_Bands.addItem(self.bandBars)
+
+        self.vert_Layout.addWidget(self.graphWidget_Bands)
+        self.graphWidget_Bands.setVisible(False)
+
+
+    def setupZoomView(self):
+        """
+        Adds the zoom FFT graph widget to the graph layout and the span
+        selection region to the spectrum plot. Both are hidden until the
+        zoom FFT is enabled.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.zoom = None
+
+        self.graphWidget_Zoom = pg.PlotWidget()
+        self.graphWidget_Zoom.setLabels(title = '<b><font face="Arial" style="color:white">ZOOM FFT</font></b>')
+        self.graphWidget_Zoom.setLabel('bottom', 'Frequency (Hz)')
+        self.graphWidget_Zoom.getAxis("bottom").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Zoom.getAxis("left").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Zoom.setMouseEnabled(x = False, y = False)
+
+        self.vert_Layout.addWidget(self.graphWidget_Zoom)
+        self.graphWidget_Zoom.setVisible(False)
+
+        # The spectrum plot has a log x-axis, so the region is in log10(Hz)
+        self.zoomRegion = pg.LinearRegionItem(values = (np.log10(100), np.log10(140)))
+        self.zoomRegion.setVisible(False)
+        self.zoomRegion.sigRegionChangeFinished.connect(self.configureZoom)
+        self.graphWidget_FreqDomain.addItem(self.zoomRegion)
+
+
+    def setupCrossView(self):
+        """
+        Adds the transfer function view below the spectrum: magnitude (dB),
+        phase (degrees) and coherence plots on a shared log frequency axis.
+        The view is hidden until an estimator is selected.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.cross = None
+
+        self.graphWidget_Cross = pg.GraphicsLayoutWidget()
+        self.crossCurves = dict()
+        plots = []
+
+        for row, (name, title, unit, color) in enumerate([('magnitude', 'TRANSFER FUNCTION', 'dB', 'r'),
+                                                          ('phase', 'PHASE', 'deg', 'y'),
+                                                          ('coherence', 'COHERENCE', '', 'c')]):
+            plot = self.graphWidget_Cross.addPlot(row = row, col = 0)
+            plot.setTitle(f'<b><font face="Arial" style="color:white">{title}</font></b>')
+            plot.setLabel('left', unit)
+            plot.getAxis("bottom").setStyle(tickFont = self.pyGraphFont)
+            plot.getAxis("left").setStyle(tickFont = self.pyGraphFont)
+            plot.setLogMode(x = True, y = False)
+            plot.setMouseEnabled(x = False, y = False)
+
+            if plots:
+                plot.setXLink(plots[0])
+
+            self.crossCurves[name] = plot.plot(pen = pg.mkPen(color, width = 2))
+            plots.append(plot)
+
+        plots[1].setYRange(-180, 180, padding = 0)
+        plots[2].setYRange(0, 1, padding = 0)
+        plots[2].setLabel('bottom', 'Frequency (Hz)')
+
+        index = self.vert_Layout.indexOf(self.graphWidget_FreqDomain)
+        self.vert_Layout.insertWidget(index + 1, self.graphWidget_Cross)
+        self.graphWidget_Cross.setVisible(False)
+
+
+    def configureCross(self):
+        """
+        Builds the cross-spectrum estimator for the selected mode, or
+        removes it when the mode is Off or only one channel is captured.
+        The frame length is the FFT size (rounded down to an even length).
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.CROSS_MODE == 'Off' or self.CHANNELS < 2:
+            self.cross = None
+            return
+
+        if self.CHANNEL != self.CROSS_REFERENCE:
+            self.crossResponse = self.CHANNEL
+        else:
+            self.crossResponse = (self.CROSS_REFERENCE + 1) % self.CHANNELS
+
+        self.cross = CrossSpectrum(nfft      = self.FFT_SIZE - self.FFT_SIZE % 2,
+                                   fs        = self.RATE,
+                                   blockSize = self.CHUNK,
+                                   workers   = self.arg_fft_workers,
+                                   backend   = self.arg_fft_backend,
+                                   estimator = self.CROSS_MODE)
+
+        # The DC bin is not shown on the log frequency axis
+        self.crossFreqs = self.cross.frequencies()[1:]
+
+
+    def setCrossMode(self, mode):
+        """
+        Changes the transfer function estimator and restarts the averages.
+        Off hides the transfer function view.
+
+        Parameters
+        ----------
+            mode : str
+                Estimator (Off, H1 or H2).
+        
+        Returns
+        -------
+            None
+        """
+        self.CROSS_MODE = mode
+        self.configureCross()
+        self.graphWidget_Cross.setVisible(self.cross is not None)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+
+        if self.cross is None:
+            self.txt_Status.append(f"<b>Transfer Function :</b> Off is selected.")
+        else:
+            self.txt_Status.append(f"<b>Transfer Function :</b> {mode} of channel {self.crossResponse + 1} "
+                                   f"against channel {self.CROSS_REFERENCE + 1} is selected.")
+
+
+    def resetCross(self):
+        """
+        Restarts the cross-spectrum averages.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.cross is not None:
+            self.cross.reset()
+
+
+    def showZoom(self, checked):
+        """
+        Enables or disables the zoom FFT.
+
+        Parameters
+        ----------
+            checked : bool
+                True enables the zoom FFT.
+        
+        Returns
+        -------
+            None
+        """
+        self.graphWidget_Zoom.setVisible(checked)
+        self.zoomRegion.setVisible(checked)
+
+        if checked:
+            self.configureZoom()
+        else:
+            self.zoom = None
+
+
+    def configureZoom(self):
+        """
+        Builds the zoom FFT for the span selected on the spectrum plot.
+        Connected to the span selection region.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if not self.zoomRegion.isVisible():
+            return
+
+        low, high = (10**v for v in self.zoomRegion.getRegion())
+        high = min(high, 0.45 * self.RATE)
+        low = min(max(low, 1.0), high - 1.0)
+
+        self.zoom = ZoomFFT(fs        = self.RATE,
+                            blockSize = self.CHUNK,
+                            center    = (low + high) / 2,
+                            span      = high - low,
+                            workers   = self.arg_fft_workers,
+                            scale     = 1 / 128)
+
+        self.graphWidget_Zoom.setXRange(min = low, max = high, padding = 0)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Zoom FFT :</b> {low:.1f} - {high:.1f} Hz "
+                               f"({self.zoom.rate / self.zoom.nfft:.3f} Hz resolution).")
+
+
+    def setBandFraction(self, name):
+        """
+        Changes the octave band fraction and shows or hides the band view.
+
+        Parameters
+        ----------
+            name : str
+                Band fraction (Off, 1/1, 1/3 or 1/6).
+        
+        Returns
+        -------
+            None
+        """
+        self.BAND_FRACTION = OCTAVE_FRACTIONS.get(name)
+        self.configureBands()
+        self.graphWidget_Bands.setVisible(self.bands is not None)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Octave Bands :</b> {name} is selected.")
+
+
+    def configureTones(self):
+        """
+        Builds the Goertzel detector bank for the tones given with
+        --watch-tone. Missing bandwidths and thresholds take the default
+        values. The effective bandwidth of every detector is reported on
+        the status panel.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if not self.arg_watch_tones:
+            self.tones = None
+            return
+
+        freqs, bandwidths, thresholds = zip(*self.arg_watch_tones)
+
+        self.tones = GoertzelBank(freqs      = freqs,
+                                  fs         = self.RATE,
+                                  blockSize  = self.CHUNK,
+                                  bandwidths = [self.TONE_BANDWIDTH if bw is None else bw for bw in bandwidths],
+                                  thresholds = [self.TONE_THRESHOLD if th is None else th for th in thresholds])
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+
+        for freqVal, bw in zip(self.tones.freqs, self.tones.effectiveBandwidths):
+            self.txt_Status.append(f"<b>Watch Tone :</b> {freqVal:.2f} Hz with {bw:.2f} Hz bandwidth.")
+
+
+    def reportTones(self, changed):
+        """
+        Reports watched tones that switched on or off on the frequency
+        status panel.
+
+        Parameters
+        ----------
+            changed : ndarray
+                Indices of the tones whose state changed.
+        
+        Returns
+        -------
+            None
+        """
+        for k in changed:
+            state = 'ON' if self.tones.active[k] else 'OFF'
+            freqVal = self.tones.freqs[k]
+            level = self.tones.levels[k]
+
+            if self.arg_verbose:
+                print(f"Tone {freqVal:.2f} Hz: {state} ({level:.1f} dBFS).")
+
+            self.txt_Freq_Status.append(f"<b>Tone {freqVal:.2f} Hz:</b> {state} ({level:.1f} dBFS).")
+
+
+    def setTonesOnly(self, checked):
+        """
+        Enables or disables the tone-tracking-only mode, in which the FFT
+        and the plots are skipped.
+
+        Parameters
+        ----------
+            checked : bool
+                True runs only the tone detectors.
+        
+        Returns
+        -------
+            None
+        """
+        self.TONES_ONLY = checked
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Tone Tracking Only {'enabled' if checked else 'disabled'}...</b>")
+
+
+    def setupSpectrogramView(self):
+        """
+        Adds the spectrogram graph widget to the graph layout. The history
+        is drawn as an image with a color lookup table.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.graphWidget_Spectrogram = pg.PlotWidget()
+        self.graphWidget_Spectrogram.setLabels(title = '<b><font face="Arial" style="color:white">SPECTROGRAM</font></b>')
+        self.graphWidget_Spectrogram.setLabel('left', 'Frequency (Hz)')
+        self.graphWidget_Spectrogram.setLabel('bottom', 'Time (s)')
+        self.graphWidget_Spectrogram.getAxis("bottom").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Spectrogram.getAxis("left").setStyle(tickFont = self.pyGraphFont)
+        self.graphWidget_Spectrogram.setMouseEnabled(x = False, y = False)
+
+        colorMap = pg.ColorMap(pos = [0.0, 0.25, 0.5, 0.75, 1.0],
+                               color = [(0, 0, 0), (40, 0, 110), (180, 30, 90), (250, 140, 20), (255, 255, 180)])
+
+        self.spectrogramImage = pg.ImageItem()
+        self.spectrogramImage.setLookupTable(colorMap.getLookupTable(0.0, 1.0, 256))
+        self.graphWidget_Spectrogram.addItem(self.spectrogramImage)
+
+        self.vert_Layout.addWidget(self.graphWidget_Spectrogram)
+        self.graphWidget_Spectrogram.setVisible(False)
+
+
+    def showSpectrogram(self, checked):
+        """
+        Shows or hides the spectrogram view.
+
+        Parameters
+        ----------
+            checked : bool
+                True shows the spectrogram.
+        
+        Returns
+        -------
+            None
+        """
+        self.graphWidget_Spectrogram.setVisible(checked)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Spectrogram {'enabled' if checked else 'disabled'}...</b>")
+
+
+    def updateAnalysisWindow(self):
+        """
+        Hands the selected window from the window cache to the STFT engine
+        and the channel spectra. Connected to the windowing checkbox and the
+        window combobox. The windows are periodic (DFT-even), like those of
+        the other analysis stages.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.chkBox_windowEn.isChecked():
+            self.stft.setWindow(getWindow(self.box_Window.currentText(), self.FFT_SIZE, sym = False).w)
+            self.channelWindow = getWindow(self.box_Window.currentText(), self.CHUNK, sym = False).w
+        else:
+            self.stft.setWindow(None)
+            self.channelWindow = None
+
+
+    def setupAnalysisMenu(self):
+        """
+        Adds the Analysis menu to the menubar, next to the Help menu.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        menuFont = QtGui.QFont('Arial')
+        menuFont.setPointSize(10)
+        menuFont.setBold(True)
+
+        self.menuAnalysis = QtWidgets.QMenu('Analysis', self.menubar)
+        self.menuAnalysis.setFont(menuFont)
+        self.menubar.insertMenu(self.menuAbout.menuAction(), self.menuAnalysis)
+
+        # Analyzed input channel and the spectra of the other channels
+        self.menuChannel = self.menuAnalysis.addMenu('Channel')
+        self.menuChannel.setFont(menuFont)
+        self.menuChannel.setEnabled(self.CHANNELS > 1)
+        self.channelGroup = QtWidgets.QActionGroup(self)
+
+        for k in range(self.CHANNELS):
+            action = self.menuChannel.addAction(f'Channel {k + 1}')
+            action.setCheckable(True)
+            action.setChecked(k == self.CHANNEL)
+            action.triggered.connect(lambda checked, k = k: self.setChannel(k))
+            self.channelGroup.addAction(action)
+
+        self.menuChannel.addSeparator()
+
+        self.action_ShowChannels = self.menuChannel.addAction('Show All Channels')
+        self.action_ShowChannels.setCheckable(True)
+        self.action_ShowChannels.setChecked(self.CHANNELS_SHOW)
+        self.action_ShowChannels.toggled.connect(self.showChannels)
+
+        # Two-channel transfer function and coherence
+        self.menuCross = self.menuAnalysis.addMenu('Transfer Function')
+        self.menuCross.setFont(menuFont)
+        self.menuCross.setEnabled(self.CHANNELS > 1)
+        self.crossGroup = QtWidgets.QActionGroup(self)
+
+        for mode in ['Off'] + CROSS_ESTIMATORS:
+            action = self.menuCross.addAction(mode)
+            action.setCheckable(True)
+            action.setChecked(mode == self.CROSS_MODE)
+            action.triggered.connect(lambda checked, mode = mode: self.setCrossMode(mode))
+            self.crossGroup.addAction(action)
+
+        self.menuCross.addSeparator()
+
+        action = self.menuCross.addAction('Reset Averages')
+        action.triggered.connect(self.resetCross)
+
+        # STFT overlap between consecutive frames
+        self.menuOverlap = self.menuAnalysis.addMenu('Overlap')
+        self.menuOverlap.setFont(menuFont)
+        self.overlapGroup = QtWidgets.QActionGroup(self)
+
+        for overlap in (0, 50, 75, 87.5):
+            action = self.menuOverlap.addAction(f'{overlap}%')
+            action.setCheckable(True)
+            action.setChecked(self.HOP_SIZE == self.overlapToHop(overlap))
+            action.triggered.connect(lambda checked, overlap = overlap: self.setOverlap(overlap))
+            self.overlapGroup.addAction(action)
+
+        # Decimation of the analysis chain
+        self.menuDecimation = self.menuAnalysis.addMenu('Decimation')
+        self.menuDecimation.setFont(menuFont)
+        self.decimationGroup = QtWidgets.QActionGroup(self)
+
+        for factor in DECIMATION_FACTORS:
+            action = self.menuDecimation.addAction(f'{factor}x ({self.RATE / factor / 2000:g} kHz band)')
+            action.setCheckable(True)
+            action.setChecked(factor == self.DECIMATION)
+            action.triggered.connect(lambda checked, factor = factor: self.setDecimation(factor))
+            self.decimationGroup.addAction(action)
+
+        # Spectral averaging mode
+        self.menuAveraging = self.menuAnalysis.addMenu('Averaging')
+        self.menuAveraging.setFont(menuFont)
+        self.averagingGroup = QtWidgets.QActionGroup(self)
+
+        for mode in AVERAGING_MODES:
+            action = self.menuAveraging.addAction(mode)
+            action.setCheckable(True)
+            action.setChecked(mode == self.AVG_MODE)
+            action.triggered.connect(lambda checked, mode = mode: self.setAveragingMode(mode))
+            self.averagingGroup.addAction(action)
+
+        # Per-bin noise floor: estimator and display on the spectrum
+        self.menuFloor = self.menuAnalysis.addMenu('Noise Floor')
+        self.menuFloor.setFont(menuFont)
+
+        self.action_Floor = self.menuFloor.addAction('Show')
+        self.action_Floor.setCheckable(True)
+        self.action_Floor.setChecked(self.FLOOR_SHOW)
+        self.action_Floor.toggled.connect(self.showNoiseFloor)
+        self.menuFloor.addSeparator()
+
+        self.floorGroup = QtWidgets.QActionGroup(self)
+
+        for mode in FLOOR_MODES:
+            action = self.menuFloor.addAction(mode)
+            action.setCheckable(True)
+            action.setChecked(mode == self.FLOOR_MODE)
+            action.triggered.connect(lambda checked, mode = mode: self.setNoiseFloorMode(mode))
+            self.floorGroup.addAction(action)
+
+        # Fractional-octave band view
+        self.menuBands = self.menuAnalysis.addMenu('Octave Bands')
+        self.menuBands.setFont(menuFont)
+        self.bandGroup = QtWidgets.QActionGroup(self)
+
+        for name in ['Off'] + list(OCTAVE_FRACTIONS):
+            action = self.menuBands.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(OCTAVE_FRACTIONS.get(name) == self.BAND_FRACTION)
+            action.triggered.connect(lambda checked, name = name: self.setBandFraction(name))
+            self.bandGroup.addAction(action)
+
+        # Sub-bin interpolation of the spectrum peaks
+        self.menuPeakInterp = self.menuAnalysis.addMenu('Peak Interpolation')
+        self.menuPeakInterp.setFont(menuFont)
+        self.peakInterpGroup = QtWidgets.QActionGroup(self)
+
+        for method in PEAK_INTERPOLATIONS:
+            action = self.menuPeakInterp.addAction(method)
+            action.setCheckable(True)
+            action.setChecked(method == self.PEAK_INTERP)
+            action.triggered.connect(lambda checked, method = method: self.setPeakInterpolation(method))
+            self.peakInterpGroup.addAction(action)
+
+        self.menuAnalysis.addSeparator()
+
+        # Views below the spectrum
+        self.action_Spectrogram = self.menuAnalysis.addAction('Spectrogram')
+        self.action_Spectrogram.setCheckable(True)
+        self.action_Spectrogram.toggled.connect(self.showSpectrogram)
+
+        # Frequency weighting of the level meter and the spectrum
+        self.menuWeighting = self.menuAnalysis.addMenu('Frequency Weighting')
+        self.menuWeighting.setFont(menuFont)
+        self.weightingGroup = QtWidgets.QActionGroup(self)
+
+        for curve in WEIGHTINGS:
+            action = self.menuWeighting.addAction(f'{curve}-weighting')
+            action.setCheckable(True)
+            action.setChecked(curve == self.WEIGHTING)
+            action.triggered.connect(lambda checked, curve = curve: self.setFrequencyWeighting(curve))
+            self.weightingGroup.addAction(action)
+
+        # Level meter strip and its time weighting
+        self.menuMeter = self.menuAnalysis.addMenu('Level Meter')
+        self.menuMeter.setFont(menuFont)
+
+        self.action_Meter = self.menuMeter.addAction('Show')
+        self.action_Meter.setCheckable(True)
+        self.action_Meter.setChecked(True)
+        self.action_Meter.toggled.connect(self.meterWidget.setVisible)
+        self.menuMeter.addSeparator()
+
+        self.meterGroup = QtWidgets.QActionGroup(self)
+
+        for weighting in ('Fast', 'Slow', 'Impulse'):
+            action = self.menuMeter.addAction(weighting)
+            action.setCheckable(True)
+            action.setChecked(weighting == self.meterWidget.weighting)
+            action.triggered.connect(lambda checked, weighting = weighting: self.setMeterWeighting(weighting))
+            self.meterGroup.addAction(action)
+
+        action = self.menuMeter.addAction('Reset Leq')
+        action.triggered.connect(self.meter.reset)
+
+        # Filter chain: preset stages and the stages in processing order
+        self.menuChain = self.menuAnalysis.addMenu('Filter Chain')
+        self.menuChain.setFont(menuFont)
+        self.menuChainAdd = self.menuChain.addMenu('Add Stage')
+        self.menuChainAdd.setFont(menuFont)
+
+        for name in CHAIN_PRESETS:
+            action = self.menuChainAdd.addAction(name)
+            action.triggered.connect(lambda checked, name = name: self.addChainStage(name))
+
+        self.menuChain.addSeparator()
+        self.chainActions = []
+        self.updateChainMenu()
+
+        # Mains hum notch comb (a filter chain stage) and drift tracking
+        self.menuHum = self.menuAnalysis.addMenu('Hum Removal')
+        self.menuHum.setFont(menuFont)
+        self.humGroup = QtWidgets.QActionGroup(self)
+
+        for mains in [None] + HUM_MAINS:
+            action = self.menuHum.addAction('Off' if mains is None else f'{mains} Hz')
+            action.setCheckable(True)
+            action.setChecked(mains == self.HUM_MAINS)
+            action.triggered.connect(lambda checked, mains = mains: self.setHumRemoval(mains))
+            self.humGroup.addAction(action)
+
+        self.menuHum.addSeparator()
+
+        self.action_HumTrack = self.menuHum.addAction('Track Drift')
+        self.action_HumTrack.setCheckable(True)
+        self.action_HumTrack.setChecked(self.HUM_TRACK)
+        self.action_HumTrack.toggled.connect(self.setHumTracking)
+
+        # Noise reduction gain rule and noise profile
+        self.menuNoise = self.menuAnalysis.addMenu('Noise Reduction')
+        self.menuNoise.setFont(menuFont)
+        self.noiseMethodGroup = QtWidgets.QActionGroup(self)
+
+        for method in ['Off'] + NR_METHODS:
+            action = self.menuNoise.addAction(method)
+            action.setCheckable(True)
+            action.setChecked(method == self.NR_METHOD)
+            action.triggered.connect(lambda checked, method = method: self.setNoiseReduction(method))
+            self.noiseMethodGroup.addAction(action)
+
+        self.menuNoise.addSeparator()
+        self.menuNoise.setToolTipsVisible(True)
+        self.noiseProfileGroup = QtWidgets.QActionGroup(self)
+
+        profileTips = {'Snapshot'   : 'Removes the noise learned with Learn Noise Profile; stationary tones are kept.',
+                       'Continuous' : 'Tracks the noise without learning; tones lasting longer than about a second are removed as noise.'}
+
+        for profile in NR_PROFILES:
+            action = self.menuNoise.addAction(f'{profile} Profile')
+            action.setToolTip(profileTips[profile])
+            action.setCheckable(True)
+            action.setChecked(profile == self.NR_PROFILE)
+            action.triggered.connect(lambda checked, profile = profile: self.setNoiseProfile(profile))
+            self.noiseProfileGroup.addAction(action)
+
+        action = self.menuNoise.addAction('Learn Noise Profile')
+        action.triggered.connect(self.learnNoiseProfile)
+        self.nrLearning = False
+
+        # Dynamic range processing stages
+        self.menuDynamics = self.menuAnalysis.addMenu('Dynamics')
+        self.menuDynamics.setFont(menuFont)
+        self.menuDynamics.setEnabled(self.compressor is not None)
+
+        self.action_Compressor = self.menuDynamics.addAction('Compressor')
+        self.action_Compressor.setCheckable(True)
+        self.action_Compressor.toggled.connect(self.setCompressor)
+
+        self.action_Limiter = self.menuDynamics.addAction('Limiter')
+        self.action_Limiter.setCheckable(True)
+        self.action_Limiter.toggled.connect(self.setLimiter)
+
+        self.action_Zoom = self.menuAnalysis.addAction('Zoom FFT')
+        self.action_Zoom.setCheckable(True)
+        self.action_Zoom.toggled.connect(self.showZoom)
+
+        # Skips the FFT and the plots, only watched tones are tracked
+        self.action_TonesOnly = self.menuAnalysis.addAction('Tone Tracking Only')
+        self.action_TonesOnly.setCheckable(True)
+        self.action_TonesOnly.setEnabled(self.tones is not None)
+        self.action_TonesOnly.toggled.connect(self.setTonesOnly)
+
+
+    def setChannel(self, channel):
+        """
+        Selects the channel that feeds the level meter, the tone tracker
+        and the spectrum analysis. The single-channel stages are restarted
+        on the new channel.
+
+        Parameters
+        ----------
+            channel : int
+                Channel index (0 is the first channel).
+        
+        Returns
+        -------
+            None
+        """
+        self.CHANNEL = channel
+
+        # The weighting filter runs on the selected channel only, so its
+        # state is restarted from the first block of the new channel.
+        self.weightFilter.reset()
+        self.meter.reset()
+        self.noiseReducer.reset()
+
+        for stage in (self.tones, self.humTracker, self.compressor, self.limiter):
+            if stage is not None:
+                stage.reset()
+
+        self.configureAnalysis()
+        self.configureCross()
+
+        # The analyzed channel is drawn by the spectrum trace
+        if f'channel{channel}' in self.traces:
+            self.traces[f'channel{channel}'].clear()
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Channel :</b> Channel {channel + 1} is selected.")
+
+
+    def showChannels(self, checked):
+        """
+        Shows or hides the spectra of the channels that are not analyzed.
+
+        Parameters
+        ----------
+            checked : bool
+                True shows the channel spectra.
+        
+        Returns
+        -------
+            None
+        """
+        self.CHANNELS_SHOW = checked
+
+        for k in range(self.CHANNELS):
+            if f'channel{k}' in self.traces:
+                self.traces[f'channel{k}'].setVisible(checked)
+
+
+    def setAveragingMode(self, mode):
+        """
+        Changes the spectral averaging mode.
+
+        Parameters
+        ----------
+            mode : str
+                Averaging mode (None, Exponential, Linear, Peak Hold).
+        
+        Returns
+        -------
+            None
+        """
+        self.AVG_MODE = mode
+        self.averager.setMode(mode)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Averaging :</b> {mode} is selected.")
+
+
+    def showNoiseFloor(self, checked):
+        """
+        Shows or hides the noise floor on the spectrum.
+
+        Parameters
+        ----------
+            checked : bool
+                True shows the noise floor.
+        
+        Returns
+        -------
+            None
+        """
+        self.FLOOR_SHOW = checked
+
+        if 'floor' in self.traces:
+            self.traces['floor'].setVisible(checked)
+
+
+    def setNoiseFloorMode(self, mode):
+        """
+        Changes the noise floor estimator.
+
+        Parameters
+        ----------
+            mode : str
+                Estimator (Median, Minimum).
+        
+        Returns
+        -------
+            None
+        """
+        self.FLOOR_MODE = mode
+        self.noiseFloor.setMode(mode)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Noise Floor :</b> {mode} is selected.")
+
+
+    def setPeakInterpolation(self, method):
+        """
+        Changes the sub-bin interpolation of the spectrum peaks.
+
+        Parameters
+        ----------
+            method : str
+                Interpolation method (Parabolic, Gaussian).
+        
+        Returns
+        -------
+            None
+        """
+        self.PEAK_INTERP = method
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Peak Interpolation :</b> {method} is selected.")
+
+
+    def setFrequencyWeighting(self, curve):
+        """
+        Changes the frequency weighting. The level meter is fed through the
+        cached weighting filter and the spectrum is scaled by the cached
+        per-bin gain of the same weighting.
+
+        Parameters
+        ----------
+            curve : str
+                Frequency weighting (Z, A, C).
+        
+        Returns
+        -------
+            None
+        """
+        self.WEIGHTING = curve
+        self.weightFilter.setDesign(designWeighting(curve, self.RATE))
+        self.weightGain = weightingGain(curve, self.ANALYSIS_RATE, self.FFT_SIZE * self.ZERO_PAD)
+        self.channelGain = weightingGain(curve, self.RATE, self.CHUNK)
+        self.meterWidget.setCurve(curve)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Frequency Weighting :</b> {curve}-weighting is selected.")
+
+
+    def setNoiseReduction(self, method):
+        """
+        Changes the noise reduction gain rule. Off bypasses the stage.
+
+        Parameters
+        ----------
+            method : str
+                Gain rule (Off, Spectral Subtraction, Wiener).
+        
+        Returns
+        -------
+            None
+        """
+        if method != 'Off':
+            self.noiseReducer.setMethod(method)
+
+        if self.NR_METHOD == 'Off':
+            self.noiseReducer.reset()
+
+        self.NR_METHOD = method
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Noise Reduction :</b> {method} is selected.")
+        self.checkNoiseProfile()
+
+
+    def setNoiseProfile(self, profile):
+        """
+        Changes the noise profile source of the noise reduction.
+
+        Parameters
+        ----------
+            profile : str
+                Noise profile source (Continuous, Snapshot).
+        
+        Returns
+        -------
+            None
+        """
+        self.NR_PROFILE = profile
+        self.noiseReducer.setProfile(profile)
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Noise Profile :</b> {profile} is selected.")
+        self.checkNoiseProfile()
+
+
+    def checkNoiseProfile(self):
+        """
+        Reminds on the status panel that the snapshot profile has to be
+        learned before the noise reduction has any effect.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if self.NR_METHOD != 'Off' and self.NR_PROFILE == 'Snapshot' and \
+           not self.noiseReducer.hasProfile() and not self.noiseReducer.isLearning():
+            self.txt_Status.append(f"No noise profile is learned yet, use Learn Noise Profile while the input is quiet.")
+
+
+    def learnNoiseProfile(self):
+        """
+        Learns the snapshot noise profile from the next second of input.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        self.noiseReducer.learnProfile(seconds = 1.0)
+        self.nrLearning = True
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Noise Reduction :</b> Learning the noise profile, keep the input quiet...")
+
+
+    def updateChainMenu(self):
+        """
+        Rebuilds the stage entries of the Filter Chain menu. Every stage
+        has a submenu to bypass, move or remove it. The panel filter and
+        the hum comb are only removed with their own settings.
+
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        for action in self.chainActions:
+            self.menuChain.removeAction(action)
+
+            if action.menu() is not None:
+                action.menu().deleteLater()
+
+        self.chainActions = []
+
+        for k, name in enumerate(self.filterChain.names()):
+            menu = QtWidgets.QMenu(f'{k + 1}. {name}', self.menuChain)
+            menu.setFont(self.menuChain.font())
+
+            action = menu.addAction('Bypass')
+            action.setCheckable(True)
+            action.setChecked(self.filterChain.isBypassed(name))
+            action.toggled.connect(lambda checked, name = name: self.bypassChainStage(name, checked))
+
+            action = menu.addAction('Move Up')
+            action.setEnabled(k > 0)
+            action.triggered.connect(lambda checked, name = name: self.moveChainStage(name, -1))
+
+            action = menu.addAction('Move Down')
+            action.setEnabled(k < len(self.filterChain.stages) - 1)
+            action.triggered.connect(lambda checked, name = name: self.moveChainStage(name, 1))
+
+            action = menu.addAction('Remove')
+            action.setEnabled(name in CHAIN_PRESETS)
+            action.triggered.connect(lambda checked, name = name: self.setChainStage(name, None))
+
+            self.chainActions.append(self.menuChain.addMenu(menu))
+
+        if not self.chainActions:
+            action = self.menuChain.addAction('No Stages')
+            action.setEnabled(False)
+            self.chainActions.append(action)
+
+
+    def setChainStage(self, name, sos):
+        """
+        Adds, replaces or removes (sos is None) a filter chain stage and
+        updates the Filter Chain menu.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+            sos : ndarray
+                Second-order sections of the stage, or None.
+        
+        Returns
+        -------
+            None
+        """
+        index = self.filterChain.index(name)
+        self.filterChain.setStage(name, sos)
+
+        if (index < 0) != (sos is None) and hasattr(self, 'menuChain'):
+            self.updateChainMenu()
+
+
+    def addChainStage(self, name):
+        """
+        Adds a preset stage at the end of the filter chain.
+
+        Parameters
+        ----------
+            name : str
+                Preset name (see CHAIN_PRESETS).
+        
+        Returns
+        -------
+            None
+        """
+        approx, ftype, cutoffs, order = CHAIN_PRESETS[name]
+        self.setChainStage(name, designFilter(approx, ftype, cutoffs, order, self.RATE, output = 'sos'))
 
-            for _ in range(5):
-                bar.next()
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Filter Chain :</b> {' > '.join(self.filterChain.names())}")
 
-            # Note: Some Mac systems have sound cards having a sampling
-            # rate of 48 kHz.
-            if self.opSystem == "Darwin":
-                if self.arg_rate == 44100 or self.arg_rate == 48000:
-                    self.RATE = 48000
-                else:
-                    self.RATE = self.arg_rate
-            else:
-                if self.arg_rate == 44100 or self.arg_rate == 48000:
-                    self.RATE = 44100
-                else:
-                    self.RATE = self.arg_rate
 
-            self.p = pyaudio.PyAudio()
+    def bypassChainStage(self, name, checked):
+        """
+        Bypasses a filter chain stage or puts it back.
 
-            for _ in range(18):
-                bar.next()
+        Parameters
+        ----------
+            name : str
+                Stage name.
 
-            # Get audio device and PyAudio related info
-            # getDeviceInfo(self.txt_Status, self.p)
+            checked : bool
+                True bypasses the stage.
+        
+        Returns
+        -------
+            None
+        """
+        self.filterChain.setBypass(name, checked)
 
-            self.chosen_device_index = -1
-            for x in range(0, self.p.get_device_count()):
-                self.info = self.p.get_device_info_by_index(x)
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Filter Chain :</b> {name} is {'bypassed' if checked else 'active'}.")
 
-                if self.info["name"] == "pulse":
-                    self.chosen_device_index = self.info["index"]
-                    print(f"Chosen index: {self.chosen_device_index}")
 
-            # Try to start streaming the audio input
-            try:
-                self.stream = self.p.open(
-                    format             = self.FORMAT,
-                    channels           = self.CHANNELS,
-                    rate               = self.RATE,
-                    input_device_index = self.chosen_device_index,
-                    input              = True,
-                    output             = False,
-                    frames_per_buffer  = self.CHUNK
-                )
-            except OSError:
-                print("No audio input device is found.")
-                sys.exit()
-                # Might want to change this from exit() to wait
-                # for user input.
-            
-            for _ in range(25):
-                bar.next()
+    def moveChainStage(self, name, offset):
+        """
+        Moves a filter chain stage up or down.
 
-            self.x = np.arange(0, 2 * self.CHUNK, 2)
-            self.f = np.linspace(0, int(self.RATE / 2), int(self.CHUNK / 2))
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+            offset : int
+                -1 moves the stage up, 1 moves it down.
         
-        print(f"Program loading done...")
-        print()
+        Returns
+        -------
+            None
+        """
+        self.filterChain.moveStage(name, offset)
+        self.updateChainMenu()
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Filter Chain :</b> {' > '.join(self.filterChain.names())}")
 
 
-    def start(self):
+    def configureHum(self):
         """
-        Starts up the application (QtGui.QApplication).
+        Sets the hum notch comb stage of the filter chain for the selected
+        mains frequency and builds the drift tracker if it is enabled.
 
         Parameters
         ----------
@@ -340,284 +2137,297 @@ class MainWindow(QtWidgets.QMainWindow):
         -------
             None
         """
-        if (sys.flags.interactive != 1) or not hasattr(QtCore, 'PYQT_VERSION'):
-            QtGui.QApplication.instance().exec_()
+        if self.HUM_MAINS is None:
+            self.humTracker = None
+            self.setChainStage(HUM_STAGE, None)
+            return
 
+        self.humFrequency = float(self.HUM_MAINS)
+        self.humTracker = HumTracker(self.RATE, self.CHUNK, mains = self.HUM_MAINS) if self.HUM_TRACK else None
+        self.setChainStage(HUM_STAGE, designHumComb(self.humFrequency, self.RATE, self.HUM_HARMONICS))
 
-    def setPlotData(self, name, data_x, data_y):
+
+    def setHumRemoval(self, mains):
         """
-        Sets up the plot data into graph widget object. For the time-domain 
-        waveform and the frequency spectrum, the plot properties are passed
-        and the processed data is set to the traces.
+        Changes the mains frequency of the hum notch comb.
 
         Parameters
         ----------
-            name : str
-                Trace name (waveform or spectrum) to set the graph widget.
-            data_x : int
-                Data to be shown in x-axis.
-            data_y : int
-                Data to be shown in y-axis.
+            mains : int
+                Mains frequency (50 or 60 Hz), or None to disable hum
+                removal.
         
         Returns
         -------
             None
         """
-        if name in self.traces:
-            self.traces[name].setData(data_x, data_y)
+        self.HUM_MAINS = mains
+        self.configureHum()
+
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
 
+        if mains is None:
+            self.txt_Status.append(f"<b>Hum Removal :</b> Off is selected.")
         else:
-            if name == 'waveform':
-                self.traces[name] = self.graphWidget_TimeDomain.plot(pen = pg.mkPen('r', width = 5))
-                self.graphWidget_TimeDomain.setXRange(min = 0,
-                                                      max = 2 * self.CHUNK,
-                                                      padding = 0.5,
-                                                      update = True)
-                self.graphWidget_TimeDomain.setYRange(min = -16000, 
-                                                      max = 16000,
-                                                      padding = 0.5,
-                                                      update = True)
-                                                      
-            if name == 'spectrum':
-                self.traces[name] = self.graphWidget_FreqDomain.plot(pen = pg.mkPen('r', width = 5))
-                self.graphWidget_FreqDomain.setLogMode(x = True, y = True)
-                self.graphWidget_FreqDomain.setXRange(min = np.log10(20), 
-                                                      max = np.log10(self.RATE / 2), 
-                                                      padding = 0.1,
-                                                      update = True)
-                self.graphWidget_FreqDomain.setYRange(min = -4,
-                                                      max = 2, 
-                                                      padding = 0.1,
-                                                      update = True)
+            self.txt_Status.append(f"<b>Hum Removal :</b> {mains} Hz and {self.HUM_HARMONICS} harmonics are selected.")
 
 
-    # Pass the data through the high pass filter
-    def filterHighpass(self, data, f_cutoff, fs, approx, order = 5):
+    def setHumTracking(self, checked):
         """
-        Filters raw, real-time data according to the specified lowpass filter
-        specifications such as cutoff frequency, sampling frequency, filter
-        approximation and order.
-
-        If not explicitly specified, the default filter order is 5.
+        Enables or disables drift tracking of the hum notch comb.
 
         Parameters
         ----------
-            data : int
-                Data to be filtered.
-            f_cutoff : float
-                Cutoff frequency of the highpass filter.
-            fs : int
-                Sampling frequency of the highpass filter.
-            approx : str
-                Filter approximation (Butterworth, Chebyshev, ...)
-            order : int
-                Filter order.
+            checked : bool
+                True enables drift tracking.
         
         Returns
         -------
-            y_filtered : int
-                Returns the highpass filtered data.
+            None
         """
-        if approx == 'Butterworth':
-            b, a = designButterHPF(f_cutoff, fs, order = order)
-        elif approx == 'Chebyshev-1':
-            b, a = designChebyshevHPF(f_cutoff, fs, rp = 0.5, order = order)
-        elif approx == 'Chebyshev-2':
-            b, a = designChebyshev2HPF(f_cutoff, fs, rs = 40, order = order)
-        elif approx == 'Elliptic':
-            b, a = designEllipticHPF(f_cutoff, fs, rp = 0.5, rs = 40, order = order)
-        else:
-            b, a = designBesselHPF(f_cutoff, fs, order = order)
+        self.HUM_TRACK = checked
+        self.configureHum()
 
-        y_filtered = lfilter(b, a, data)
-        return y_filtered
-    
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Hum Tracking {'enabled' if checked else 'disabled'}...</b>")
 
-    # Pass the data through the bandpass filter
-    def filterBandpass(self, data, f_lcut, f_hcut, fs, approx, order = 5):
-        """
-        Filters raw, real-time data according to the specified bandpass filter
-        specifications such as cutoff frequencies, sampling frequency, filter
-        approximation and order.
 
-        If not explicitly specified, the default filter order is 5.
+    def setCompressor(self, checked):
+        """
+        Enables or disables the compressor stage.
 
         Parameters
         ----------
-            data : int
-                Data to be filtered.
-            f_lcut : float
-                Lower cutoff frequency of the bandpass filter.
-            f_hcut : float
-                Higher cutoff frequency of the bandpass filter.
-            fs : int
-                Sampling frequency of the bandpass filter.
-            approx : str
-                Filter approximation (Butterworth, Chebyshev, ...)
-            order : int
-                Filter order.
+            checked : bool
+                True enables the compressor.
         
         Returns
         -------
-            y_filtered : int
-                Returns the bandpass filtered data.
+            None
         """
-        if approx == 'Butterworth':
-            b, a = designButterBPF(f_lcut, f_hcut, fs, order = order)
-        elif approx == 'Chebyshev-1':
-            b, a = designChebyshevBPF(f_lcut, f_hcut, fs, rp = 0.5, order = order)
-        elif approx == 'Chebyshev-2':
-            b, a = designChebyshev2BPF(f_lcut, f_hcut, fs, rs = 40, order = order)
-        elif approx == 'Elliptic':
-            b, a = designEllipticBPF(f_lcut, f_hcut, fs, rp = 0.5, rs = 40, order = order)
-        elif approx == 'Bessel':
-            b, a = designBesselBPF(f_lcut, f_hcut, fs, order = order)
-        else:
-            b, a = designIIRPeak(f_hcut, fs, Q = 30)
+        self.COMPRESSOR_EN = checked
+        self.compressor.reset()
 
-        y_filtered = lfilter(b, a, data)
-        return y_filtered
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Compressor {'enabled' if checked else 'disabled'}...</b>")
 
 
-    def update(self):
+    def setLimiter(self, checked):
         """
-        Reads the audio stream and displays the raw data on the waveform graph widget.
-        Based on the options passed to the main window object such as filtering and
-        time-domain windowing, the raw data is processed. The processed data is then
-        converted to frequency domain using FFT (named as sp_data).
+        Enables or disables the limiter stage.
 
         Parameters
         ----------
-            None
+            checked : bool
+                True enables the limiter.
         
         Returns
         -------
             None
         """
-        # Amplitude factor (default = 1)
-        attenuation = tuple([1] * self.CHUNK)
+        self.LIMITER_EN = checked
+        self.limiter.reset()
 
-        # Get time-domain data (audio stream)
-        td_data = self.stream.read(self.CHUNK, exception_on_overflow = False)
-        data_int = struct.unpack(str(self.CHUNK) + 'h', td_data)
-    
-        # Tuple multiplication for obtanining attenuated data_int stream.
-        data_int = tuple(e1 * e2 for e1, e2 in zip(attenuation, data_int))
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Limiter {'enabled' if checked else 'disabled'}...</b>")
 
-        # Print volume (in dB) every 10 update:
-        if self.iter_count % 10 == 0:
-            print(f"Volume: {self.calculateVolume(data_int):.3f} dB.")
+
+    def setMeterWeighting(self, weighting):
+        """
+        Changes the time weighting shown on the level meter.
+
+        Parameters
+        ----------
+            weighting : str
+                Time weighting (Fast, Slow, Impulse).
         
-        self.iter_count += 1
+        Returns
+        -------
+            None
+        """
+        self.meterWidget.setWeighting(weighting)
 
-        self.setPlotData(name = 'waveform',
-                         data_x = self.x,
-                         data_y = data_int)
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Level Meter :</b> {weighting} weighting is selected.")
 
-        # Filtering the raw audio data: bandpass, highpass or no filter
-        currentFilterType = self.box_FilterType.currentText()
-        currentFilterApprox = self.box_Approx.currentText()
-        currentWindow = self.box_Window.currentText()
 
+    def overlapToHop(self, overlap):
+        """
+        Returns the hop size for an overlap percentage.
 
-        # Windowing update
-        if self.chkBox_windowEn.isChecked() and currentWindow == "Hann":
-            window = hanningWindow(M = self.CHUNK)
-            data_int *= window
+        Parameters
+        ----------
+            overlap : float
+                Overlap between consecutive frames in percent.
+        
+        Returns
+        -------
+            hop : int
+                Hop size in samples.
+        """
+        return max(1, int(round(self.FFT_SIZE * (1 - overlap / 100))))
 
-        elif self.chkBox_windowEn.isChecked() and currentWindow == "Hamming":
-            window = hammingWindow(M = self.CHUNK)
-            data_int *= window
 
-        elif self.chkBox_windowEn.isChecked() and currentWindow == "Rectangular":
-            window = rectWindow(M = self.CHUNK)
-            data_int *= window
+    def setOverlap(self, overlap):
+        """
+        Changes the STFT overlap and rebuilds the analysis chain.
 
-        elif self.chkBox_windowEn.isChecked() and currentWindow == "Kaiser":
-            window = kaiserWindow(M = self.CHUNK, beta = 14)
-            data_int *= window
+        Parameters
+        ----------
+            overlap : float
+                Overlap between consecutive frames in percent.
+        
+        Returns
+        -------
+            None
+        """
+        self.HOP_SIZE = self.overlapToHop(overlap)
+        self.configureAnalysis()
 
-        elif self.chkBox_windowEn.isChecked() and currentWindow == "Blackman":
-            window = blackmanWindow(M = self.CHUNK)
-            data_int *= window
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Overlap :</b> {overlap}% ({self.HOP_SIZE} samples hop) is selected.")
 
-        elif self.chkBox_windowEn.isChecked() and currentWindow == "Flattop":
-            window = flattopWindow(M = self.CHUNK)
-            data_int *= window
 
-        else: 
-            data_int *= 1
+    def setDecimation(self, factor):
+        """
+        Changes the decimation factor and rebuilds the analysis chain at
+        the new rate.
 
+        Parameters
+        ----------
+            factor : int
+                Decimation factor.
         
-        # Filtering update
-        if self.chkBox_filterEn.isChecked() and currentFilterType == 'Highpass':
-            f_low_cutoff = float(self.txt_Cutoff_1.text())
-            filter_order = float(self.box_FilterOrder.currentText())
-
-            y_filtered = self.filterHighpass(data_int, f_low_cutoff, self.RATE, currentFilterApprox, filter_order)
-            y_fft = fft(y_filtered)
+        Returns
+        -------
+            None
+        """
+        self.DECIMATION = factor
+        self.configureAnalysis()
 
-        elif self.chkBox_filterEn.isChecked() and currentFilterType == 'Bandpass':
-            f_low_cutoff = float(self.txt_Cutoff_1.text())
-            f_high_cutoff = float(self.txt_Cutoff_2.text())
-            filter_order = float(self.box_FilterOrder.currentText())
+        date = datetime.now()
+        time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+        self.txt_Status.append(time_stamp)
+        self.txt_Status.append(f"<b>Decimation :</b> {factor}x is selected "
+                               f"({self.ANALYSIS_RATE / 2:g} Hz band, {self.f[1]:.2f} Hz resolution).")
 
-            y_filtered = self.filterBandpass(data_int, f_low_cutoff, 
-                                                       f_high_cutoff, 
-                                                       self.RATE, 
-                                                       currentFilterApprox, 
-                                                       filter_order)
-            y_fft = fft(y_filtered)
 
-        else:
-            y_fft = fft(data_int)
+    def updateFilterDesign(self):
+        """
+        Reads the filter settings from the GUI, looks up the matching
+        design in the filter-design cache and hands it to the filter chain
+        (IIR) or to the overlap-save filter (FIR). Connected to the filter checkbox,
+        comboboxes and cutoff text boxes. If the settings cannot be parsed
+        or designed (e.g. while typing a cutoff), the previous design is
+        kept.
 
+        Parameters
+        ----------
+            None
+        
+        Returns
+        -------
+            None
+        """
+        if not self.chkBox_filterEn.isChecked():
+            self.setChainStage(PANEL_STAGE, None)
+            self.firFilter.setDesign(None)
+            return
 
-        sp_data = np.abs(y_fft[0:int(self.CHUNK / 2)]) / (128 * self.CHUNK)
-        self.setPlotData(name = 'spectrum',
-                         data_x = self.f,
-                         data_y = sp_data)
+        currentFilterType = self.box_FilterType.currentText()
+        currentFilterApprox = self.box_Approx.currentText()
 
-        self.maxValFreq = self.f[np.argmax(sp_data[1::])]
+        try:
+            if currentFilterType == 'Bandpass':
+                cutoffs = (float(self.txt_Cutoff_1.text()), float(self.txt_Cutoff_2.text()))
+            else:
+                cutoffs = (float(self.txt_Cutoff_1.text()),)
+
+            filter_order = int(float(self.box_FilterOrder.currentText()))
+
+            if currentFilterApprox in FIR_APPROXIMATIONS:
+                taps, _ = designFilter(currentFilterApprox, 
+                                       currentFilterType, 
+                                       cutoffs, 
+                                       filter_order, 
+                                       self.RATE)
+                self.firFilter.setDesign(taps)
+                self.setChainStage(PANEL_STAGE, None)
+            else:
+                sos = designFilter(currentFilterApprox, 
+                                   currentFilterType, 
+                                   cutoffs, 
+                                   filter_order, 
+                                   self.RATE,
+                                   output = 'sos')
+                self.setChainStage(PANEL_STAGE, sos)
+                self.firFilter.setDesign(None)
+        except ValueError:
+            pass
+
+
+    def checkCaptureStatus(self):
+        """
+        Reports frames dropped by the capture ring buffer and input overflows
+        reported by PortAudio on the status panel, together with the current
+        buffer fill level.
 
-        # Show the frequency at which the audio signal has the greatest
-        # value. Later on, this will probably be used to decide if the motor
-        # is running or not depending on the frequency at which it generates
-        # a single tone.
-        if (20 < self.maxValFreq < 20000) and (self.arg_verbose):
-            print(f"Frequency: {int(self.maxValFreq)} Hz.")
-            freqVal = self.maxValFreq
-            self.statusText = "<b>Frequency:</b> {num:.2f} Hz."
-            self.txt_Freq_Status.append(self.statusText.format(num = freqVal))
+        Parameters
+        ----------
+            None
         
+        Returns
+        -------
+            None
+        """
+        droppedFrames = self.capture.droppedFrames()
+        overflowCount = self.capture.overflows()
+
+        if droppedFrames > self.droppedFrames or overflowCount > self.overflowCount:
+            date = datetime.now()
+            time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+            self.txt_Status.append(time_stamp)
+            self.txt_Status.append(f"<b>Capture :</b> {droppedFrames - self.droppedFrames} frames dropped, "
+                                   f"{overflowCount - self.overflowCount} input overflows "
+                                   f"(buffer {100 * self.capture.fill():.0f}% full).")
+            self.droppedFrames = droppedFrames
+            self.overflowCount = overflowCount
 
-    def calculateVolume(self, data_int):
+
+    def checkAnalysisStatus(self):
         """
-        Gets the unpacked audio stream data and calculates the volume. Returns
-        in decibels.
+        Reports STFT frames dropped before they were transformed on the
+        status panel.
 
         Parameters
         ----------
-            data_int : float
-                Input data stream (already unpacked data).
+            None
         
         Returns
         -------
-            dB : float
-                Volume of the audio stream in decibels (dB).
+            None
         """
-        count = len(data_int) / 2
-        square_sum = 0.0
+        droppedFrames = self.stft.droppedFrames()
 
-        # Calculate the RMS value:
-        for s in data_int:
-            n = s * (1.0 / (2**15))
-            square_sum += n * n
+        if droppedFrames > self.stftDropped:
+            date = datetime.now()
+            time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
+            self.txt_Status.append(time_stamp)
+            self.txt_Status.append(f"<b>Analysis :</b> {droppedFrames - self.stftDropped} STFT frames dropped.")
+            self.stftDropped = droppedFrames
 
-        rms = math.sqrt(square_sum / count)
-        dB = 20 * math.log10(rms)
-        return dB
-    
 
     def getInputDevices(self, pInst):
         """
@@ -718,11 +2528,13 @@ class MainWindow(QtWidgets.QMainWindow):
             None
         """
         currentWindow = self.box_Window.currentText()
+        windowInfo = getWindow(currentWindow, self.FFT_SIZE, sym = False)
 
         date = datetime.now()
         time_stamp = '\n[' + date.strftime('%Y-%m-%d, %H:%M:%S') + ']'
         self.txt_Status.append(time_stamp)
         self.txt_Status.append(f'<b>Window Function :</b> {currentWindow} is selected.')
+        self.txt_Status.append(f'Coherent gain: {windowInfo.coherentGain:.3f}, ENBW: {windowInfo.enbw:.3f} bins.')
 
 
     def showBoxFilterTypeCurrentText(self):
@@ -1301,6 +3113,40 @@ class MainWindow(QtWidgets.QMainWindow):
             plt.tight_layout()
             plt.show()
         
+        elif self.chkBox_filterEn.isChecked() and currentFilterApprox in FIR_APPROXIMATIONS:
+            if currentFilterType == 'Bandpass':
+                cutoffs = (float(self.txt_Cutoff_1.text()), float(self.txt_Cutoff_2.text()))
+            else:
+                cutoffs = (float(self.txt_Cutoff_1.text()),)
+
+            filter_order = float(self.box_FilterOrder.currentText())
+
+            # Design the filter
+            b, a = designFilter(currentFilterApprox, currentFilterType, cutoffs, filter_order, self.RATE)
+            # Get the frequency response of the filter
+            freq, h = freqz(b, a, worN = filter_worN, fs = self.RATE)
+
+            # Plot the response and -6 dB point (half amplitude)
+            plt.xscale("log")
+            plt.plot(freq, 
+                     abs(h), 
+                     label = "Taps = %d" % len(b), 
+                     linewidth = 3, 
+                     color = 'black')
+            plt.plot([0, 0.5 * self.RATE], 
+                     [0.5, 0.5],
+                     '--', 
+                     label = 'Half Amplitude', 
+                     linewidth = 3)
+
+            plt.title(f'{currentFilterApprox} {currentFilterType} Filter Magnitude Response', fontweight = 'bold')
+            plt.xlabel('Frequency (Hz)', fontweight = 'bold')
+            plt.ylabel('Gain', fontweight = 'bold')
+            plt.grid(True)
+            plt.legend(loc = 'best', framealpha = 1, fancybox = False)
+            plt.tight_layout()
+            plt.show()
+
         elif self.chkBox_filterEn.isChecked() and currentFilterType == 'Bandpass' and currentFilterApprox == 'IIR Peak':
             f_low_cutoff = float(self.txt_Cutoff_1.text())
             f_high_cutoff = float(self.txt_Cutoff_2.text())
@@ -1365,32 +3211,32 @@ class MainWindow(QtWidgets.QMainWindow):
         currentWindowType = self.box_Window.currentText()
 
         if self.chkBox_windowEn.isChecked() and currentWindowType == "Hann":
-            currWindow = hanningWindow(M = self.CHUNK)
+            currWindow = getWindow('Hann', self.FFT_SIZE, sym = False).w
             ax1.set_title("Hann Window", fontweight = 'bold')
             ax2.set_title("Hann Window Frequency Response", fontweight = 'bold')
 
         elif self.chkBox_windowEn.isChecked() and currentWindowType == "Hamming":
-            currWindow = hammingWindow(M = self.CHUNK)
+            currWindow = getWindow('Hamming', self.FFT_SIZE, sym = False).w
             ax1.set_title("Hamming Window", fontweight = 'bold')
             ax2.set_title("Hamming Window Frequency Response", fontweight = 'bold')
         
         elif self.chkBox_windowEn.isChecked() and currentWindowType == "Rectangular":
-            currWindow = rectWindow(M = self.CHUNK)
+            currWindow = getWindow('Rectangular', self.FFT_SIZE, sym = False).w
             ax1.set_title("Rectangular (Boxcar) Window", fontweight = 'bold')
             ax2.set_title("Rectangular (Boxcar) Window Frequency Response", fontweight = 'bold')
         
         elif self.chkBox_windowEn.isChecked() and currentWindowType == "Kaiser":
-            currWindow = kaiserWindow(M = self.CHUNK, beta = 14)
+            currWindow = getWindow('Kaiser', self.FFT_SIZE, sym = False).w
             ax1.set_title("Kaiser Window", fontweight = 'bold')
             ax2.set_title("Kaiser Window Frequency Response", fontweight = 'bold')
         
         elif self.chkBox_windowEn.isChecked() and currentWindowType == "Blackman":
-            currWindow = blackmanWindow(M = self.CHUNK)
+            currWindow = getWindow('Blackman', self.FFT_SIZE, sym = False).w
             ax1.set_title("Blackman Window", fontweight = 'bold')
             ax2.set_title("Blackman Window Frequency Response", fontweight = 'bold')
         
         elif self.chkBox_windowEn.isChecked() and currentWindowType == "Flattop":
-            currWindow = flattopWindow(M = self.CHUNK)
+            currWindow = getWindow('Flattop', self.FFT_SIZE, sym = False).w
             ax1.set_title("Flattop Window", fontweight = 'bold')
             ax2.set_title("Flattop Window Frequency Response", fontweight = 'bold')
 
@@ -1401,7 +3247,7 @@ class MainWindow(QtWidgets.QMainWindow):
         ax1.set_xlabel("Sample", fontweight = 'bold')
         ax1.set_ylabel("Amplitude", fontweight = 'bold')
 
-        freq_resp = fft(currWindow, self.CHUNK) / (len(currWindow)/2.0)
+        freq_resp = fft(currWindow, self.FFT_SIZE) / (len(currWindow)/2.0)
         f = np.linspace(-0.5, 0.5, len(freq_resp))
         freq_resp = np.abs(fftshift(freq_resp / abs(freq_resp).max()))
         freq_resp = 20 * np.log10(np.maximum(freq_resp, 1e-10))
@@ -1581,6 +3427,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
             if not self.arg_nologs:
                 saveLog(self.txt_Status, self.arg_fname)
+
+            if self.capture is not None:
+                self.capture.close()
             
             print("Program exited successfully...")
 
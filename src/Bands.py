@@ -0,0 +1,173 @@
+'''
+Fractional-octave band analysis. FFT bins are collapsed into the IEC 61260
+base-10 octave bands with a sparse aggregation matrix, so the band powers of
+a whole spectrum are a single sparse matrix-vector product.
+'''
+
+from collections import namedtuple
+
+import functools
+import numpy as np
+import scipy.sparse
+
+# Band fractions by the names used in the Analysis menu (1/b octave).
+OCTAVE_FRACTIONS = {
+    '1/1' : 1,
+    '1/3' : 3,
+    '1/6' : 6
+}
+
+# Octave frequency ratio (base-10 system) and reference frequency.
+OCTAVE_RATIO = 10 ** (3 / 10)
+REFERENCE_FREQ = 1000.0
+
+# Maximum number of band matrices kept in the cache.
+BAND_CACHE_SIZE = 16
+
+# Aggregation matrix together with the exact band frequencies.
+BandInfo = namedtuple('BandInfo', ['matrix', 'centers', 'lower', 'upper'])
+
+
+def bandCenters(fraction, fmin = 20, fmax = 20000):
+    """
+    Returns the exact midband frequencies of the 1/fraction octave bands
+    between fmin and fmax.
+
+    Parameters
+    ----------
+        fraction : int
+            Bandwidth designator b (1 for octave, 3 for one-third octave).
+
+        fmin : float
+            Lowest midband frequency. Default value is 20 Hz.
+
+        fmax : float
+            Highest midband frequency. Default value is 20 kHz.
+
+    Returns
+    -------
+        centers : ndarray
+            Midband frequencies in ascending order.
+    """
+    assert fraction > 0, 'ERROR: Non-positive band fraction.'
+    assert 0 < fmin < fmax, 'ERROR: Invalid band frequency range.'
+
+    # Odd fractions have a band centered at 1 kHz; even fractions are
+    # shifted by half a band (IEC 61260-1).
+    offset = 0 if fraction % 2 else 0.5
+
+    xMin = np.ceil(fraction * np.log(fmin / REFERENCE_FREQ) / np.log(OCTAVE_RATIO) - offset)
+    xMax = np.floor(fraction * np.log(fmax / REFERENCE_FREQ) / np.log(OCTAVE_RATIO) - offset)
+    x = np.arange(xMin, xMax + 1)
+
+    return REFERENCE_FREQ * OCTAVE_RATIO ** ((x + offset) / fraction)
+
+
+def bandMatrix(fs, nfft, fraction):
+    """
+    Returns the sparse matrix which sums the power of the FFT bins in each
+    1/fraction octave band. The matrix is built once per (fs, nfft,
+    fraction) and then served from a bounded cache. Bands that are above
+    the Nyquist frequency or too narrow to hold an FFT bin are left out.
+
+    Parameters
+    ----------
+        fs : float
+            Sampling frequency.
+
+        nfft : int
+            FFT size of the spectra (nfft // 2 + 1 bins).
+
+        fraction : int
+            Bandwidth designator b (1, 3 or 6).
+
+    Returns
+    -------
+        info : BandInfo
+            CSR matrix of shape (bands, bins) with the midband, lower and
+            upper edge frequencies of the bands.
+    """
+    return _bandMatrix(float(fs), int(nfft), int(fraction))
+
+
+@functools.lru_cache(maxsize = BAND_CACHE_SIZE)
+def _bandMatrix(fs, nfft, fraction):
+    """
+    Builds the band aggregation matrix. Cached by bandMatrix().
+
+    Parameters
+    ----------
+        fs : float
+            Sampling frequency.
+
+        nfft : int
+            FFT size.
+
+        fraction : int
+            Bandwidth designator.
+
+    Returns
+    -------
+        info : BandInfo
+            Band matrix and band frequencies.
+    """
+    assert nfft > 1, 'ERROR: FFT size is too small.'
+
+    f = np.fft.rfftfreq(nfft, d = 1 / fs)
+
+    centers = bandCenters(fraction, fmax = fs / 2)
+    lower = centers * OCTAVE_RATIO ** (-1 / (2 * fraction))
+    upper = centers * OCTAVE_RATIO ** (1 / (2 * fraction))
+
+    # First bin of each band and one past its last bin. Edges are
+    # half-open, so neighbouring bands never share a bin.
+    first = np.searchsorted(f, lower, side = 'left')
+    last = np.searchsorted(f, upper, side = 'left')
+
+    keep = (last > first) & (upper <= fs / 2)
+    centers, lower, upper = centers[keep], lower[keep], upper[keep]
+    first, last = first[keep], last[keep]
+
+    counts = last - first
+    rows = np.repeat(np.arange(len(centers)), counts)
+    cols = np.concatenate([np.arange(a, b) for a, b in zip(first, last)]) if len(centers) else np.zeros(0, dtype = int)
+
+    matrix = scipy.sparse.csr_matrix((np.ones(len(cols)), (rows, cols)),
+                                     shape = (len(centers), len(f)))
+
+    for array in (centers, lower, upper):
+        array.flags.writeable = False
+
+    return BandInfo(matrix, centers, lower, upper)
+
+
+def bandLevels(info, mag, out = None):
+    """
+    Returns the band levels of a magnitude spectrum in dB.
+
+    Parameters
+    ----------
+        info : BandInfo
+            Band matrix as returned by bandMatrix().
+
+        mag : ndarray
+            Magnitude spectrum (one value per FFT bin).
+
+        out : ndarray
+            Optional preallocated array for the levels.
+
+    Returns
+    -------
+        levels : ndarray
+            Band power of every band in dB.
+    """
+    power = info.matrix @ (mag * mag)
+
+    if out is None:
+        out = np.empty(len(power))
+
+    np.maximum(power, 1e-20, out = out)
+    np.log10(out, out = out)
+    out *= 10
+
+    return out
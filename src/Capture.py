@@ -0,0 +1,316 @@
+'''
+Callback-driven audio capture. PortAudio calls into the stream callback
+from its own thread and the samples are written into a preallocated ring
+buffer, so capture never depends on how fast the GUI repaints.
+'''
+
+import numpy as np
+import pyaudio
+
+
+class RingBuffer:
+    def __init__(self, capacity, dtype = np.int16, channels = 1):
+        """
+        Constructs a single-producer / single-consumer ring buffer. The
+        producer (audio callback) only advances the write index and the
+        consumer (GUI thread) only advances the read index, so no lock is
+        needed between them. Frames are stored interleaved, one row of
+        channel samples per frame.
+
+        Parameters
+        ----------
+            capacity : int
+                Number of frames the buffer can hold.
+
+            dtype : numpy dtype
+                Sample type of the buffer. Default is int16.
+
+            channels : int
+                Number of samples per frame. Default is 1.
+
+        Returns
+        -------
+            None
+        """
+        assert capacity > 0, 'ERROR: Non-positive ring buffer capacity.'
+        assert channels > 0, 'ERROR: Non-positive number of channels.'
+
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self.buffer = np.zeros((self.capacity, self.channels), dtype = dtype)
+
+        # Monotonic frame counters. Positions in the buffer are taken
+        # modulo the capacity.
+        self.writeIndex = 0
+        self.readIndex = 0
+
+        # Number of frames that did not fit into the buffer.
+        self.droppedFrames = 0
+
+
+    def level(self):
+        """
+        Returns the number of frames waiting to be read.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            level : int
+                Number of unread frames.
+        """
+        return self.writeIndex - self.readIndex
+
+
+    def fill(self):
+        """
+        Returns how full the buffer is, as a ratio between 0 and 1.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            fill : float
+                Buffer fill ratio.
+        """
+        return self.level() / self.capacity
+
+
+    def write(self, data):
+        """
+        Copies frames into the buffer. If the whole block does not fit,
+        the block is dropped and counted in droppedFrames; the read index
+        is never touched by the producer.
+
+        Parameters
+        ----------
+            data : ndarray
+                Frames to be written, interleaved (flat) or as rows of
+                channel samples.
+
+        Returns
+        -------
+            written : bool
+                True if the block is written, False if it is dropped.
+        """
+        data = np.reshape(data, (-1, self.channels))
+        n = len(data)
+
+        if n > self.capacity - self.level():
+            self.droppedFrames += n
+            return False
+
+        start = self.writeIndex % self.capacity
+        first = min(n, self.capacity - start)
+
+        self.buffer[start:start + first] = data[:first]
+        self.buffer[:n - first] = data[first:]
+
+        # Publish the frames only after they are copied.
+        self.writeIndex += n
+        return True
+
+
+    def read(self, out):
+        """
+        Copies the oldest len(out) frames into out without blocking. Only
+        whole blocks are returned: if not enough frames are available,
+        nothing is consumed.
+
+        Parameters
+        ----------
+            out : ndarray
+                Preallocated (frames, channels) array to be filled.
+
+        Returns
+        -------
+            read : bool
+                True if out is filled, False if not enough frames are
+                available yet.
+        """
+        n = len(out)
+
+        if self.level() < n:
+            return False
+
+        start = self.readIndex % self.capacity
+        first = min(n, self.capacity - start)
+
+        out[:first] = self.buffer[start:start + first]
+        out[first:] = self.buffer[:n - first]
+
+        self.readIndex += n
+        return True
+
+
+class AudioCapture:
+    def __init__(self, pInst, format, channels, rate, deviceIndex,
+                 framesPerBuffer, bufferFrames):
+        """
+        Opens a PyAudio input stream in callback mode. Incoming blocks are
+        written to a ring buffer which the display side reads from.
+
+        Parameters
+        ----------
+            pInst : pyAudio
+                pyAudio instance used for opening the stream.
+
+            format : int
+                PortAudio sample format. Only paInt16 is supported.
+
+            channels : int
+                Number of input channels. The ring buffer keeps the frames
+                interleaved.
+
+            rate : int
+                Sampling rate of the stream.
+
+            deviceIndex : int
+                Input device index.
+
+            framesPerBuffer : int
+                Number of frames PortAudio delivers per callback.
+
+            bufferFrames : int
+                Capacity of the ring buffer in frames.
+
+        Returns
+        -------
+            None
+        """
+        assert format == pyaudio.paInt16, 'ERROR: Only 16-bit capture is supported.'
+
+        self.ring = RingBuffer(bufferFrames, dtype = np.int16, channels = channels)
+
+        # Number of callbacks in which PortAudio reported an overflow.
+        self.overflowCount = 0
+
+        self.stream = pInst.open(
+            format             = format,
+            channels           = channels,
+            rate               = rate,
+            input_device_index = deviceIndex,
+            input              = True,
+            output             = False,
+            frames_per_buffer  = framesPerBuffer,
+            stream_callback    = self.callback
+        )
+
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """
+        PortAudio stream callback. Runs on the audio thread, so it only
+        copies the block into the ring buffer.
+
+        Parameters
+        ----------
+            in_data : bytes
+                Recorded PCM data.
+
+            frame_count : int
+                Number of frames in in_data.
+
+            time_info : dict
+                Timing information passed by PortAudio.
+
+            status : int
+                PortAudio status flags.
+
+        Returns
+        -------
+            (None, paContinue) : tuple
+                No output data, keep the stream running.
+        """
+        if status & pyaudio.paInputOverflow:
+            self.overflowCount += 1
+
+        self.ring.write(np.frombuffer(in_data, dtype = np.int16))
+        return (None, pyaudio.paContinue)
+
+
+    def read(self, out):
+        """
+        Reads a whole frame block from the ring buffer without blocking.
+
+        Parameters
+        ----------
+            out : ndarray
+                Preallocated (frames, channels) array to be filled.
+
+        Returns
+        -------
+            read : bool
+                True if out is filled with new data.
+        """
+        return self.ring.read(out)
+
+
+    def droppedFrames(self):
+        """
+        Returns the number of frames dropped because the ring buffer was full.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            droppedFrames : int
+                Number of dropped frames.
+        """
+        return self.ring.droppedFrames
+
+
+    def overflows(self):
+        """
+        Returns the number of callbacks in which PortAudio reported an
+        input overflow, i.e. samples lost before they reached the callback.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            overflows : int
+                Number of input overflows.
+        """
+        return self.overflowCount
+
+
+    def fill(self):
+        """
+        Returns how full the ring buffer is, as a ratio between 0 and 1.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            fill : float
+                Ring buffer fill ratio.
+        """
+        return self.ring.fill()
+
+
+    def close(self):
+        """
+        Stops and closes the stream.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        if self.stream.is_active():
+            self.stream.stop_stream()
+
+        self.stream.close()
@@ -0,0 +1,252 @@
+'''
+Cross-spectral analysis between a reference and a response channel. The
+auto- and cross-spectra are averaged frame by frame, and the H1 or H2
+transfer function estimate and the magnitude-squared coherence are taken
+from the averages.
+'''
+
+from Spectrum import AnalysisBuffer
+from Spectrum import FFTEngine
+from Windowing import getWindow
+
+import numpy as np
+
+# Transfer function estimators by the names used in the Analysis menu.
+# H1 = Gxy / Gxx is unbiased by noise on the response, H2 = Gyy / Gyx by
+# noise on the reference.
+CROSS_ESTIMATORS = ['H1', 'H2']
+
+# Number of frames in the average. The first frames are averaged
+# linearly, later frames exponentially with the same weight.
+CROSS_AVERAGES = 32
+
+# Smallest auto-spectrum value used in the divisions.
+CROSS_EPS = 1e-20
+
+
+class CrossSpectrum:
+    def __init__(self, nfft, fs, blockSize, workers = 1, backend = 'scipy',
+                 estimator = 'H1', averages = CROSS_AVERAGES):
+        """
+        Constructs a streaming cross-spectrum estimator. Hann-windowed
+        frames of both channels are taken at 50% overlap and transformed
+        together in one batch FFT. The averaged spectra are kept in
+        preallocated arrays and updated in place.
+
+        Parameters
+        ----------
+            nfft : int
+                Frame length and FFT size.
+
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Largest block passed to push().
+
+            workers : int
+                Number of FFT worker threads. Default is 1.
+
+            backend : str
+                FFT backend (scipy, numpy or pyfftw). Default is scipy.
+
+            estimator : str
+                Transfer function estimator (H1 or H2). Default is H1.
+
+            averages : int
+                Number of frames in the average. Default is CROSS_AVERAGES.
+
+        Returns
+        -------
+            None
+        """
+        assert nfft % 2 == 0, 'ERROR: Odd cross-spectrum frame size.'
+        assert averages > 0, 'ERROR: Non-positive number of averages.'
+
+        self.fs = fs
+        self.nfft = int(nfft)
+        self.hopSize = self.nfft // 2
+        self.averages = int(averages)
+
+        maxFrames = int(blockSize) // self.hopSize + 2
+        self.reference = AnalysisBuffer(self.nfft, self.hopSize, blockSize, maxFrames = maxFrames)
+        self.response = AnalysisBuffer(self.nfft, self.hopSize, blockSize, maxFrames = maxFrames)
+
+        # Reference frames followed by the response frames of one batch
+        self.fftEngine = FFTEngine(self.nfft, workers = workers, backend = backend, maxBatch = 2 * maxFrames)
+        self.frameBuffer = np.zeros((2 * maxFrames, self.nfft))
+        self.window = getWindow('Hann', self.nfft, sym = False).w
+        self.nbins = self.fftEngine.nbins
+
+        # Averaged auto-spectra (Gxx, Gyy) and cross-spectrum (Gxy)
+        self.Gxx = np.zeros(self.nbins)
+        self.Gyy = np.zeros(self.nbins)
+        self.Gxy = np.zeros(self.nbins, dtype = np.complex128)
+
+        # Transfer function, its magnitude (dB) and phase (degrees) and
+        # the coherence
+        self.H = np.zeros(self.nbins, dtype = np.complex128)
+        self.magnitude = np.zeros(self.nbins)
+        self.phase = np.zeros(self.nbins)
+        self.coherence = np.zeros(self.nbins)
+
+        self.setEstimator(estimator)
+        self.reset()
+
+
+    def setEstimator(self, estimator):
+        """
+        Changes the transfer function estimator. The averages are kept.
+
+        Parameters
+        ----------
+            estimator : str
+                Transfer function estimator (H1 or H2).
+
+        Returns
+        -------
+            None
+        """
+        if estimator not in CROSS_ESTIMATORS:
+            raise ValueError(f"Unknown transfer function estimator: {estimator}")
+
+        self.estimator = estimator
+
+
+    def reset(self):
+        """
+        Clears the stream buffers and restarts the averages.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.reference.reset()
+        self.response.reset()
+        self.Gxx.fill(0)
+        self.Gyy.fill(0)
+        self.Gxy.fill(0)
+        self.frameCount = 0
+
+
+    def push(self, x, y):
+        """
+        Appends a block of both channels to the streams.
+
+        Parameters
+        ----------
+            x : ndarray
+                Reference samples.
+
+            y : ndarray
+                Response samples (same length as x).
+
+        Returns
+        -------
+            None
+        """
+        self.reference.push(x)
+        self.response.push(y)
+
+
+    def process(self):
+        """
+        Transforms every pending frame pair in one batch and adds the
+        frames to the averages. The transfer function and the coherence
+        are updated from the new averages.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            updated : bool
+                True if new frames were averaged.
+        """
+        count = self.reference.available()
+
+        if count == 0:
+            return False
+
+        frames = self.frameBuffer[:2 * count]
+        np.multiply(self.reference.frames(count), self.window, out = frames[:count])
+        np.multiply(self.response.frames(count), self.window, out = frames[count:])
+        self.reference.consume(count)
+        self.response.consume(count)
+
+        spectra = self.fftEngine.rfft(frames)
+        X = spectra[:count]
+        Y = spectra[count:]
+
+        # Cumulative mean over the first frames, then exponential averaging
+        self.frameCount += count
+        if self.frameCount <= self.averages:
+            weight = count / self.frameCount
+        else:
+            weight = min(1.0, count / self.averages)
+
+        self.Gxx *= 1 - weight
+        self.Gxx += weight * np.mean(np.square(np.abs(X)), axis = 0)
+        self.Gyy *= 1 - weight
+        self.Gyy += weight * np.mean(np.square(np.abs(Y)), axis = 0)
+        self.Gxy *= 1 - weight
+        self.Gxy += weight * np.mean(np.conj(X) * Y, axis = 0)
+
+        self.update()
+        return True
+
+
+    def update(self):
+        """
+        Computes the transfer function estimate, its magnitude and phase,
+        and the coherence from the averaged spectra.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        Gxx = np.maximum(self.Gxx, CROSS_EPS)
+        Gyy = np.maximum(self.Gyy, CROSS_EPS)
+
+        if self.estimator == 'H1':
+            np.divide(self.Gxy, Gxx, out = self.H)
+        else:
+            np.divide(Gyy, np.conj(self.Gxy) + CROSS_EPS, out = self.H)
+
+        np.abs(self.H, out = self.magnitude)
+        np.maximum(self.magnitude, CROSS_EPS, out = self.magnitude)
+        np.log10(self.magnitude, out = self.magnitude)
+        self.magnitude *= 20
+
+        np.arctan2(self.H.imag, self.H.real, out = self.phase)
+        np.degrees(self.phase, out = self.phase)
+
+        np.abs(self.Gxy, out = self.coherence)
+        np.square(self.coherence, out = self.coherence)
+        self.coherence /= Gxx * Gyy
+        np.minimum(self.coherence, 1.0, out = self.coherence)
+
+
+    def frequencies(self):
+        """
+        Returns the frequency axis of the spectra.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            f : ndarray
+                Bin frequencies in Hz.
+        """
+        return self.fftEngine.frequencies(self.fs)
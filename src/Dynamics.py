@@ -0,0 +1,239 @@
+'''
+Dynamic range processing of the sample stream: a feed-forward compressor
+and a lookahead limiter. The level detector, the gain computer and the
+lookahead run vectorized over control frames of a few samples; only the
+attack/release smoothing steps from frame to frame, and the gain is
+interpolated back to the samples.
+'''
+
+from Metering import FULL_SCALE
+from numpy.lib.stride_tricks import as_strided
+
+import numpy as np
+
+# Number of samples per control frame of the gain computer.
+CONTROL_SIZE = 32
+
+
+class Compressor:
+    def __init__(self, fs, blockSize, threshold = -20.0, ratio = 4.0, knee = 6.0,
+                 attack = 0.005, release = 0.1, lookahead = 0.005, makeup = 0.0):
+        """
+        Constructs a feed-forward compressor with a soft knee, peak level
+        detection and lookahead for blocks of a fixed size.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Number of samples per block. Must be a multiple of
+                CONTROL_SIZE.
+
+            threshold : float
+                Threshold in dBFS. Default is -20 dBFS.
+
+            ratio : float
+                Compression ratio. np.inf makes a limiter. Default is 4.
+
+            knee : float
+                Width of the soft knee in dB. Default is 6 dB.
+
+            attack : float
+                Attack time constant in seconds. Default is 5 ms.
+
+            release : float
+                Release time constant in seconds. Default is 100 ms.
+
+            lookahead : float
+                Lookahead time in seconds. The output is delayed by this
+                time (rounded up to whole control frames). Default is 5 ms.
+
+            makeup : float
+                Makeup gain in dB. Default is 0 dB.
+
+        Returns
+        -------
+            None
+        """
+        assert blockSize % CONTROL_SIZE == 0, 'ERROR: Block size is not a multiple of the control frame size.'
+        assert ratio >= 1, 'ERROR: Compression ratio is less than 1.'
+        assert knee >= 0, 'ERROR: Negative knee width.'
+        assert attack > 0 and release > 0, 'ERROR: Non-positive time constant.'
+        assert lookahead >= 0, 'ERROR: Negative lookahead time.'
+
+        self.fs = fs
+        self.blockSize = int(blockSize)
+        self.frames = self.blockSize // CONTROL_SIZE
+
+        self.threshold = threshold
+        self.slope = 1 / ratio - 1
+        self.knee = knee
+        self.makeup = makeup
+
+        # Smoothing coefficients per control frame
+        frameTime = CONTROL_SIZE / fs
+        self.attackCoeff = np.exp(-frameTime / attack)
+        self.releaseCoeff = np.exp(-frameTime / release)
+
+        # Lookahead in control frames and the matching sample delay
+        self.lookaheadFrames = int(np.ceil(lookahead * fs / CONTROL_SIZE))
+        self.delay = self.lookaheadFrames * CONTROL_SIZE
+
+        # Delay line (previous samples followed by the current block),
+        # gain targets of the last lookahead frames followed by the
+        # current block, interpolation ramp and output buffer
+        self.line = np.zeros(self.delay + self.blockSize)
+        self.targets = np.zeros(self.lookaheadFrames + self.frames)
+        self.gains = np.zeros(self.frames)
+        self.ramp = np.arange(1, CONTROL_SIZE + 1) / CONTROL_SIZE
+        self.out = np.zeros(self.blockSize)
+
+        self.reset()
+
+
+    def reset(self):
+        """
+        Clears the delay line and the envelope.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.line.fill(0)
+        self.targets.fill(0)
+        self.gain = 0.0
+        self.gainReduction = 0.0
+
+
+    def gainComputer(self, level):
+        """
+        Returns the static gain (dB) for input levels (dBFS): unity below
+        the knee, a quadratic transition inside it and the compression
+        slope above it.
+
+        Parameters
+        ----------
+            level : ndarray
+                Input levels in dBFS.
+
+        Returns
+        -------
+            gain : ndarray
+                Gain in dB (zero or negative).
+        """
+        over = level - self.threshold
+        gain = np.where(over > 0, self.slope * over, 0.0)
+
+        if self.knee > 0:
+            inKnee = np.abs(over) <= self.knee / 2
+            gain[inKnee] = self.slope * (over[inKnee] + self.knee / 2)**2 / (2 * self.knee)
+
+        return gain
+
+
+    def process(self, x):
+        """
+        Processes one block.
+
+        Parameters
+        ----------
+            x : ndarray
+                Block of blockSize samples on the int16 scale.
+
+        Returns
+        -------
+            y : ndarray
+                Processed samples, delayed by the lookahead time. The
+                array is reused by the next call.
+        """
+        assert len(x) == self.blockSize, 'ERROR: Unexpected block length.'
+
+        # Peak level of every control frame
+        peak = np.max(np.abs(np.reshape(x, (self.frames, CONTROL_SIZE))), axis = 1)
+        level = 20 * np.log10(np.maximum(peak, 1e-9) / FULL_SCALE)
+
+        # Gain targets. With lookahead, each output frame takes the lowest
+        # target of the frames it precedes, so the gain is already down
+        # when a peak leaves the delay line.
+        n = self.lookaheadFrames
+        self.targets[:n] = self.targets[self.frames:]
+        self.targets[n:] = self.gainComputer(level)
+
+        stride = self.targets.strides[0]
+        windows = as_strided(self.targets, shape = (self.frames, n + 1), strides = (stride, stride))
+        target = np.min(windows, axis = 1)
+
+        # Attack/release smoothing, one step per control frame
+        gain = self.gain
+        attack, release = self.attackCoeff, self.releaseCoeff
+
+        for k, t in enumerate(target.tolist()):
+            coeff = attack if t < gain else release
+            gain = coeff * gain + (1 - coeff) * t
+            self.gains[k] = gain
+
+        # Linear interpolation of the frame gains across the samples
+        previous = np.empty(self.frames)
+        previous[0] = self.gain
+        previous[1:] = self.gains[:-1]
+        gainDb = previous[:, np.newaxis] + (self.gains - previous)[:, np.newaxis] * self.ramp
+
+        self.gain = gain
+        self.gainReduction = -np.min(self.gains)
+
+        # Delay the signal by the lookahead time and apply the gain
+        self.line[:self.delay] = self.line[self.blockSize:]
+        self.line[self.delay:] = x
+
+        np.multiply(self.line[:self.blockSize], 10 ** ((gainDb.ravel() + self.makeup) / 20), out = self.out)
+        return self.out
+
+
+class Limiter(Compressor):
+    def __init__(self, fs, blockSize, threshold = -1.0, attack = 0.001, release = 0.05,
+                 lookahead = 0.005, makeup = 0.0):
+        """
+        Constructs a lookahead peak limiter: a compressor with an infinite
+        ratio and a hard knee.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Number of samples per block.
+
+            threshold : float
+                Ceiling in dBFS. Default is -1 dBFS.
+
+            attack : float
+                Attack time constant in seconds. Default is 1 ms.
+
+            release : float
+                Release time constant in seconds. Default is 50 ms.
+
+            lookahead : float
+                Lookahead time in seconds. Default is 5 ms.
+
+            makeup : float
+                Makeup gain in dB. Default is 0 dB.
+
+        Returns
+        -------
+            None
+        """
+        super(Limiter, self).__init__(fs, blockSize,
+                                      threshold = threshold,
+                                      ratio     = np.inf,
+                                      knee      = 0.0,
+                                      attack    = attack,
+                                      release   = release,
+                                      lookahead = lookahead,
+                                      makeup    = makeup)
@@ -1,7 +1,12 @@
 from scipy import signal
+from collections import namedtuple
 
+import scipy.fft
+import functools
+import numpy as np
 
-def designButterHPF(f_cutoff, fs, order = 5):
+
+def designButterHPF(f_cutoff, fs, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital Butterworth highpass filter.
 
@@ -15,19 +20,25 @@ def designButterHPF(f_cutoff, fs, order = 5):
         
         order : int
             Order of the highpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Butterworth filter.
+
+        sos : ndarray
+            Second-order sections of the Butterworth filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     f_cutoff = f_cutoff / nyq
-    b, a = signal.butter(order, f_cutoff, btype = 'high', analog = False)
-    return b, a
+    return signal.butter(order, f_cutoff, btype = 'high', analog = False, output = output)
 
 
-def designButterBPF(f_lc, f_hc, fs, order = 5):
+def designButterBPF(f_lc, f_hc, fs, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital Butterworth bandpass filter.
 
@@ -44,20 +55,26 @@ def designButterBPF(f_lc, f_hc, fs, order = 5):
         
         order : int
             Order of the bandpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Butterworth filter.
+
+        sos : ndarray
+            Second-order sections of the Butterworth filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     low = f_lc / nyq
     high = f_hc / nyq
-    b, a = signal.butter(order, [low, high], btype = 'bandpass', analog = False)
-    return b, a
+    return signal.butter(order, [low, high], btype = 'bandpass', analog = False, output = output)
 
 
-def designChebyshevHPF(f_cutoff, fs, rp = 0.5, order = 5):
+def designChebyshevHPF(f_cutoff, fs, rp = 0.5, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital type-I Chebyshev highpass filter.
 
@@ -75,19 +92,25 @@ def designChebyshevHPF(f_cutoff, fs, rp = 0.5, order = 5):
         
         order : int
             Order of the highpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Chebyshev-1 filter.
+
+        sos : ndarray
+            Second-order sections of the Chebyshev-1 filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     f_cutoff = f_cutoff / nyq
-    b, a = signal.cheby1(N = order, rp = rp, Wn = f_cutoff, btype = 'high', analog = False)
-    return b, a
+    return signal.cheby1(N = order, rp = rp, Wn = f_cutoff, btype = 'high', analog = False, output = output)
 
 
-def designChebyshevBPF(f_lc, f_hc, fs, rp = 0.5, order = 5):
+def designChebyshevBPF(f_lc, f_hc, fs, rp = 0.5, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital type-I Chebyshev bandpass filter.
 
@@ -108,20 +131,26 @@ def designChebyshevBPF(f_lc, f_hc, fs, rp = 0.5, order = 5):
         
         order : int
             Order of the bandpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Chebyshev-1 filter.
+
+        sos : ndarray
+            Second-order sections of the Chebyshev-1 filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     low = f_lc / nyq
     high = f_hc / nyq
-    b, a = signal.cheby1(N = order, rp = rp, Wn = [low, high], btype = 'bandpass', analog = False)
-    return b, a
+    return signal.cheby1(N = order, rp = rp, Wn = [low, high], btype = 'bandpass', analog = False, output = output)
 
 
-def designChebyshev2HPF(f_cutoff, fs, rs = 40, order = 5):
+def designChebyshev2HPF(f_cutoff, fs, rs = 40, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital type-II Chebyshev highpass filter.
 
@@ -139,19 +168,25 @@ def designChebyshev2HPF(f_cutoff, fs, rs = 40, order = 5):
         
         order : int
             Order of the highpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Chebyshev-2 filter.
+
+        sos : ndarray
+            Second-order sections of the Chebyshev-2 filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     f_cutoff = f_cutoff / nyq
-    b, a = signal.cheby2(N = order, rs = rs, Wn = f_cutoff, btype = 'high', analog = False)
-    return b, a
+    return signal.cheby2(N = order, rs = rs, Wn = f_cutoff, btype = 'high', analog = False, output = output)
 
 
-def designChebyshev2BPF(f_lc, f_hc, fs, rs = 40, order = 5):
+def designChebyshev2BPF(f_lc, f_hc, fs, rs = 40, order = 5, output = 'ba'):
     """
     Returns polynomials for a digital type-II Chebyshev bandpass filter.
 
@@ -172,20 +207,26 @@ def designChebyshev2BPF(f_lc, f_hc, fs, rs = 40, order = 5):
         
         order : int
             Order of the bandpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Chebyshev-2 filter.
+
+        sos : ndarray
+            Second-order sections of the Chebyshev-2 filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     low = f_lc / nyq
     high = f_hc / nyq
-    b, a = signal.cheby2(N = order, rs = rs, Wn = [low, high], btype = 'bandpass', analog = False)
-    return b, a
+    return signal.cheby2(N = order, rs = rs, Wn = [low, high], btype = 'bandpass', analog = False, output = output)
 
 
-def designEllipticHPF(f_cutoff, fs, rp = 0.5, rs = 40, order = 5):
+def designEllipticHPF(f_cutoff, fs, rp = 0.5, rs = 40, order = 5, output = 'ba'):
     """
     Returns polynomials for an Elliptic highpass filter.
 
@@ -204,19 +245,25 @@ def designEllipticHPF(f_cutoff, fs, rp = 0.5, rs = 40, order = 5):
         
         order : int
             Order of the highpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Elliptic filter.
+
+        sos : ndarray
+            Second-order sections of the Elliptic filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     f_cutoff = f_cutoff / nyq
-    b, a = signal.ellip(N = order, rp = rp, rs = rs, Wn = f_cutoff, btype = 'high', analog = False)
-    return b, a
+    return signal.ellip(N = order, rp = rp, rs = rs, Wn = f_cutoff, btype = 'high', analog = False, output = output)
 
 
-def designEllipticBPF(f_lc, f_hc, fs, rp = 0.5, rs = 40, order = 5):
+def designEllipticBPF(f_lc, f_hc, fs, rp = 0.5, rs = 40, order = 5, output = 'ba'):
     """
     Returns polynomials for an Elliptic bandpass filter.
 
@@ -241,20 +288,26 @@ def designEllipticBPF(f_lc, f_hc, fs, rp = 0.5, rs = 40, order = 5):
         
         order : int
             Order of the bandpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Elliptic filter.
+
+        sos : ndarray
+            Second-order sections of the Elliptic filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     low = f_lc / nyq
     high = f_hc / nyq
-    b, a = signal.ellip(N = order, rp = rp, rs = rs, Wn = [low, high], btype = 'bandpass', analog = False)
-    return b, a
+    return signal.ellip(N = order, rp = rp, rs = rs, Wn = [low, high], btype = 'bandpass', analog = False, output = output)
 
 
-def designBesselHPF(f_cutoff, fs, order = 5):
+def designBesselHPF(f_cutoff, fs, order = 5, output = 'ba'):
     """
     Returns polynomials for a Bessel highpass filter.
 
@@ -268,19 +321,25 @@ def designBesselHPF(f_cutoff, fs, order = 5):
         
         order : int
             Order of the highpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Bessel filter.
+
+        sos : ndarray
+            Second-order sections of the Bessel filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     f_cutoff = f_cutoff / nyq
-    b, a = signal.bessel(N = int(order), Wn = f_cutoff, btype = 'highpass', analog = False)
-    return b, a
+    return signal.bessel(N = int(order), Wn = f_cutoff, btype = 'highpass', analog = False, output = output)
 
 
-def designBesselBPF(f_lc, f_hc, fs, order = 5):
+def designBesselBPF(f_lc, f_hc, fs, order = 5, output = 'ba'):
     """
     Returns polynomials for a Bessel bandpass filter.
 
@@ -297,20 +356,26 @@ def designBesselBPF(f_lc, f_hc, fs, order = 5):
         
         order : int
             Order of the bandpass filter. Default value is 5.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
     
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the Bessel filter.
+
+        sos : ndarray
+            Second-order sections of the Bessel filter, if output is 'sos'.
     """
     nyq = 0.5 * fs
     low = f_lc / nyq
     high = f_hc / nyq
-    b, a = signal.bessel(N = int(order), Wn = [low, high], btype = 'bandpass', analog = False)
-    return b, a
+    return signal.bessel(N = int(order), Wn = [low, high], btype = 'bandpass', analog = False, output = output)
 
 
-def designIIRPeak(f0, fs, Q = 30):
+def designIIRPeak(f0, fs, Q = 30, output = 'ba'):
     """
     Returns polynomials for a second-order IIR peak (resonant) digital filter.
 
@@ -324,11 +389,1113 @@ def designIIRPeak(f0, fs, Q = 30):
 
         Q : float
             Quality factor.
-        
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
+    
     Returns
     -------
         b, a : ndarray
             Numerator and denominator polynomials of the IIR filter.
+
+        sos : ndarray
+            Second-order sections of the IIR filter, if output is 'sos'.
     """
     b, a = signal.iirpeak(w0 = f0, Q = Q, fs = fs)
+
+    if output == 'sos':
+        return signal.tf2sos(b, a)
+
+    return b, a
+
+
+def designIIRNotch(f0, fs, Q = 30, output = 'ba'):
+    """
+    Returns polynomials for a second-order IIR notch digital filter.
+
+    Parameters
+    ----------
+        f0 : float
+            Frequency to be removed from the signal.
+        
+        fs : float
+            Sampling frequency of the IIR notch filter.
+
+        Q : float
+            Quality factor.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
+    
+    Returns
+    -------
+        b, a : ndarray
+            Numerator and denominator polynomials of the IIR filter.
+
+        sos : ndarray
+            Second-order sections of the IIR filter, if output is 'sos'.
+    """
+    b, a = signal.iirnotch(w0 = f0, Q = Q, fs = fs)
+
+    if output == 'sos':
+        return signal.tf2sos(b, a)
+
+    return b, a
+
+
+# Linear-phase FIR approximations. They are run with an OverlapSaveFilter
+# instead of second-order sections.
+FIR_APPROXIMATIONS = ['FIR Windowed-Sinc', 'FIR Least-Squares']
+
+# Number of FIR taps per filter order selected in the GUI (plus one, so
+# the filter has an integer group delay).
+FIR_TAPS_PER_ORDER = 128
+
+# Transition width of the least-squares designs in units of fs / numtaps.
+FIR_TRANSITION = 4.0
+
+
+def firTaps(order):
+    """
+    Returns the number of FIR taps for a filter order selected in the GUI.
+
+    Parameters
+    ----------
+        order : int
+            Filter order.
+
+    Returns
+    -------
+        numtaps : int
+            Odd number of taps.
+    """
+    return FIR_TAPS_PER_ORDER * int(order) + 1
+
+
+def designFirwinHPF(f_cutoff, fs, numtaps = 641, window = 'hamming'):
+    """
+    Returns the taps of a linear-phase windowed-sinc FIR highpass filter.
+
+    Parameters
+    ----------
+        f_cutoff : float
+            Cutoff frequency (-6 dB) of the highpass filter.
+        
+        fs : float
+            Sampling frequency of the highpass filter.
+        
+        numtaps : int
+            Number of taps (odd). Default value is 641.
+
+        window : str
+            Window of the design. Default is Hamming.
+    
+    Returns
+    -------
+        h : ndarray
+            Taps of the FIR filter.
+    """
+    return signal.firwin(numtaps, f_cutoff, window = window, pass_zero = 'highpass', fs = fs)
+
+
+def designFirwinBPF(f_lc, f_hc, fs, numtaps = 641, window = 'hamming'):
+    """
+    Returns the taps of a linear-phase windowed-sinc FIR bandpass filter.
+
+    Parameters
+    ----------
+        f_lc : float
+            Low cutoff frequency (-6 dB).
+
+        f_hc : float
+            High cutoff frequency (-6 dB).
+        
+        fs : float
+            Sampling frequency of the bandpass filter.
+        
+        numtaps : int
+            Number of taps (odd). Default value is 641.
+
+        window : str
+            Window of the design. Default is Hamming.
+    
+    Returns
+    -------
+        h : ndarray
+            Taps of the FIR filter.
+    """
+    return signal.firwin(numtaps, [f_lc, f_hc], window = window, pass_zero = 'bandpass', fs = fs)
+
+
+def designFirlsHPF(f_cutoff, fs, numtaps = 641):
+    """
+    Returns the taps of a linear-phase least-squares FIR highpass filter.
+    The stopband ends FIR_TRANSITION * fs / numtaps below the cutoff.
+
+    Parameters
+    ----------
+        f_cutoff : float
+            Passband edge of the highpass filter.
+        
+        fs : float
+            Sampling frequency of the highpass filter.
+        
+        numtaps : int
+            Number of taps (odd). Default value is 641.
+    
+    Returns
+    -------
+        h : ndarray
+            Taps of the FIR filter.
+    """
+    width = min(FIR_TRANSITION * fs / numtaps, 0.5 * f_cutoff)
+    bands = [0, f_cutoff - width, f_cutoff, 0.5 * fs]
+    return signal.firls(numtaps, bands, [0, 0, 1, 1], fs = fs)
+
+
+def designFirlsBPF(f_lc, f_hc, fs, numtaps = 641):
+    """
+    Returns the taps of a linear-phase least-squares FIR bandpass filter.
+    The stopbands end FIR_TRANSITION * fs / numtaps outside the passband.
+
+    Parameters
+    ----------
+        f_lc : float
+            Low passband edge.
+
+        f_hc : float
+            High passband edge.
+        
+        fs : float
+            Sampling frequency of the bandpass filter.
+        
+        numtaps : int
+            Number of taps (odd). Default value is 641.
+    
+    Returns
+    -------
+        h : ndarray
+            Taps of the FIR filter.
+    """
+    nyq = 0.5 * fs
+    width = min(FIR_TRANSITION * fs / numtaps, 0.5 * f_lc, 0.5 * (nyq - f_hc))
+    bands = [0, f_lc - width, f_lc, f_hc, f_hc + width, nyq]
+    return signal.firls(numtaps, bands, [0, 0, 1, 1, 0, 0], fs = fs)
+
+
+# Maximum number of filter designs kept in the cache.
+FILTER_CACHE_SIZE = 32
+
+
+def designFilter(approx, ftype, cutoffs, order, fs, rp = 0.5, rs = 40, Q = 30, output = 'ba'):
+    """
+    Returns the filter selected in the GUI. Designs are memoized by
+    (approximation, type, cutoffs, order, fs, rp, rs, Q, output), so a
+    filter is only designed again when one of its settings changes.
+
+    Parameters
+    ----------
+        approx : str
+            Filter approximation (Butterworth, Chebyshev-1, Chebyshev-2,
+            Elliptic, Bessel, FIR Windowed-Sinc, FIR Least-Squares,
+            IIR Peak, IIR Notch).
+
+        ftype : str
+            Filter type (Highpass, Bandpass or Notch).
+
+        cutoffs : tuple
+            Cutoff frequency for the highpass filter, or low and high
+            cutoff frequencies for the bandpass filter. The IIR peak
+            filter is centered at the high cutoff frequency, the notch
+            filter at the only one.
+
+        order : int
+            Order of the filter. FIR filters have firTaps(order) taps.
+
+        fs : float
+            Sampling frequency of the filter.
+
+        rp : float
+            Maximum ripple allowed in the passband (dB). Default is 0.5 dB.
+
+        rs : float
+            Minimum attenuation desired in the stopband (dB). Default is 40 dB.
+
+        Q : float
+            Quality factor of the IIR peak and notch filters. Default is 30.
+
+        output : str
+            Type of output: numerator/denominator ('ba') or second-order
+            sections ('sos'). Default is 'ba'.
+
+    Returns
+    -------
+        b, a : ndarray
+            Read-only numerator and denominator polynomials of the filter.
+
+        sos : ndarray
+            Read-only second-order sections of the filter, if output is 'sos'.
+            FIR approximations only have the 'ba' output (a is [1]).
+    """
+    cutoffs = tuple(float(f) for f in cutoffs)
+    return _designFilter(approx, ftype, cutoffs, int(order), float(fs), float(rp), float(rs), float(Q), output)
+
+
+@functools.lru_cache(maxsize = FILTER_CACHE_SIZE)
+def _designFilter(approx, ftype, cutoffs, order, fs, rp, rs, Q, output):
+    """
+    Designs the filter for designFilter(). Arguments are normalized so
+    that equal settings share one cache entry.
+
+    Parameters
+    ----------
+        See designFilter().
+
+    Returns
+    -------
+        b, a or sos : ndarray
+            Read-only filter coefficients.
+    """
+    if approx in FIR_APPROXIMATIONS and output != 'ba':
+        raise ValueError(f"FIR approximations have no '{output}' output.")
+
+    if ftype == 'Highpass':
+        f_cutoff = cutoffs[0]
+
+        if approx == 'Butterworth':
+            coeffs = designButterHPF(f_cutoff, fs, order = order, output = output)
+        elif approx == 'Chebyshev-1':
+            coeffs = designChebyshevHPF(f_cutoff, fs, rp = rp, order = order, output = output)
+        elif approx == 'Chebyshev-2':
+            coeffs = designChebyshev2HPF(f_cutoff, fs, rs = rs, order = order, output = output)
+        elif approx == 'Elliptic':
+            coeffs = designEllipticHPF(f_cutoff, fs, rp = rp, rs = rs, order = order, output = output)
+        elif approx == 'Bessel':
+            coeffs = designBesselHPF(f_cutoff, fs, order = order, output = output)
+        elif approx == 'FIR Windowed-Sinc':
+            coeffs = designFirwinHPF(f_cutoff, fs, numtaps = firTaps(order)), np.ones(1)
+        elif approx == 'FIR Least-Squares':
+            coeffs = designFirlsHPF(f_cutoff, fs, numtaps = firTaps(order)), np.ones(1)
+        else:
+            raise ValueError(f"Unknown highpass approximation: {approx}")
+
+    elif ftype == 'Bandpass':
+        f_lc, f_hc = cutoffs
+
+        if approx == 'Butterworth':
+            coeffs = designButterBPF(f_lc, f_hc, fs, order = order, output = output)
+        elif approx == 'Chebyshev-1':
+            coeffs = designChebyshevBPF(f_lc, f_hc, fs, rp = rp, order = order, output = output)
+        elif approx == 'Chebyshev-2':
+            coeffs = designChebyshev2BPF(f_lc, f_hc, fs, rs = rs, order = order, output = output)
+        elif approx == 'Elliptic':
+            coeffs = designEllipticBPF(f_lc, f_hc, fs, rp = rp, rs = rs, order = order, output = output)
+        elif approx == 'Bessel':
+            coeffs = designBesselBPF(f_lc, f_hc, fs, order = order, output = output)
+        elif approx == 'FIR Windowed-Sinc':
+            coeffs = designFirwinBPF(f_lc, f_hc, fs, numtaps = firTaps(order)), np.ones(1)
+        elif approx == 'FIR Least-Squares':
+            coeffs = designFirlsBPF(f_lc, f_hc, fs, numtaps = firTaps(order)), np.ones(1)
+        elif approx == 'IIR Peak':
+            coeffs = designIIRPeak(f_hc, fs, Q = Q, output = output)
+        else:
+            raise ValueError(f"Unknown bandpass approximation: {approx}")
+
+    elif ftype == 'Notch':
+        if approx == 'IIR Notch':
+            coeffs = designIIRNotch(cutoffs[0], fs, Q = Q, output = output)
+        else:
+            raise ValueError(f"Unknown notch approximation: {approx}")
+
+    else:
+        raise ValueError(f"Unknown filter type: {ftype}")
+
+    if output == 'sos':
+        coeffs.flags.writeable = False
+        return coeffs
+
+    b, a = coeffs
+    b.flags.writeable = False
+    a.flags.writeable = False
     return b, a
+
+
+# Mains frequencies offered for hum removal (Hz).
+HUM_MAINS = [50, 60]
+
+# Default number of harmonics notched above the mains fundamental.
+HUM_HARMONICS = 10
+
+# Notches are only placed below this fraction of the Nyquist frequency.
+HUM_MAX_FREQ = 0.9
+
+
+@functools.lru_cache(maxsize = FILTER_CACHE_SIZE)
+def designHumComb(f0, fs, harmonics = HUM_HARMONICS, Q = 30):
+    """
+    Returns a comb of second-order IIR notches at the mains fundamental
+    and its harmonics as one cascade of second-order sections. The
+    sections are the iirnotch design (as in designIIRNotch), computed for
+    all harmonics at once. The quality factor grows with the harmonic
+    number, so every notch has the bandwidth of the fundamental (f0 / Q).
+    Designs are cached per (f0, fs, harmonics, Q).
+
+    Parameters
+    ----------
+        f0 : float
+            Mains fundamental frequency.
+        
+        fs : float
+            Sampling frequency of the filter.
+
+        harmonics : int
+            Number of harmonics notched above the fundamental. Harmonics
+            above HUM_MAX_FREQ times the Nyquist frequency are skipped.
+            Default is HUM_HARMONICS.
+
+        Q : float
+            Quality factor of the fundamental notch. Default is 30.
+    
+    Returns
+    -------
+        sos : ndarray
+            Read-only second-order sections of the notch comb.
+    """
+    assert 0 < f0 < HUM_MAX_FREQ * fs / 2, 'ERROR: Mains frequency out of range.'
+
+    k = np.arange(1, int(harmonics) + 2)
+    k = k[k * f0 < HUM_MAX_FREQ * fs / 2]
+
+    # iirnotch: bandwidth w0 / Q at -3 dB, equal for all harmonics
+    w0 = 2 * np.pi * k * f0 / fs
+    beta = np.tan(np.pi * f0 / fs / Q)
+    gain = 1 / (1 + beta)
+    cosw = np.cos(w0)
+
+    sos = np.zeros((len(k), 6))
+    sos[:, 0] = gain
+    sos[:, 1] = -2 * gain * cosw
+    sos[:, 2] = gain
+    sos[:, 3] = 1
+    sos[:, 4] = -2 * gain * cosw
+    sos[:, 5] = 2 * gain - 1
+
+    sos.flags.writeable = False
+    return sos
+
+
+# Stopband attenuation of the decimation filters (dB).
+DECIMATION_ATTENUATION = 80
+
+# Passband edge of the decimation filters relative to the output Nyquist
+# frequency. The band above it is not free of aliases.
+DECIMATION_PASSBAND = 0.8
+
+
+@functools.lru_cache(maxsize = FILTER_CACHE_SIZE)
+def designDecimator(factor, attenuation = DECIMATION_ATTENUATION):
+    """
+    Returns a linear-phase FIR anti-alias filter for decimation by an
+    integer factor. The passband reaches DECIMATION_PASSBAND times the
+    output Nyquist frequency, and everything that would alias into it
+    is attenuated by the given amount. Designs are cached per
+    (factor, attenuation).
+
+    Parameters
+    ----------
+        factor : int
+            Decimation factor (at least 2).
+
+        attenuation : float
+            Stopband attenuation in dB. Default is DECIMATION_ATTENUATION.
+
+    Returns
+    -------
+        h : ndarray
+            Read-only filter taps (unity DC gain).
+    """
+    assert factor >= 2, 'ERROR: Decimation factor must be at least 2.'
+
+    # Transition band from the passband edge to the first frequency that
+    # aliases onto it, normalized to the input Nyquist frequency
+    width = 2 * (1 - DECIMATION_PASSBAND) / factor
+    numtaps, beta = signal.kaiserord(attenuation, width)
+
+    h = signal.firwin(numtaps, 1 / factor, window = ('kaiser', beta))
+    h.flags.writeable = False
+    return h
+
+
+# Frequency weightings (IEC 61672-1). Z is no weighting.
+WEIGHTINGS = ['Z', 'A', 'C']
+
+# Pole frequencies of the A and C weightings (Hz).
+WEIGHTING_F1 = 20.598997
+WEIGHTING_F2 = 107.65265
+WEIGHTING_F3 = 737.86223
+WEIGHTING_F4 = 12194.217
+
+# Frequency at which the weightings are normalized to 0 dB.
+WEIGHTING_REF_FREQ = 1000.0
+
+
+def weightingZPK(curve):
+    """
+    Returns the analog zeros, poles and gain of a frequency weighting,
+    normalized to 0 dB at 1 kHz.
+
+    Parameters
+    ----------
+        curve : str
+            Frequency weighting (A or C).
+
+    Returns
+    -------
+        z, p, k : ndarray, ndarray, float
+            Zeros and poles (rad/s) and gain of the analog weighting.
+    """
+    w1, w2, w3, w4 = 2 * np.pi * np.array([WEIGHTING_F1, WEIGHTING_F2, WEIGHTING_F3, WEIGHTING_F4])
+
+    if curve == 'A':
+        z = np.zeros(4)
+        p = np.array([-w1, -w1, -w2, -w3, -w4, -w4])
+    elif curve == 'C':
+        z = np.zeros(2)
+        p = np.array([-w1, -w1, -w4, -w4])
+    else:
+        raise ValueError(f"Unknown frequency weighting: {curve}")
+
+    _, h = signal.freqs_zpk(z, p, 1.0, worN = [2 * np.pi * WEIGHTING_REF_FREQ])
+    return z, p, 1 / np.abs(h[0])
+
+
+@functools.lru_cache(maxsize = FILTER_CACHE_SIZE)
+def designWeighting(curve, fs):
+    """
+    Returns the digital frequency weighting filter for a sampling rate.
+    The analog weighting is mapped with the bilinear transform and
+    normalized to 0 dB at 1 kHz. Near the Nyquist frequency the digital
+    filter falls off faster than the analog curve. Designs are cached
+    per (curve, fs).
+
+    Parameters
+    ----------
+        curve : str
+            Frequency weighting (Z, A or C).
+
+        fs : float
+            Sampling frequency of the filter.
+
+    Returns
+    -------
+        sos : ndarray
+            Read-only second-order sections of the weighting filter, or
+            None for Z weighting.
+    """
+    if curve == 'Z':
+        return None
+
+    z, p, k = weightingZPK(curve)
+    zd, pd, kd = signal.bilinear_zpk(z, p, k, fs)
+    sos = signal.zpk2sos(zd, pd, kd)
+
+    # Normalize the digital filter at the reference frequency
+    _, h = signal.sosfreqz(sos, worN = [WEIGHTING_REF_FREQ], fs = fs)
+    sos[0, :3] /= np.abs(h[0])
+
+    sos.flags.writeable = False
+    return sos
+
+
+@functools.lru_cache(maxsize = FILTER_CACHE_SIZE)
+def weightingGain(curve, fs, nfft):
+    """
+    Returns the magnitude of a frequency weighting at the bins of a
+    real FFT, to be applied to magnitude spectra. The analog curve is
+    used, so the gain has no bilinear error near Nyquist. Gains are
+    cached per (curve, fs, nfft).
+
+    Parameters
+    ----------
+        curve : str
+            Frequency weighting (Z, A or C).
+
+        fs : float
+            Sampling frequency.
+
+        nfft : int
+            FFT size (nfft // 2 + 1 bins).
+
+    Returns
+    -------
+        gain : ndarray
+            Read-only gain of each bin, or None for Z weighting.
+    """
+    if curve == 'Z':
+        return None
+
+    z, p, k = weightingZPK(curve)
+    f = np.fft.rfftfreq(int(nfft), d = 1 / fs)
+    _, h = signal.freqs_zpk(z, p, k, worN = 2 * np.pi * f)
+
+    gain = np.abs(h)
+    gain.flags.writeable = False
+    return gain
+
+
+class StreamingFilter:
+    def __init__(self, sos = None):
+        """
+        Constructs a streaming IIR filter in second-order sections. The
+        filter state (zi) is carried from one chunk to the next, so the
+        output is continuous across chunk boundaries. The state is only
+        reset when the design changes.
+
+        Parameters
+        ----------
+            sos : ndarray
+                Second-order sections of the filter. None disables the
+                filter (samples are passed through).
+
+        Returns
+        -------
+            None
+        """
+        self.design = None
+        self.sos = None
+        self.zi = None
+        self.setDesign(sos)
+
+
+    def setDesign(self, sos, keepState = False):
+        """
+        Sets the filter design. Setting the same design again keeps the
+        filter state.
+
+        Parameters
+        ----------
+            sos : ndarray
+                Second-order sections of the filter, or None.
+
+            keepState : bool
+                Keeps the filter state if the new design has the same
+                number of sections, e.g. when a design is retuned slightly.
+                Default is False.
+
+        Returns
+        -------
+            None
+        """
+        if sos is self.design:
+            return
+
+        if sos is not None and self.design is not None and np.array_equal(sos, self.design):
+            return
+
+        keepState = keepState and sos is not None and self.sos is not None and len(sos) == len(self.sos)
+
+        # sosfilt needs writable coefficients, while cached designs are
+        # read-only; keep a private copy.
+        self.design = sos
+        self.sos = None if sos is None else np.array(sos, dtype = np.float64)
+
+        if not keepState:
+            self.reset()
+
+
+    def reset(self):
+        """
+        Clears the filter state. The state is initialized again from the
+        first sample of the next chunk.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.zi = None
+
+
+    def isEnabled(self):
+        """
+        Returns True if a filter design is set.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            enabled : bool
+                Filter status.
+        """
+        return self.sos is not None
+
+
+    def process(self, x):
+        """
+        Filters one chunk of samples, continuing from the state left by the
+        previous chunk. Multichannel chunks are filtered along the last
+        axis in one call, with one state per channel.
+
+        Parameters
+        ----------
+            x : ndarray
+                Input samples, or (channels, samples) for several channels.
+
+        Returns
+        -------
+            y : ndarray
+                Filtered samples (x itself if no design is set).
+        """
+        if self.sos is None:
+            return x
+
+        if self.zi is None or self.zi.shape[1:-1] != x.shape[:-1]:
+            # Steady-state initial conditions for a step of the first
+            # sample, which avoids a start-up transient.
+            zi = signal.sosfilt_zi(self.sos)
+            channels = x.shape[:-1]
+            self.zi = np.reshape(zi, zi.shape[:1] + (1,) * len(channels) + (2,)) * \
+                      np.reshape(x[..., 0], (1,) + channels + (1,))
+
+        y, self.zi = signal.sosfilt(self.sos, x, axis = -1, zi = self.zi)
+        return y
+
+
+# Name of the filter chain stage set from the filter panel.
+PANEL_STAGE = 'Filter Panel'
+
+# Name of the filter chain stage of the mains hum comb.
+HUM_STAGE = 'Hum Removal'
+
+# Stage of a filter chain: its second-order sections and bypass status.
+FilterStage = namedtuple('FilterStage', ['name', 'sos', 'bypass'])
+
+# Filter chain stages offered in the Analysis menu, by name: approximation,
+# type, cutoffs and order for designFilter().
+CHAIN_PRESETS = {'Highpass 20 Hz'        : ('Butterworth', 'Highpass', (20,), 3),
+                 'Highpass 80 Hz'        : ('Butterworth', 'Highpass', (80,), 3),
+                 'Notch 50 Hz'           : ('IIR Notch', 'Notch', (50,), 2),
+                 'Notch 60 Hz'           : ('IIR Notch', 'Notch', (60,), 2),
+                 'Bandpass 300-3400 Hz'  : ('Butterworth', 'Bandpass', (300, 3400), 3)}
+
+
+class FilterChain:
+    def __init__(self):
+        """
+        Constructs an ordered chain of IIR stages. Stages can be added,
+        replaced, reordered and bypassed by name. The active stages are
+        stacked into one cascade of second-order sections, which is run by
+        a single StreamingFilter, so a chain of any length costs one
+        sosfilt call per chunk and carries one state array.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.stages = []
+        self.filter = StreamingFilter()
+
+
+    def index(self, name):
+        """
+        Returns the position of a stage in the chain.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+        Returns
+        -------
+            index : int
+                Position of the stage, or -1 if it is not in the chain.
+        """
+        for k, stage in enumerate(self.stages):
+            if stage.name == name:
+                return k
+
+        return -1
+
+
+    def names(self):
+        """
+        Returns the stage names in processing order.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            names : list
+                Stage names.
+        """
+        return [stage.name for stage in self.stages]
+
+
+    def setStage(self, name, sos, keepState = False):
+        """
+        Adds a stage at the end of the chain, or replaces the design of a
+        stage that is already in it (keeping its position and bypass
+        status). None removes the stage.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+            sos : ndarray
+                Second-order sections of the stage, or None.
+
+            keepState : bool
+                Keeps the filter state when a stage is replaced by a design
+                with the same number of sections. Default is False.
+
+        Returns
+        -------
+            None
+        """
+        k = self.index(name)
+
+        if sos is None:
+            if k >= 0:
+                self.removeStage(name)
+            return
+
+        if k < 0:
+            self.stages.append(FilterStage(name, sos, False))
+        elif self.stages[k].sos is sos:
+            return
+        else:
+            self.stages[k] = self.stages[k]._replace(sos = sos)
+
+        self.compile(keepState = keepState)
+
+
+    def removeStage(self, name):
+        """
+        Removes a stage from the chain.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+        Returns
+        -------
+            None
+        """
+        k = self.index(name)
+
+        if k < 0:
+            raise ValueError(f"Unknown filter stage: {name}")
+
+        del self.stages[k]
+        self.compile()
+
+
+    def moveStage(self, name, offset):
+        """
+        Moves a stage up (negative offset) or down (positive offset) the
+        chain. The position is limited to the ends of the chain.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+            offset : int
+                Number of positions to move.
+
+        Returns
+        -------
+            None
+        """
+        k = self.index(name)
+
+        if k < 0:
+            raise ValueError(f"Unknown filter stage: {name}")
+
+        stage = self.stages.pop(k)
+        self.stages.insert(min(max(k + offset, 0), len(self.stages)), stage)
+        self.compile()
+
+
+    def setBypass(self, name, bypass):
+        """
+        Bypasses a stage or puts it back into the cascade.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+            bypass : bool
+                True bypasses the stage.
+
+        Returns
+        -------
+            None
+        """
+        k = self.index(name)
+
+        if k < 0:
+            raise ValueError(f"Unknown filter stage: {name}")
+
+        self.stages[k] = self.stages[k]._replace(bypass = bool(bypass))
+        self.compile()
+
+
+    def isBypassed(self, name):
+        """
+        Returns True if a stage is bypassed.
+
+        Parameters
+        ----------
+            name : str
+                Stage name.
+
+        Returns
+        -------
+            bypass : bool
+                Bypass status.
+        """
+        return self.stages[self.index(name)].bypass
+
+
+    def compile(self, keepState = False):
+        """
+        Stacks the sections of the active stages in chain order and hands
+        the cascade to the streaming filter. The filter state is restarted
+        unless keepState is set, since the sections after a changed stage
+        see a different input.
+
+        Parameters
+        ----------
+            keepState : bool
+                Keeps the filter state if the number of sections is
+                unchanged. Default is False.
+
+        Returns
+        -------
+            sos : ndarray
+                Read-only cascade of the active stages, or None if no stage
+                is active.
+        """
+        active = [stage.sos for stage in self.stages if not stage.bypass]
+        sos = None
+
+        if active:
+            sos = np.vstack(active)
+            sos.flags.writeable = False
+
+        self.filter.setDesign(sos, keepState = keepState)
+        return sos
+
+
+    def reset(self):
+        """
+        Clears the filter state.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.filter.reset()
+
+
+    def isEnabled(self):
+        """
+        Returns True if at least one stage is active.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            enabled : bool
+                Filter chain status.
+        """
+        return self.filter.isEnabled()
+
+
+    def process(self, x):
+        """
+        Filters one chunk of samples through all active stages.
+
+        Parameters
+        ----------
+            x : ndarray
+                Input samples, or (channels, samples) for several channels.
+
+        Returns
+        -------
+            y : ndarray
+                Filtered samples (x itself if no stage is active).
+        """
+        return self.filter.process(x)
+
+
+class OverlapSaveFilter:
+    def __init__(self, taps = None, blockSize = 1024, workers = 1):
+        """
+        Constructs a streaming FIR filter that convolves with overlap-save.
+        The FFT of the taps is computed once per design, and the last
+        numtaps - 1 input samples are carried from one chunk to the next,
+        so a chunk costs one real FFT pair of about blockSize + numtaps
+        points regardless of the number of taps.
+
+        Parameters
+        ----------
+            taps : ndarray
+                FIR filter taps. None disables the filter (samples are
+                passed through).
+
+            blockSize : int
+                Largest chunk passed to process(). Default is 1024.
+
+            workers : int
+                Number of FFT worker threads. Default is 1.
+
+        Returns
+        -------
+            None
+        """
+        assert blockSize > 0, 'ERROR: Non-positive block size.'
+
+        self.blockSize = int(blockSize)
+        self.workers = int(workers)
+        self.design = None
+        self.H = None
+        self.setDesign(taps)
+
+
+    def setDesign(self, taps):
+        """
+        Sets the filter taps. Setting the same taps again keeps the
+        filter history.
+
+        Parameters
+        ----------
+            taps : ndarray
+                FIR filter taps, or None.
+
+        Returns
+        -------
+            None
+        """
+        if taps is self.design:
+            return
+
+        if taps is not None and self.design is not None and np.array_equal(taps, self.design):
+            return
+
+        self.design = taps
+
+        if taps is None:
+            self.H = None
+            return
+
+        # History of numtaps - 1 samples followed by the chunk. The line
+        # is allocated for the channel count of the first chunk.
+        self.overlap = len(taps) - 1
+        self.nfft = scipy.fft.next_fast_len(self.overlap + self.blockSize, real = True)
+        self.H = scipy.fft.rfft(taps, n = self.nfft, workers = self.workers)
+        self.line = None
+        self.reset()
+
+
+    def reset(self):
+        """
+        Clears the filter history. The history is initialized again from
+        the first sample of the next chunk.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.primed = False
+
+
+    def isEnabled(self):
+        """
+        Returns True if filter taps are set.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            enabled : bool
+                Filter status.
+        """
+        return self.H is not None
+
+
+    def process(self, x):
+        """
+        Filters one chunk of samples, continuing from the history left by
+        the previous chunk. The output is delayed by the group delay of
+        the taps ((numtaps - 1) / 2 samples for linear phase).
+        Multichannel chunks are transformed along the last axis in one
+        call.
+
+        Parameters
+        ----------
+            x : ndarray
+                Input samples (at most blockSize), or (channels, samples)
+                for several channels.
+
+        Returns
+        -------
+            y : ndarray
+                Filtered samples (x itself if no taps are set).
+        """
+        if self.H is None:
+            return x
+
+        n = x.shape[-1]
+        assert n <= self.blockSize, 'ERROR: Chunk is longer than the block size.'
+
+        m = self.overlap
+
+        if self.line is None or self.line.shape[:-1] != x.shape[:-1]:
+            self.line = np.zeros(x.shape[:-1] + (m + self.blockSize,))
+            self.primed = False
+
+        if not self.primed:
+            # A constant history of the first sample avoids a start-up
+            # transient, like the steady-state zi of StreamingFilter.
+            self.line[..., :m] = x[..., :1]
+            self.primed = True
+
+        self.line[..., m:m + n] = x
+
+        spectrum = scipy.fft.rfft(self.line[..., :m + n], n = self.nfft, axis = -1, workers = self.workers)
+        spectrum *= self.H
+        y = scipy.fft.irfft(spectrum, n = self.nfft, axis = -1, workers = self.workers)[..., m:m + n]
+
+        # Keep the last numtaps - 1 samples for the next chunk
+        self.line[..., :m] = self.line[..., n:m + n]
+        return y
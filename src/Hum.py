@@ -0,0 +1,168 @@
+'''
+Mains hum tracking. A sliding frame of the stream is demodulated at the
+first harmonics of the estimated mains frequency with a phase-continuous
+reference, and the phase advance between blocks gives the drift of the
+fundamental. The estimate is used to retune the notch comb of
+designHumComb().
+'''
+
+from Windowing import getWindow
+
+import numpy as np
+
+# Number of harmonics used for tracking (strongest hum components).
+HUM_TRACK_HARMONICS = 3
+
+# Length of the analysis frame (s). It has to resolve the harmonics, which
+# are only one bin apart in a frame of 1024 samples at 44.1 kHz.
+HUM_FRAME_TIME = 0.2
+
+# Largest drift from the nominal mains frequency that is followed (Hz).
+HUM_MAX_DRIFT = 1.0
+
+# Smoothing of the frequency estimate per block.
+HUM_SMOOTHING = 0.9
+
+# Hum level below which the estimate is not updated (int16 scale).
+HUM_MIN_LEVEL = 1.0
+
+# Drift of the estimate (Hz) after which the notch comb is retuned.
+HUM_RETUNE = 0.02
+
+
+class HumTracker:
+    def __init__(self, fs, blockSize, mains = 50.0):
+        """
+        Constructs a mains frequency tracker for blocks of a fixed size.
+
+        After every block, the last HUM_FRAME_TIME seconds are Hann-windowed
+        and projected onto the first HUM_TRACK_HARMONICS harmonics of the
+        estimate with one complex matrix product. The reference oscillator
+        runs on continuously and is referred to the frame center, so the
+        phase of harmonic k advances by 2*pi*k*(f - estimate)*T per block of
+        T seconds; the advances are combined with weights k * |z| and
+        smoothed.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Number of samples per block.
+
+            mains : float
+                Nominal mains frequency. Default is 50 Hz.
+
+        Returns
+        -------
+            None
+        """
+        assert blockSize > 0, 'ERROR: Non-positive block size.'
+        assert mains * HUM_TRACK_HARMONICS < fs / 2, 'ERROR: Mains frequency out of range.'
+
+        self.fs = fs
+        self.blockSize = int(blockSize)
+        self.blockTime = self.blockSize / fs
+        self.mains = mains
+
+        # Frame of previous samples followed by the current block
+        self.frameSize = max(int(HUM_FRAME_TIME * fs), self.blockSize)
+        self.line = np.zeros(self.frameSize)
+
+        # Sample times relative to the frame center
+        self.harmonics = np.arange(1, HUM_TRACK_HARMONICS + 1)
+        self.window = getWindow('Hann', self.frameSize, sym = False).w
+        self.n = np.arange(self.frameSize) - (self.frameSize - 1) / 2
+
+        self.reset()
+
+
+    def reset(self):
+        """
+        Restarts tracking from the nominal mains frequency.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.frequency = float(self.mains)
+        self.phase = np.zeros(HUM_TRACK_HARMONICS)
+        self.last = None
+        self.count = 0
+        self.line.fill(0)
+        self.setReference()
+
+
+    def setReference(self):
+        """
+        Builds the demodulation kernel for the current estimate. The
+        kernel is only rebuilt when the estimate changes.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        omega = 2 * np.pi * self.harmonics * self.frequency / self.fs
+        self.kernel = self.window * np.exp(-1j * np.outer(omega, self.n))
+        self.kernelFrequency = self.frequency
+
+
+    def process(self, x):
+        """
+        Updates the estimate with one block.
+
+        Parameters
+        ----------
+            x : ndarray
+                Block of blockSize samples.
+
+        Returns
+        -------
+            frequency : float
+                Estimated mains fundamental frequency.
+        """
+        assert len(x) == self.blockSize, 'ERROR: Unexpected block length.'
+
+        if self.kernelFrequency != self.frequency:
+            self.setReference()
+
+        n = self.blockSize
+        self.line[:-n] = self.line[n:]
+        self.line[-n:] = x
+
+        z = (self.kernel @ self.line) * np.exp(-1j * self.phase)
+
+        # Continue the reference oscillator of every harmonic
+        self.phase += 2 * np.pi * self.harmonics * self.frequency * self.blockTime
+        np.mod(self.phase, 2 * np.pi, out = self.phase)
+
+        last, self.last = self.last, z
+
+        # Wait until the frame is filled with samples
+        self.count += n
+
+        if self.count <= self.frameSize:
+            return self.frequency
+
+        # Phase advance of each harmonic, weighted by its level and number
+        advance = np.angle(z * np.conj(last))
+        weights = np.sqrt(np.abs(z) * np.abs(last)) * self.harmonics
+        level = np.max(np.abs(z)) / np.sum(self.window)
+
+        if level < HUM_MIN_LEVEL:
+            return self.frequency
+
+        offset = np.sum(weights * advance / (2 * np.pi * self.harmonics * self.blockTime)) / np.sum(weights)
+        estimate = self.frequency + (1 - HUM_SMOOTHING) * offset
+
+        self.frequency = min(max(estimate, self.mains - HUM_MAX_DRIFT), self.mains + HUM_MAX_DRIFT)
+        return self.frequency
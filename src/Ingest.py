@@ -0,0 +1,99 @@
+'''
+Ingest stage for the raw PCM stream. The PyAudio buffer is viewed as an
+int16 array (no unpacking) and scaled into a preallocated float buffer
+that is shared by the waveform, filtering and analysis stages.
+Interleaved multichannel frames are deinterleaved by transposing the
+(frames, channels) view, so the scaling is the only copy.
+'''
+
+import numpy as np
+
+
+class FrameIngest:
+    def __init__(self, size, gain = 1.0, channels = 1):
+        """
+        Constructs the ingest stage with preallocated buffers.
+
+        Parameters
+        ----------
+            size : int
+                Number of frames per block.
+
+            gain : float
+                Amplitude factor applied to the incoming samples. Default
+                value is 1.
+
+            channels : int
+                Number of interleaved input channels. Default is 1.
+
+        Returns
+        -------
+            None
+        """
+        assert size > 0, 'ERROR: Non-positive block size.'
+        assert channels > 0, 'ERROR: Non-positive number of channels.'
+
+        self.size = int(size)
+        self.gain = gain
+        self.channels = int(channels)
+
+        # Raw int16 frames (interleaved, one row per frame), filled
+        # directly by the capture ring buffer.
+        self.raw = np.zeros((self.size, self.channels), dtype = np.int16)
+
+        # Gain-applied samples, one row per channel.
+        self.samples = np.zeros((self.channels, self.size), dtype = np.float64)
+
+
+    def fromBytes(self, pcm):
+        """
+        Views a PCM byte buffer as int16 samples without copying and
+        ingests it.
+
+        Parameters
+        ----------
+            pcm : bytes
+                Raw 16-bit PCM data as returned by PyAudio.
+
+        Returns
+        -------
+            samples : ndarray
+                (channels, frames) gain-applied samples.
+        """
+        return self.fromArray(np.frombuffer(pcm, dtype = np.int16).reshape(-1, self.channels))
+
+
+    def fromArray(self, data):
+        """
+        Applies the gain to the int16 samples, writing into the
+        preallocated float buffer. The transposed view deinterleaves the
+        channels without a copy of its own.
+
+        Parameters
+        ----------
+            data : ndarray
+                (frames, channels) int16 samples of one block.
+
+        Returns
+        -------
+            samples : ndarray
+                (channels, frames) gain-applied samples.
+        """
+        np.multiply(data.T, self.gain, out = self.samples)
+        return self.samples
+
+
+    def fromRaw(self):
+        """
+        Ingests the block held in the raw buffer.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            samples : ndarray
+                (channels, frames) gain-applied samples.
+        """
+        return self.fromArray(self.raw)
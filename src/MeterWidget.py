@@ -0,0 +1,130 @@
+'''
+Level meter widget. A horizontal bar shows the time-weighted level and the
+labels next to it show the readings of the LevelMeter in dBFS.
+'''
+
+from PyQt5 import QtWidgets
+from PyQt5 import QtGui
+
+# Range of the level bar (dBFS).
+METER_MIN_DB = -60
+METER_MAX_DB = 0
+
+
+class MeterWidget(QtWidgets.QWidget):
+    def __init__(self, *args, **kwargs):
+        """
+        Constructs the meter bar and the reading labels.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        super(MeterWidget, self).__init__(*args, **kwargs)
+
+        font = QtGui.QFont('Arial')
+        font.setPointSize(9)
+        font.setBold(True)
+
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(10, 2, 10, 2)
+
+        self.lbl_Meter = QtWidgets.QLabel('LEVEL')
+        self.lbl_Meter.setFont(font)
+        layout.addWidget(self.lbl_Meter)
+
+        # Bar in tenths of a dB so the integer range keeps 0.1 dB steps
+        self.bar_Level = QtWidgets.QProgressBar()
+        self.bar_Level.setRange(10 * METER_MIN_DB, 10 * METER_MAX_DB)
+        self.bar_Level.setValue(10 * METER_MIN_DB)
+        self.bar_Level.setTextVisible(False)
+        self.bar_Level.setFixedHeight(14)
+        layout.addWidget(self.bar_Level, stretch = 1)
+
+        self.lbl_Readings = QtWidgets.QLabel()
+        self.lbl_Readings.setFont(font)
+        layout.addWidget(self.lbl_Readings)
+
+        # Gain reduction of the dynamics stages
+        self.lbl_GainReduction = QtWidgets.QLabel()
+        self.lbl_GainReduction.setFont(font)
+        layout.addWidget(self.lbl_GainReduction)
+
+        self.weighting = 'Fast'
+        self.unit = 'dBFS'
+        self.setFixedHeight(26)
+
+
+    def setWeighting(self, weighting):
+        """
+        Selects the time weighting shown on the bar.
+
+        Parameters
+        ----------
+            weighting : str
+                Time weighting (Fast, Slow or Impulse).
+
+        Returns
+        -------
+            None
+        """
+        self.weighting = weighting
+
+
+    def setCurve(self, curve):
+        """
+        Shows the frequency weighting of the readings in the level unit.
+
+        Parameters
+        ----------
+            curve : str
+                Frequency weighting (Z, A or C).
+
+        Returns
+        -------
+            None
+        """
+        self.unit = 'dBFS' if curve == 'Z' else f'dBFS ({curve})'
+
+
+    def setGainReduction(self, gainReduction):
+        """
+        Shows the gain reduction of the dynamics stages.
+
+        Parameters
+        ----------
+            gainReduction : float
+                Gain reduction in dB.
+
+        Returns
+        -------
+            None
+        """
+        self.lbl_GainReduction.setText(f"GR {gainReduction:4.1f} dB")
+
+
+    def setReading(self, reading):
+        """
+        Shows a meter reading.
+
+        Parameters
+        ----------
+            reading : MeterReading
+                Levels returned by LevelMeter.process().
+
+        Returns
+        -------
+            None
+        """
+        level = getattr(reading, self.weighting.lower())
+        self.bar_Level.setValue(int(round(10 * min(max(level, METER_MIN_DB), METER_MAX_DB))))
+
+        self.lbl_Readings.setText(f"{self.weighting[0]} {level:6.1f}   "
+                                  f"RMS {reading.rms:6.1f}   "
+                                  f"TP {reading.truePeak:6.1f}   "
+                                  f"CF {reading.crest:5.1f}   "
+                                  f"Leq {reading.leq:6.1f} {self.unit}")
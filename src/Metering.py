@@ -0,0 +1,171 @@
+'''
+Level metering on the raw sample stream: RMS, sample and true peak, crest
+factor, IEC 61672 fast/slow/impulse time-weighted levels and the
+equivalent continuous level (Leq) of the whole session. All levels are
+in dBFS, where 0 dBFS is the full-scale amplitude of the 16-bit input.
+'''
+
+from scipy import signal
+from collections import namedtuple
+from numpy.lib.stride_tricks import as_strided
+
+import numpy as np
+
+# Full-scale amplitude of the 16-bit input (0 dBFS).
+FULL_SCALE = 2**15
+
+# Lowest reported level (dBFS). Silence is reported at this level.
+LEVEL_FLOOR = -150.0
+
+# IEC 61672 time constants (s): fast, slow, impulse rise and impulse decay.
+TAU_FAST = 0.125
+TAU_SLOW = 1.0
+TAU_IMPULSE = 0.035
+TAU_IMPULSE_DECAY = 1.5
+
+# True-peak oversampling factor and number of taps of each polyphase branch.
+TRUE_PEAK_FACTOR = 4
+TRUE_PEAK_TAPS = 12
+
+# Meter readings of one block, in dBFS (crest factor in dB).
+MeterReading = namedtuple('MeterReading', ['rms', 'peak', 'truePeak', 'crest',
+                                           'fast', 'slow', 'impulse', 'leq'])
+
+
+def toDecibels(power):
+    """
+    Converts a power ratio relative to full scale to dBFS, limited to
+    LEVEL_FLOOR.
+
+    Parameters
+    ----------
+        power : float
+            Mean-square value divided by the squared full scale.
+
+    Returns
+    -------
+        level : float
+            Level in dBFS.
+    """
+    return max(LEVEL_FLOOR, 10 * np.log10(max(power, 1e-300)))
+
+
+class LevelMeter:
+    def __init__(self, fs, blockSize):
+        """
+        Constructs a level meter for blocks of a fixed size. The fast and
+        slow exponential averages run per sample with a one-pole filter
+        whose state is carried between blocks. The impulse weighting is
+        evaluated per block from the block mean square.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Number of samples per block.
+
+        Returns
+        -------
+            None
+        """
+        assert blockSize > 0, 'ERROR: Non-positive block size.'
+
+        self.fs = fs
+        self.blockSize = int(blockSize)
+
+        # One-pole smoothing coefficients of the fast and slow weightings
+        self.poles = np.exp(-1 / (fs * np.array([TAU_FAST, TAU_SLOW])))
+
+        # Impulse weighting per block: fast rise, slow decay
+        blockTime = self.blockSize / fs
+        self.impulseRise = np.exp(-blockTime / TAU_IMPULSE)
+        self.impulseDecay = np.exp(-blockTime / TAU_IMPULSE_DECAY)
+
+        # Polyphase interpolation filter of the true-peak meter: one row
+        # per output phase, taps reversed for the sliding windows
+        h = signal.firwin(TRUE_PEAK_FACTOR * TRUE_PEAK_TAPS, 1 / TRUE_PEAK_FACTOR) * TRUE_PEAK_FACTOR
+        self.phases = np.ascontiguousarray(h.reshape(TRUE_PEAK_TAPS, TRUE_PEAK_FACTOR).T[:, ::-1])
+
+        # Previous samples followed by the current block
+        self.history = np.zeros(TRUE_PEAK_TAPS - 1 + self.blockSize)
+        self.square = np.zeros(self.blockSize)
+
+        self.reset()
+
+
+    def reset(self):
+        """
+        Clears the time-weighted levels and restarts the Leq measurement.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.zi = np.zeros(2)
+        self.impulsePower = 0.0
+        self.energy = 0.0
+        self.count = 0
+        self.history.fill(0)
+
+
+    def process(self, x):
+        """
+        Measures one block.
+
+        Parameters
+        ----------
+            x : ndarray
+                Block of blockSize samples on the int16 scale.
+
+        Returns
+        -------
+            reading : MeterReading
+                Levels after this block.
+        """
+        assert len(x) == self.blockSize, 'ERROR: Unexpected block length.'
+
+        np.multiply(x, 1 / FULL_SCALE, out = self.square)
+        peak = np.max(np.abs(self.square))
+        np.square(self.square, out = self.square)
+
+        meanSquare = np.mean(self.square)
+
+        # Fast and slow exponential averages of the squared signal. The
+        # filter state is the pole times the last output.
+        for k in range(2):
+            _, zf = signal.lfilter([1 - self.poles[k]], [1, -self.poles[k]], self.square, zi = self.zi[k:k + 1])
+            self.zi[k] = zf[0]
+
+        # Impulse: rise with 35 ms, decay with 1.5 s
+        coeff = self.impulseRise if meanSquare > self.impulsePower else self.impulseDecay
+        self.impulsePower = coeff * self.impulsePower + (1 - coeff) * meanSquare
+
+        # Session energy for Leq
+        self.energy += meanSquare * self.blockSize
+        self.count += self.blockSize
+
+        # True peak: 4x oversampled block, one product over all windows
+        n = TRUE_PEAK_TAPS - 1
+        self.history[:n] = self.history[-n:]
+        self.history[n:] = x
+        stride = self.history.strides[0]
+        windows = as_strided(self.history, shape = (self.blockSize, TRUE_PEAK_TAPS), strides = (stride, stride))
+        truePeak = max(peak, np.max(np.abs(windows @ self.phases.T)) / FULL_SCALE)
+
+        rms = toDecibels(meanSquare)
+        peakLevel = toDecibels(peak * peak)
+
+        return MeterReading(rms      = rms,
+                            peak     = peakLevel,
+                            truePeak = toDecibels(truePeak * truePeak),
+                            crest    = peakLevel - rms if meanSquare > 0 else 0.0,
+                            fast     = toDecibels(self.zi[0] / self.poles[0]),
+                            slow     = toDecibels(self.zi[1] / self.poles[1]),
+                            impulse  = toDecibels(self.impulsePower),
+                            leq      = toDecibels(self.energy / self.count))
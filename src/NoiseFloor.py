@@ -0,0 +1,244 @@
+'''
+Adaptive noise-floor estimation for power spectra. Every bin keeps an
+incremental running median (in dB) or a minimum-statistics estimate, so
+the memory does not grow with time and an update is O(bins) per frame.
+'''
+
+import numpy as np
+
+# Noise floor estimators by the names used in the Analysis menu.
+FLOOR_MODES = ['Median', 'Minimum']
+
+# Step rate of the running median (dB/s).
+MEDIAN_RATE = 10.0
+
+# Minimum statistics: power smoothing, sub-window length (frames), number
+# of sub-windows and bias compensation of the minimum.
+MS_SMOOTHING = 0.85
+MS_SUBWINDOW = 12
+MS_SUBWINDOWS = 8
+MS_BIAS = 1.5
+
+
+class NoiseFloor:
+    def __init__(self, nbins, frameRate, mode = 'Median', rate = MEDIAN_RATE):
+        """
+        Constructs a per-bin noise floor tracker.
+
+        The running median moves the estimate of each bin up or down by a
+        fixed step in dB depending on whether the new frame is above or
+        below it (stochastic approximation), so it needs no history. The
+        minimum statistics estimate is the bias-compensated minimum of the
+        smoothed power over MS_SUBWINDOWS sub-windows of MS_SUBWINDOW
+        frames.
+
+        Parameters
+        ----------
+            nbins : int
+                Number of bins of the spectra.
+
+            frameRate : float
+                Number of spectra per second.
+
+            mode : str
+                Estimator (Median or Minimum). Default is Median.
+
+            rate : float
+                Step rate of the running median in dB/s. Default is
+                MEDIAN_RATE.
+
+        Returns
+        -------
+            None
+        """
+        assert nbins > 0, 'ERROR: Non-positive number of bins.'
+        assert frameRate > 0, 'ERROR: Non-positive frame rate.'
+
+        self.nbins = int(nbins)
+        self.frameRate = frameRate
+        self.step = rate / frameRate
+
+        # Noise floor (power) and its level in dB
+        self.floor = np.zeros(self.nbins)
+        self.level = np.zeros(self.nbins)
+
+        # Running median state and scratch array
+        self.scratch = np.zeros(self.nbins)
+
+        # Minimum statistics state: smoothed power, minimum of the current
+        # sub-window and minima of the previous sub-windows
+        self.smoothed = np.zeros(self.nbins)
+        self.subMin = np.zeros(self.nbins)
+        self.minima = np.zeros((MS_SUBWINDOWS, self.nbins))
+
+        self.setMode(mode)
+
+
+    def setMode(self, mode):
+        """
+        Changes the estimator and restarts the estimate.
+
+        Parameters
+        ----------
+            mode : str
+                Estimator (Median or Minimum).
+
+        Returns
+        -------
+            None
+        """
+        if mode not in FLOOR_MODES:
+            raise ValueError(f"Unknown noise floor mode: {mode}")
+
+        self.mode = mode
+        self.reset()
+
+
+    def reset(self):
+        """
+        Restarts the estimate from the next frame.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.frameCount = 0
+        self.floor.fill(0)
+        self.level.fill(-np.inf)
+
+
+    def update(self, power):
+        """
+        Updates the noise floor with new power spectra.
+
+        Parameters
+        ----------
+            power : ndarray
+                Power spectrum, or (frames, bins) power spectra in time
+                order.
+
+        Returns
+        -------
+            floor : ndarray
+                Noise floor power of each bin.
+        """
+        for p in np.atleast_2d(power):
+            if self.mode == 'Median':
+                self.updateMedian(p)
+            else:
+                self.updateMinimum(p)
+
+            self.frameCount += 1
+
+        if self.mode == 'Median':
+            np.power(10, self.level / 10, out = self.floor)
+        else:
+            np.min(self.minima, axis = 0, out = self.floor)
+            np.minimum(self.floor, self.subMin, out = self.floor)
+            self.floor *= MS_BIAS
+            self.toDecibels(self.floor, self.level)
+
+        return self.floor
+
+
+    def updateMedian(self, p):
+        """
+        Moves the running median of each bin one step towards the frame.
+
+        Parameters
+        ----------
+            p : ndarray
+                Power spectrum of one frame.
+
+        Returns
+        -------
+            None
+        """
+        self.toDecibels(p, self.scratch)
+
+        if self.frameCount == 0:
+            self.level[:] = self.scratch
+            return
+
+        np.subtract(self.scratch, self.level, out = self.scratch)
+        np.sign(self.scratch, out = self.scratch)
+        self.scratch *= self.step
+        self.level += self.scratch
+
+
+    def updateMinimum(self, p):
+        """
+        Updates the minimum statistics of each bin with one frame.
+
+        Parameters
+        ----------
+            p : ndarray
+                Power spectrum of one frame.
+
+        Returns
+        -------
+            None
+        """
+        if self.frameCount == 0:
+            self.smoothed[:] = p
+            self.subMin[:] = p
+            self.minima[:] = p
+            return
+
+        self.smoothed *= MS_SMOOTHING
+        self.smoothed += (1 - MS_SMOOTHING) * p
+        np.minimum(self.subMin, self.smoothed, out = self.subMin)
+
+        if (self.frameCount + 1) % MS_SUBWINDOW == 0:
+            self.minima[((self.frameCount + 1) // MS_SUBWINDOW) % MS_SUBWINDOWS] = self.subMin
+            self.subMin[:] = self.smoothed
+
+
+    def toDecibels(self, power, out):
+        """
+        Converts power to dB, limited to -300 dB.
+
+        Parameters
+        ----------
+            power : ndarray
+                Power values.
+
+            out : ndarray
+                Array receiving the levels.
+
+        Returns
+        -------
+            None
+        """
+        np.maximum(power, 1e-30, out = out)
+        np.log10(out, out = out)
+        out *= 10
+
+
+    def snr(self, power, out = None):
+        """
+        Returns the signal-to-noise ratio of each bin against the floor.
+
+        Parameters
+        ----------
+            power : ndarray
+                Power spectrum.
+
+            out : ndarray
+                Optional preallocated array for the result.
+
+        Returns
+        -------
+            snr : ndarray
+                SNR of each bin in dB.
+        """
+        if out is None:
+            out = np.empty(self.nbins)
+
+        self.toDecibels(power, out)
+        out -= self.level
+        return out
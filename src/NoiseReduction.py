@@ -0,0 +1,338 @@
+'''
+Streaming noise reduction in the STFT domain. The stream is analysed with
+a square-root Hann window at 50% overlap, a gain is applied to every bin
+from a learned noise profile, and the frames are put back together with
+overlap-add. The output is delayed by one frame.
+'''
+
+from Spectrum import AnalysisBuffer
+from Spectrum import FFTEngine
+from Windowing import getWindow
+from NoiseFloor import NoiseFloor
+
+import numpy as np
+import scipy.fft
+
+# Gain rules by the names used in the Analysis menu.
+NR_METHODS = ['Spectral Subtraction', 'Wiener']
+
+# Noise profile sources by the names used in the Analysis menu. Snapshot
+# only removes the noise learned with learnProfile(), so stationary tones
+# (motor lines, hum) reach the peak and tone trackers. Continuous tracks
+# the noise without learning, but minimum statistics also takes tones
+# lasting longer than about a second for noise and removes them.
+NR_PROFILES = ['Snapshot', 'Continuous']
+
+# Frame size of the noise reducer (hop size is half of it).
+NR_FRAME_SIZE = 1024
+
+# Over-subtraction factor, lowest gain and decision-directed smoothing.
+NR_OVERSUBTRACTION = 2.0
+NR_GAIN_FLOOR = 0.05
+NR_DD_SMOOTHING = 0.98
+
+
+class NoiseReducer:
+    def __init__(self, fs, blockSize, frameSize = NR_FRAME_SIZE,
+                 method = 'Wiener', profile = 'Snapshot'):
+        """
+        Constructs a streaming noise reducer. All buffers and the noise
+        profile are allocated once.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Largest block passed to process().
+
+            frameSize : int
+                STFT frame size. Default is NR_FRAME_SIZE.
+
+            method : str
+                Gain rule (Spectral Subtraction or Wiener). Default is
+                Wiener.
+
+            profile : str
+                Noise profile source. Snapshot uses the profile learned
+                with learnProfile() and passes the input unchanged until
+                a profile is learned, Continuous tracks the noise with
+                minimum statistics. Default is Snapshot.
+
+        Returns
+        -------
+            None
+        """
+        assert frameSize % 2 == 0, 'ERROR: Odd noise reduction frame size.'
+
+        self.fs = fs
+        self.frameSize = int(frameSize)
+        self.hopSize = self.frameSize // 2
+        self.blockSize = int(blockSize)
+
+        maxFrames = self.blockSize // self.hopSize + 2
+        self.buffer = AnalysisBuffer(self.frameSize, self.hopSize, self.blockSize, maxFrames = maxFrames)
+        self.fftEngine = FFTEngine(self.frameSize, maxBatch = maxFrames)
+        self.nbins = self.fftEngine.nbins
+
+        # Square-root periodic Hann for analysis and synthesis; the two
+        # together sum to one at 50% overlap.
+        self.window = np.sqrt(getWindow('Hann', self.frameSize, sym = False).w)
+
+        # Frame, power and gain buffers of one batch
+        self.frameBuffer = np.zeros((maxFrames, self.frameSize))
+        self.power = np.zeros((maxFrames, self.nbins))
+        self.gains = np.zeros((maxFrames, self.nbins))
+
+        # Overlap-add accumulator and output FIFO. The FIFO starts with
+        # one frame of silence, which is the latency of the reducer.
+        self.accumulator = np.zeros(self.frameSize + maxFrames * self.hopSize)
+        self.fifo = np.zeros(self.frameSize + (maxFrames + 1) * self.hopSize + self.blockSize)
+        self.out = np.zeros(self.blockSize)
+
+        # Noise power per bin and decision-directed state
+        self.noise = np.zeros(self.nbins)
+        self.lastClean = np.zeros(self.nbins)
+
+        # Continuous noise tracking with minimum statistics
+        self.tracker = NoiseFloor(self.nbins, frameRate = fs / self.hopSize, mode = 'Minimum')
+
+        # Snapshot learning: accumulated power and frames still to learn
+        self.snapshot = np.zeros(self.nbins)
+        self.snapshotFrames = 0
+        self.learnFrames = 0
+
+        self.setMethod(method)
+        self.setProfile(profile)
+        self.reset()
+
+
+    def setMethod(self, method):
+        """
+        Changes the gain rule.
+
+        Parameters
+        ----------
+            method : str
+                Gain rule (Spectral Subtraction or Wiener).
+
+        Returns
+        -------
+            None
+        """
+        if method not in NR_METHODS:
+            raise ValueError(f"Unknown noise reduction method: {method}")
+
+        self.method = method
+
+
+    def setProfile(self, profile):
+        """
+        Changes the noise profile source. The learned snapshot is kept.
+
+        Parameters
+        ----------
+            profile : str
+                Noise profile source (Continuous or Snapshot).
+
+        Returns
+        -------
+            None
+        """
+        if profile not in NR_PROFILES:
+            raise ValueError(f"Unknown noise profile: {profile}")
+
+        self.profile = profile
+
+
+    def reset(self):
+        """
+        Clears the stream buffers and the continuous noise estimate. The
+        snapshot profile is kept.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.buffer.reset()
+        self.accumulator.fill(0)
+        self.fifo.fill(0)
+        self.fifoLevel = self.frameSize
+        self.lastClean.fill(0)
+        self.tracker.reset()
+
+
+    def learnProfile(self, seconds = 1.0):
+        """
+        Starts learning the snapshot noise profile from the next frames.
+        The input should only contain the background noise meanwhile.
+
+        Parameters
+        ----------
+            seconds : float
+                Learning time. Default is 1 s.
+
+        Returns
+        -------
+            None
+        """
+        self.snapshot.fill(0)
+        self.snapshotFrames = 0
+        self.learnFrames = max(1, int(seconds * self.fs / self.hopSize))
+
+
+    def isLearning(self):
+        """
+        Returns True while the snapshot profile is being learned.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            learning : bool
+                Learning status.
+        """
+        return self.learnFrames > 0
+
+
+    def hasProfile(self):
+        """
+        Returns True if a snapshot noise profile has been learned.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            learned : bool
+                Snapshot profile status.
+        """
+        return self.snapshotFrames > 0
+
+
+    def learnSnapshot(self, power):
+        """
+        Accumulates frames into the snapshot profile while learning.
+
+        Parameters
+        ----------
+            power : ndarray
+                (frames, bins) power spectra in time order.
+
+        Returns
+        -------
+            None
+        """
+        count = min(len(power), self.learnFrames)
+        self.snapshot += np.sum(power[:count], axis = 0)
+        self.snapshotFrames += count
+        self.learnFrames -= count
+
+
+    def computeGains(self, power, gains):
+        """
+        Computes the gain of every bin from the noise profile.
+
+        Parameters
+        ----------
+            power : ndarray
+                (frames, bins) power spectra.
+
+            gains : ndarray
+                (frames, bins) array receiving the gains.
+
+        Returns
+        -------
+            None
+        """
+        noise = np.maximum(self.noise, 1e-12)
+
+        if self.method == 'Spectral Subtraction':
+            # Power subtraction with over-subtraction and a spectral floor
+            np.divide(noise * NR_OVERSUBTRACTION, np.maximum(power, 1e-12), out = gains)
+            np.subtract(1, gains, out = gains)
+            np.maximum(gains, NR_GAIN_FLOOR**2, out = gains)
+            np.sqrt(gains, out = gains)
+            return
+
+        # Wiener gain with the decision-directed a priori SNR
+        for k in range(len(power)):
+            posterior = power[k] / noise
+            prior = NR_DD_SMOOTHING * self.lastClean / noise + \
+                    (1 - NR_DD_SMOOTHING) * np.maximum(posterior - 1, 0)
+            np.divide(prior, 1 + prior, out = gains[k])
+            np.maximum(gains[k], NR_GAIN_FLOOR, out = gains[k])
+            self.lastClean[:] = gains[k] * gains[k] * power[k]
+
+
+    def process(self, x):
+        """
+        Processes one block of samples.
+
+        Parameters
+        ----------
+            x : ndarray
+                New samples (at most blockSize).
+
+        Returns
+        -------
+            y : ndarray
+                Denoised samples, delayed by one frame. The array is reused
+                by the next call.
+        """
+        n = len(x)
+        self.buffer.push(x)
+        count = self.buffer.available()
+
+        if count > 0:
+            frames = self.frameBuffer[:count]
+            np.multiply(self.buffer.frames(count), self.window, out = frames)
+            self.buffer.consume(count)
+
+            spectra = self.fftEngine.rfft(frames)
+            power = self.power[:count]
+            gains = self.gains[:count]
+            np.abs(spectra, out = power)
+            np.square(power, out = power)
+
+            if self.isLearning():
+                self.learnSnapshot(power)
+
+            if self.profile == 'Continuous':
+                self.noise[:] = self.tracker.update(power)
+            elif self.snapshotFrames > 0:
+                np.divide(self.snapshot, self.snapshotFrames, out = self.noise)
+
+            if self.profile == 'Snapshot' and self.snapshotFrames == 0:
+                gains.fill(1)
+            else:
+                self.computeGains(power, gains)
+
+            frames[:] = scipy.fft.irfft(spectra * gains, n = self.frameSize, axis = -1)
+            frames *= self.window
+
+            # Overlap-add. The first count * hop samples are complete.
+            for k in range(count):
+                self.accumulator[k * self.hopSize:k * self.hopSize + self.frameSize] += frames[k]
+
+            done = count * self.hopSize
+            self.fifo[self.fifoLevel:self.fifoLevel + done] = self.accumulator[:done]
+            self.fifoLevel += done
+
+            remaining = len(self.accumulator) - done
+            self.accumulator[:remaining] = self.accumulator[done:]
+            self.accumulator[remaining:] = 0
+
+        self.out[:n] = self.fifo[:n]
+        self.fifo[:self.fifoLevel - n] = self.fifo[n:self.fifoLevel]
+        self.fifoLevel -= n
+
+        return self.out[:n]
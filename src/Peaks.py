@@ -0,0 +1,125 @@
+'''
+Peak picking on magnitude spectra. Local maxima above an adaptive
+threshold are ranked, and their frequency and amplitude are refined
+between the FFT bins by fitting a parabola through the three bins around
+each peak.
+'''
+
+from scipy import signal
+from collections import namedtuple
+
+import numpy as np
+
+# Interpolation methods by the names used in the Analysis menu.
+PEAK_INTERPOLATIONS = ['Parabolic', 'Gaussian']
+
+# Peaks in descending order of amplitude.
+PeakInfo = namedtuple('PeakInfo', ['freqs', 'amplitudes', 'prominences'])
+
+
+def interpolatePeaks(y, bins):
+    """
+    Fits a parabola through each peak bin and its two neighbours and
+    returns the position and height of its vertex.
+
+    Parameters
+    ----------
+        y : ndarray
+            Spectrum values (linear or logarithmic).
+
+        bins : ndarray
+            Indices of the peak bins. Must not be the first or last bin.
+
+    Returns
+    -------
+        delta : ndarray
+            Offset of the vertex from the peak bin, between -0.5 and 0.5.
+
+        height : ndarray
+            Value of the vertex.
+    """
+    a = y[bins - 1]
+    b = y[bins]
+    c = y[bins + 1]
+
+    denom = a - 2 * b + c
+    delta = np.zeros(len(bins))
+    np.divide(0.5 * (a - c), denom, out = delta, where = denom != 0)
+
+    height = b - 0.25 * (a - c) * delta
+    return delta, height
+
+
+def findPeaks(mag, f, count = 5, threshold = 20.0, prominence = 6.0, interpolation = 'Gaussian',
+              floor = None):
+    """
+    Returns the strongest local maxima of a magnitude spectrum. Only peaks
+    more than threshold dB above the noise floor (per bin if given,
+    otherwise the median level of the spectrum) and standing out by at
+    least prominence dB from their surroundings are kept. The DC and
+    Nyquist bins are never reported.
+
+    Parameters
+    ----------
+        mag : ndarray
+            Magnitude spectrum.
+
+        f : ndarray
+            Frequency of each bin (evenly spaced).
+
+        count : int
+            Maximum number of peaks. Default is 5.
+
+        threshold : float
+            Minimum peak level above the noise floor in dB: above floor
+            in every bin if it is given, otherwise above the median level.
+            Default is 20.
+
+        prominence : float
+            Minimum peak prominence in dB. Default is 6.
+
+        interpolation : str
+            Parabolic fits the parabola to the linear magnitude, Gaussian
+            fits it to the log magnitude (exact for a Gaussian-shaped main
+            lobe). Default is Gaussian.
+
+        floor : ndarray
+            Noise floor level of each bin in dB (e.g. NoiseFloor.level for
+            the power of mag). Default is None (median level).
+
+    Returns
+    -------
+        info : PeakInfo
+            Interpolated frequencies, amplitudes (linear magnitude) and
+            prominences (dB) of the peaks, strongest first.
+    """
+    if interpolation not in PEAK_INTERPOLATIONS:
+        raise ValueError(f"Unknown peak interpolation '{interpolation}'.")
+
+    level = 20 * np.log10(np.maximum(mag, 1e-12))
+    if floor is None:
+        floor = np.median(level)
+
+    bins, properties = signal.find_peaks(level, height = floor + threshold, prominence = prominence)
+
+    # Keep the strongest count peaks, strongest first
+    if len(bins) > count:
+        strongest = np.argpartition(properties['peak_heights'], -count)[-count:]
+        bins = bins[strongest]
+        prominences = properties['prominences'][strongest]
+    else:
+        prominences = properties['prominences']
+
+    order = np.argsort(level[bins])[::-1]
+    bins = bins[order]
+    prominences = prominences[order]
+
+    if interpolation == 'Gaussian':
+        delta, height = interpolatePeaks(level, bins)
+        amplitudes = 10 ** (height / 20)
+    else:
+        delta, amplitudes = interpolatePeaks(mag, bins)
+
+    freqs = f[bins] + delta * (f[1] - f[0])
+
+    return PeakInfo(freqs, amplitudes, prominences)
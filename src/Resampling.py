@@ -0,0 +1,103 @@
+'''
+Integer-factor decimation of the sample stream. The anti-alias FIR filter
+is only evaluated at the kept output samples (polyphase decimation), and
+the filter history and the output phase are carried between blocks.
+'''
+
+from numpy.lib.stride_tricks import as_strided
+from Filtering import designDecimator
+
+import numpy as np
+
+# Decimation factors by the names used in the Analysis menu.
+DECIMATION_FACTORS = [1, 2, 4, 8, 16]
+
+
+class Decimator:
+    def __init__(self, factor, blockSize, dtype = np.float64):
+        """
+        Constructs a streaming decimator for blocks of at most blockSize
+        samples.
+
+        Parameters
+        ----------
+            factor : int
+                Decimation factor (at least 2).
+
+            blockSize : int
+                Largest block passed to process().
+
+            dtype : numpy dtype
+                Sample type, float64 or complex128 for complex baseband
+                signals. Default is float64.
+
+        Returns
+        -------
+            None
+        """
+        assert blockSize > 0, 'ERROR: Non-positive block size.'
+
+        self.factor = int(factor)
+        self.blockSize = int(blockSize)
+
+        # Taps reversed, so each output is a dot product with a window
+        # ending at its input sample. The taps have the sample type so the
+        # product stays in BLAS.
+        self.taps = np.ascontiguousarray(designDecimator(self.factor)[::-1], dtype = dtype)
+        self.history = len(self.taps) - 1
+
+        # Filter history followed by the current block, and the output
+        self.line = np.zeros(self.history + self.blockSize, dtype = dtype)
+        self.out = np.zeros(self.blockSize // self.factor + 1, dtype = dtype)
+
+        self.reset()
+
+
+    def reset(self):
+        """
+        Clears the filter history.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.line.fill(0)
+
+        # Index in the next block of the next output sample
+        self.phase = 0
+
+
+    def process(self, x):
+        """
+        Filters and decimates one block.
+
+        Parameters
+        ----------
+            x : ndarray
+                New samples (at most blockSize).
+
+        Returns
+        -------
+            y : ndarray
+                Decimated samples. The array is reused by the next call.
+        """
+        n = len(x)
+        line = self.line[:self.history + n]
+        line[self.history:] = x
+
+        # One window per output sample, D input samples apart
+        count = max(0, -(-(n - self.phase) // self.factor))
+        stride = line.strides[0]
+        windows = as_strided(line[self.phase:], shape = (count, len(self.taps)),
+                             strides = (self.factor * stride, stride), writeable = False)
+
+        y = self.out[:count]
+        np.dot(windows, self.taps, out = y)
+
+        self.phase += count * self.factor - n
+        self.line[:self.history] = line[n:]
+        return y
@@ -0,0 +1,715 @@
+'''
+Spectrum estimation for the analyzer. The FFT engine computes the
+real-input FFT with a selectable backend and writes the magnitude into a
+preallocated array that is reused for every frame.
+'''
+
+import numpy as np
+import scipy.fft
+
+# pyFFTW is optional. When it is installed, FFTW plans are built once
+# per FFT size and reused for every frame.
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+# Available FFT backends.
+FFT_BACKENDS = ['scipy', 'numpy']
+
+if pyfftw is not None:
+    FFT_BACKENDS.append('pyfftw')
+
+
+class FFTEngine:
+    def __init__(self, n, workers = 1, backend = 'scipy', scale = 1.0, maxBatch = 1):
+        """
+        Constructs a real-input FFT engine for a fixed FFT size. Output
+        buffers are allocated once for the FFT size and the largest batch.
+
+        Parameters
+        ----------
+            n : int
+                FFT size. Shorter inputs are zero-padded to n points.
+
+            workers : int
+                Number of worker threads used by the scipy and pyfftw
+                backends. Default is 1.
+
+            backend : str
+                FFT backend (scipy, numpy or pyfftw). Default is scipy.
+
+            scale : float
+                Factor applied to the magnitude spectrum. Default is 1.
+
+            maxBatch : int
+                Largest number of frames transformed in one call. Default
+                is 1.
+
+        Returns
+        -------
+            None
+        """
+        assert n > 0, 'ERROR: Non-positive FFT size.'
+        assert maxBatch > 0, 'ERROR: Non-positive batch size.'
+        assert backend in FFT_BACKENDS, 'ERROR: Unavailable FFT backend.'
+
+        self.n = int(n)
+        self.nbins = self.n // 2 + 1
+        self.workers = int(workers)
+        self.backend = backend
+        self.scale = scale
+        self.maxBatch = int(maxBatch)
+
+        # Magnitude spectra, reused for every frame. Row 0 is used for
+        # single frames.
+        self.magBuffer = np.zeros((self.maxBatch, self.nbins), dtype = np.float64)
+
+        # pyFFTW plans and their aligned buffers, by batch size.
+        self.plans = dict()
+
+
+    def getPlan(self, batch):
+        """
+        Returns the pyFFTW plan for a batch size, building it on first use.
+
+        Parameters
+        ----------
+            batch : int
+                Number of frames, or 0 for a single 1D frame.
+
+        Returns
+        -------
+            plan : pyfftw.FFTW
+                Plan with its input and output arrays.
+        """
+        if batch not in self.plans:
+            shape = (batch,) if batch else ()
+            fftIn = pyfftw.empty_aligned(shape + (self.n,), dtype = 'float64')
+            fftOut = pyfftw.empty_aligned(shape + (self.nbins,), dtype = 'complex128')
+            self.plans[batch] = pyfftw.FFTW(fftIn, fftOut, axes = (-1,), threads = self.workers)
+
+        return self.plans[batch]
+
+
+    def rfft(self, x):
+        """
+        Returns the one-sided spectrum of a real frame, or of each row of a
+        (frames, samples) batch in a single call. With the pyfftw backend,
+        the returned array is the plan's output buffer and is overwritten
+        by the next call.
+
+        Parameters
+        ----------
+            x : ndarray
+                Real input frame(s) of at most n samples.
+
+        Returns
+        -------
+            spectrum : ndarray
+                Complex spectrum with n // 2 + 1 bins along the last axis.
+        """
+        if self.backend == 'pyfftw':
+            plan = self.getPlan(x.shape[0] if x.ndim == 2 else 0)
+            m = x.shape[-1]
+            plan.input_array[..., :m] = x
+            plan.input_array[..., m:] = 0.0
+            return plan()
+
+        if self.backend == 'numpy':
+            return np.fft.rfft(x, n = self.n, axis = -1)
+
+        return scipy.fft.rfft(x, n = self.n, axis = -1, workers = self.workers)
+
+
+    def magnitude(self, x):
+        """
+        Returns the scaled magnitude spectrum of a real frame or batch,
+        written into the engine's preallocated magnitude buffer.
+
+        Parameters
+        ----------
+            x : ndarray
+                Real input frame(s) of at most n samples. A batch must not
+                have more than maxBatch rows.
+
+        Returns
+        -------
+            mag : ndarray
+                Scaled magnitude spectrum (n // 2 + 1 bins along the last
+                axis).
+        """
+        if x.ndim == 1:
+            mag = self.magBuffer[0]
+        else:
+            mag = self.magBuffer[:x.shape[0]]
+
+        np.abs(self.rfft(x), out = mag)
+        mag *= self.scale
+        return mag
+
+
+    def frequencies(self, fs):
+        """
+        Returns the frequency axis of the one-sided spectrum.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+        Returns
+        -------
+            f : ndarray
+                Bin frequencies in Hz.
+        """
+        return scipy.fft.rfftfreq(self.n, d = 1.0 / fs)
+
+
+class AnalysisBuffer:
+    def __init__(self, frameSize, hopSize, blockSize, maxFrames = 16, dtype = np.float64):
+        """
+        Constructs a sliding analysis buffer. Capture blocks of any size are
+        appended, and analysis frames of frameSize samples are taken every
+        hopSize samples, so the FFT length does not depend on the capture
+        block size.
+
+        Parameters
+        ----------
+            frameSize : int
+                Number of samples in an analysis frame.
+
+            hopSize : int
+                Number of samples between the starts of two frames. Must
+                not be larger than frameSize.
+
+            blockSize : int
+                Largest capture block that is pushed at once.
+
+            maxFrames : int
+                Number of pending frames kept when the consumer falls
+                behind. Older frames are dropped. Default is 16.
+
+            dtype : numpy dtype
+                Sample type of the buffer. Default is float64.
+
+        Returns
+        -------
+            None
+        """
+        assert frameSize > 0, 'ERROR: Non-positive frame size.'
+        assert 0 < hopSize <= frameSize, 'ERROR: Hop size must be in (0, frameSize].'
+
+        self.frameSize = int(frameSize)
+        self.hopSize = int(hopSize)
+        self.maxFrames = int(maxFrames)
+        self.capacity = self.frameSize + self.maxFrames * self.hopSize + int(blockSize)
+
+        self.buffer = np.zeros(self.capacity, dtype = dtype)
+
+        # Number of valid samples and start of the next frame.
+        self.length = 0
+        self.start = 0
+
+        # Number of frames dropped because the consumer fell behind.
+        self.droppedFrames = 0
+
+
+    def push(self, x):
+        """
+        Appends samples to the buffer. Consumed samples are discarded by
+        moving the unread tail to the front of the buffer when needed.
+
+        Parameters
+        ----------
+            x : ndarray
+                New samples.
+
+        Returns
+        -------
+            None
+        """
+        n = len(x)
+
+        if self.length + n > self.capacity:
+            tail = self.length - self.start
+            self.buffer[:tail] = self.buffer[self.start:self.length]
+            self.length = tail
+            self.start = 0
+
+        self.buffer[self.length:self.length + n] = x
+        self.length += n
+
+        # Drop the oldest pending frames if the consumer fell behind.
+        excess = self.available() - self.maxFrames
+
+        if excess > 0:
+            self.start += excess * self.hopSize
+            self.droppedFrames += excess
+
+
+    def available(self):
+        """
+        Returns the number of complete frames ready to be analyzed.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            count : int
+                Number of ready frames.
+        """
+        ready = self.length - self.start - self.frameSize
+
+        if ready < 0:
+            return 0
+
+        return 1 + ready // self.hopSize
+
+
+    def frames(self, count):
+        """
+        Returns the next frames as a read-only (count, frameSize) view into
+        the buffer. The frames are not consumed.
+
+        Parameters
+        ----------
+            count : int
+                Number of frames, at most available().
+
+        Returns
+        -------
+            frames : ndarray
+                Strided view of overlapping frames.
+        """
+        assert 0 < count <= self.available(), 'ERROR: Not enough frames available.'
+
+        stride = self.buffer.strides[0]
+        return np.lib.stride_tricks.as_strided(self.buffer[self.start:],
+                                               shape = (count, self.frameSize),
+                                               strides = (self.hopSize * stride, stride),
+                                               writeable = False)
+
+
+    def consume(self, count):
+        """
+        Marks frames as analyzed.
+
+        Parameters
+        ----------
+            count : int
+                Number of frames to consume.
+
+        Returns
+        -------
+            None
+        """
+        self.start += count * self.hopSize
+
+
+    def reset(self):
+        """
+        Discards all samples in the buffer.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.length = 0
+        self.start = 0
+
+
+# Pending frames kept by the STFT on top of the frames of one block, so a
+# few blocks can be pushed before the frames are transformed.
+STFT_BACKLOG_FRAMES = 4
+
+
+class STFTEngine:
+    def __init__(self, frameSize, hopSize, blockSize, nfft = None, workers = 1,
+                 backend = 'scipy', scale = 1.0, maxFrames = None):
+        """
+        Constructs a short-time Fourier transform engine. The stream is
+        cut into overlapping frames, and all frames pending since the last
+        call are windowed and transformed together in one 2D FFT call.
+
+        Parameters
+        ----------
+            frameSize : int
+                Number of samples in an analysis frame.
+
+            hopSize : int
+                Number of samples between two frames. For example,
+                frameSize / 4 gives 75% overlap.
+
+            blockSize : int
+                Largest capture block that is pushed at once.
+
+            nfft : int
+                FFT size. Frames are zero-padded to nfft points. Defaults
+                to frameSize.
+
+            workers : int
+                Number of FFT worker threads. Default is 1.
+
+            backend : str
+                FFT backend (scipy, numpy or pyfftw). Default is scipy.
+
+            scale : float
+                Factor applied to the magnitude spectra. Default is 1.
+
+            maxFrames : int
+                Largest number of pending frames. Defaults to the frames of
+                one block plus STFT_BACKLOG_FRAMES, so no frame is dropped
+                while every block is processed.
+
+        Returns
+        -------
+            None
+        """
+        if nfft is None:
+            nfft = frameSize
+
+        if maxFrames is None:
+            maxFrames = -(-int(blockSize) // int(hopSize)) + STFT_BACKLOG_FRAMES
+
+        self.frameSize = int(frameSize)
+        self.hopSize = int(hopSize)
+        self.buffer = AnalysisBuffer(frameSize, hopSize, blockSize, maxFrames = maxFrames)
+        self.fftEngine = FFTEngine(nfft, workers = workers, backend = backend,
+                                   scale = scale, maxBatch = maxFrames)
+        self.nbins = self.fftEngine.nbins
+
+        # Windowed frames of one batch.
+        self.frameBuffer = np.zeros((maxFrames, self.frameSize), dtype = np.float64)
+
+        # Window coefficients, None for no window.
+        self.window = None
+
+
+    def setWindow(self, w):
+        """
+        Sets the analysis window.
+
+        Parameters
+        ----------
+            w : ndarray
+                Window of frameSize points (e.g. from getWindow()), or
+                None for no window.
+
+        Returns
+        -------
+            None
+        """
+        assert w is None or len(w) == self.frameSize, 'ERROR: Window length mismatch.'
+        self.window = w
+
+
+    def push(self, x):
+        """
+        Appends a block of samples to the stream.
+
+        Parameters
+        ----------
+            x : ndarray
+                New samples.
+
+        Returns
+        -------
+            None
+        """
+        self.buffer.push(x)
+
+
+    def droppedFrames(self):
+        """
+        Returns the number of frames dropped because they were not
+        transformed in time.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            droppedFrames : int
+                Number of dropped frames.
+        """
+        return self.buffer.droppedFrames
+
+
+    def process(self):
+        """
+        Windows and transforms every pending frame in one batch.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            mag : ndarray
+                (frames, bins) magnitude spectra in time order, or None if
+                no frame is ready. The array is overwritten by the next call.
+        """
+        count = self.buffer.available()
+
+        if count == 0:
+            return None
+
+        frames = self.frameBuffer[:count]
+
+        if self.window is None:
+            np.copyto(frames, self.buffer.frames(count))
+        else:
+            np.multiply(self.buffer.frames(count), self.window, out = frames)
+
+        self.buffer.consume(count)
+        return self.fftEngine.magnitude(frames)
+
+
+    def frequencies(self, fs):
+        """
+        Returns the frequency axis of the spectra.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+        Returns
+        -------
+            f : ndarray
+                Bin frequencies in Hz.
+        """
+        return self.fftEngine.frequencies(fs)
+
+
+# Spectral averaging modes.
+AVERAGING_MODES = ['None', 'Exponential', 'Linear', 'Peak Hold']
+
+
+class SpectralAverager:
+    def __init__(self, nbins, frameRate, mode = 'None', tau = 1.0, count = 8, decay = 20.0):
+        """
+        Constructs a spectral averager. Every spectrum produced by the STFT
+        engine is fed in, so the display can be refreshed less often than
+        frames are produced without losing information. All averaging runs
+        in place on preallocated arrays.
+
+        Parameters
+        ----------
+            nbins : int
+                Number of frequency bins.
+
+            frameRate : float
+                Number of spectra per second (fs / hop size).
+
+            mode : str
+                Averaging mode (None, Exponential, Linear, Peak Hold).
+                Default is None.
+
+            tau : float
+                Time constant of the exponential average in seconds.
+                Default is 1 s.
+
+            count : int
+                Number of spectra in the linear average. Default is 8.
+
+            decay : float
+                Decay rate of the peak hold in dB per second. Default is
+                20 dB/s.
+
+        Returns
+        -------
+            None
+        """
+        assert mode in AVERAGING_MODES, 'ERROR: Unknown averaging mode.'
+        assert count > 0, 'ERROR: Non-positive averaging count.'
+
+        self.nbins = int(nbins)
+        self.mode = mode
+        self.count = int(count)
+
+        # Per-frame smoothing factor and peak-hold decay factor
+        self.alpha = 1.0 - np.exp(-1.0 / (tau * frameRate))
+        self.decayFactor = 10 ** (-decay / (20.0 * frameRate))
+
+        self.result = np.zeros(self.nbins, dtype = np.float64)
+        self.scratch = np.zeros(self.nbins, dtype = np.float64)
+
+        # Linear average: last count spectra and their running sum
+        self.history = np.zeros((self.count, self.nbins), dtype = np.float64)
+        self.runningSum = np.zeros(self.nbins, dtype = np.float64)
+
+        self.reset()
+
+
+    def setMode(self, mode):
+        """
+        Changes the averaging mode and restarts the average.
+
+        Parameters
+        ----------
+            mode : str
+                Averaging mode (None, Exponential, Linear, Peak Hold).
+
+        Returns
+        -------
+            None
+        """
+        assert mode in AVERAGING_MODES, 'ERROR: Unknown averaging mode.'
+        self.mode = mode
+        self.reset()
+
+
+    def reset(self):
+        """
+        Clears the average.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.frames = 0
+        self.index = 0
+        self.result.fill(0.0)
+        self.history.fill(0.0)
+        self.runningSum.fill(0.0)
+
+
+    def update(self, spectra):
+        """
+        Adds spectra to the average.
+
+        Parameters
+        ----------
+            spectra : ndarray
+                (frames, bins) magnitude spectra in time order.
+
+        Returns
+        -------
+            result : ndarray
+                Averaged spectrum. The array is updated in place by the
+                next call.
+        """
+        if self.mode == 'None':
+            np.copyto(self.result, spectra[-1])
+
+        elif self.mode == 'Exponential':
+            for row in spectra:
+                if self.frames == 0:
+                    np.copyto(self.result, row)
+                else:
+                    np.subtract(row, self.result, out = self.scratch)
+                    self.scratch *= self.alpha
+                    self.result += self.scratch
+
+                self.frames += 1
+
+        elif self.mode == 'Linear':
+            for row in spectra:
+                self.runningSum -= self.history[self.index]
+                self.history[self.index] = row
+                self.runningSum += row
+                self.index = (self.index + 1) % self.count
+                self.frames = min(self.frames + 1, self.count)
+
+                # Refresh the running sum once per cycle, so rounding
+                # errors do not build up.
+                if self.index == 0:
+                    np.sum(self.history, axis = 0, out = self.runningSum)
+
+            np.multiply(self.runningSum, 1.0 / self.frames, out = self.result)
+
+        else:
+            for row in spectra:
+                self.result *= self.decayFactor
+                np.maximum(self.result, row, out = self.result)
+
+        return self.result
+
+
+class SpectrogramBuffer:
+    def __init__(self, rows, nbins, floor = -120.0):
+        """
+        Constructs a fixed-size circular buffer of spectra in dB for the
+        spectrogram view. Every row is written twice, at index and at
+        index + rows, so the last rows spectra are always available as one
+        contiguous view and nothing is reallocated or rolled.
+
+        Parameters
+        ----------
+            rows : int
+                Number of spectra kept in the history.
+
+            nbins : int
+                Number of frequency bins.
+
+            floor : float
+                Lowest level in dB. Default is -120 dB.
+
+        Returns
+        -------
+            None
+        """
+        assert rows > 0, 'ERROR: Non-positive number of rows.'
+
+        self.rows = int(rows)
+        self.nbins = int(nbins)
+        self.floor = floor
+
+        self.image = np.full((2 * self.rows, self.nbins), floor, dtype = np.float32)
+        self.scratch = np.zeros(self.nbins, dtype = np.float64)
+        self.index = 0
+
+        # Smallest magnitude converted to dB
+        self.eps = 10 ** (floor / 20.0)
+
+
+    def push(self, spectra):
+        """
+        Converts magnitude spectra to dB and writes them as the newest rows.
+
+        Parameters
+        ----------
+            spectra : ndarray
+                (frames, bins) magnitude spectra in time order.
+
+        Returns
+        -------
+            None
+        """
+        for row in spectra:
+            np.maximum(row, self.eps, out = self.scratch)
+            np.log10(self.scratch, out = self.scratch)
+            self.scratch *= 20.0
+
+            self.image[self.index] = self.scratch
+            self.image[self.index + self.rows] = self.scratch
+            self.index = (self.index + 1) % self.rows
+
+
+    def view(self):
+        """
+        Returns the history from the oldest to the newest spectrum.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            image : ndarray
+                (rows, bins) view into the buffer, in dB.
+        """
+        return self.image[self.index:self.index + self.rows]
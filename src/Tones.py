@@ -0,0 +1,212 @@
+'''
+Tone tracking for a few known frequencies. A bank of streaming Goertzel
+detectors runs on the raw sample stream, so watching a handful of tones
+does not need a full FFT.
+'''
+
+from Metering import FULL_SCALE
+
+import numpy as np
+
+# A tone switches off only after falling this far (dB) below its threshold.
+TONE_HYSTERESIS = 3.0
+
+
+def parseTone(text):
+    """
+    Parses a watched tone given as FREQ[:BW[:THRESH]], e.g. 120, 120:5 or
+    120:5:-40.
+
+    Parameters
+    ----------
+        text : str
+            Tone frequency (Hz), optional bandwidth (Hz) and optional
+            threshold (dBFS) separated by colons.
+
+    Returns
+    -------
+        tone : tuple
+            (frequency, bandwidth, threshold). Missing fields are None.
+    """
+    fields = text.split(':')
+
+    if not 1 <= len(fields) <= 3:
+        raise ValueError(f"Invalid tone '{text}', expected FREQ[:BW[:THRESH]].")
+
+    values = [float(v) if v else None for v in fields]
+    values += [None] * (3 - len(values))
+
+    return tuple(values)
+
+
+class GoertzelBank:
+    def __init__(self, freqs, fs, blockSize, bandwidths = 10.0, thresholds = -40.0):
+        """
+        Constructs a bank of Goertzel detectors, one per watched tone. Each
+        detector computes the single DFT term of its tone over its
+        integration length, which is what the Goertzel recurrence yields.
+        The terms of all tones are evaluated in the direct form as one
+        matrix-vector product per block, with a per-tone phase that keeps
+        consecutive blocks coherent.
+
+        The integration length of each tone is fs / bandwidth samples,
+        rounded to a whole sample, and does not depend on the block size:
+        a window that ends inside a block is completed with the head of
+        the block and the next window starts from the rest. The effective
+        bandwidth is fs / length.
+
+        Parameters
+        ----------
+            freqs : array_like
+                Tone frequencies in Hz.
+
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Number of samples per processed block.
+
+            bandwidths : float or array_like
+                Detector bandwidth of each tone in Hz. Default is 10 Hz.
+
+            thresholds : float or array_like
+                On/off threshold of each tone in dBFS. Default is -40 dBFS.
+
+        Returns
+        -------
+            None
+        """
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype = np.float64))
+        count = len(self.freqs)
+
+        self.bandwidths = np.broadcast_to(np.asarray(bandwidths, dtype = np.float64), (count,)).copy()
+        self.thresholds = np.broadcast_to(np.asarray(thresholds, dtype = np.float64), (count,)).copy()
+
+        assert count > 0, 'ERROR: No tone to watch.'
+        assert blockSize > 0, 'ERROR: Non-positive block size.'
+        assert np.all((self.freqs > 0) & (self.freqs < fs / 2)), 'ERROR: Tone frequency out of range.'
+        assert np.all(self.bandwidths > 0), 'ERROR: Non-positive tone bandwidth.'
+
+        self.fs = fs
+        self.blockSize = int(blockSize)
+
+        # Integration length of each tone in samples and the effective
+        # bandwidth of the detector
+        self.length = np.maximum(1, np.round(fs / self.bandwidths)).astype(int)
+        self.effectiveBandwidths = fs / self.length
+
+        # Complex exponentials of one block (tones x samples) and the
+        # phase advance of each tone from one block to the next
+        w = 2 * np.pi * self.freqs / fs
+        n = np.arange(self.blockSize)
+        self.kernel = np.exp(-1j * np.outer(w, n))
+        self.step = np.exp(-1j * w * self.blockSize)
+
+        # DFT term accumulated so far, phase of the current block and
+        # samples integrated so far
+        self.acc = np.zeros(count, dtype = np.complex128)
+        self.phase = np.ones(count, dtype = np.complex128)
+        self.counter = np.zeros(count, dtype = int)
+
+        # Last measured level (dBFS) and on/off state of each tone
+        self.levels = np.full(count, -np.inf)
+        self.active = np.zeros(count, dtype = bool)
+
+
+    def reset(self):
+        """
+        Clears the accumulated terms and the tone states.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            None
+        """
+        self.acc.fill(0)
+        self.phase.fill(1)
+        self.counter.fill(0)
+        self.levels.fill(-np.inf)
+        self.active.fill(False)
+
+
+    def measure(self, k, term):
+        """
+        Measures a complete integration window of one tone and updates its
+        on/off state.
+
+        Parameters
+        ----------
+            k : int
+                Index of the tone.
+
+            term : complex
+                DFT term of the window.
+
+        Returns
+        -------
+            None
+        """
+        amplitude = 2 * np.abs(term) / self.length[k]
+        self.levels[k] = 20 * np.log10(max(amplitude, 1e-12) / FULL_SCALE)
+
+        # Switch on above the threshold, off below it minus the hysteresis
+        if self.active[k]:
+            self.active[k] = self.levels[k] >= self.thresholds[k] - TONE_HYSTERESIS
+        else:
+            self.active[k] = self.levels[k] >= self.thresholds[k]
+
+
+    def process(self, x):
+        """
+        Runs one block through all detectors. Tones whose integration
+        length is complete are measured and compared with their threshold,
+        then their detectors are restarted at the sample where the window
+        ended.
+
+        Parameters
+        ----------
+            x : ndarray
+                Block of blockSize samples.
+
+        Returns
+        -------
+            changed : ndarray
+                Indices of the tones that switched on or off in this block.
+        """
+        assert len(x) == self.blockSize, 'ERROR: Unexpected block length.'
+
+        n = self.blockSize
+        running = self.counter + n < self.length
+        done = np.flatnonzero(~running)
+        wasActive = self.active[done]
+
+        # Tones whose window continues past this block: all in one
+        # product, rotated to the phase of this block
+        if len(done) == 0:
+            self.acc += self.phase * (self.kernel @ x)
+        else:
+            self.acc[running] += self.phase[running] * (self.kernel[running] @ x)
+
+        self.counter[running] += n
+
+        # Tones whose window ends in this block. The head completes the
+        # window, whole windows inside the block are measured on their
+        # own and the tail starts the next window.
+        for k in done:
+            start = self.length[k] - self.counter[k]
+            self.measure(k, self.acc[k] + self.phase[k] * (self.kernel[k, :start] @ x[:start]))
+
+            while n - start >= self.length[k]:
+                end = start + self.length[k]
+                self.measure(k, self.kernel[k, start:end] @ x[start:end])
+                start = end
+
+            self.acc[k] = self.phase[k] * (self.kernel[k, start:] @ x[start:])
+            self.counter[k] = n - start
+
+        self.phase *= self.step
+
+        return done[self.active[done] != wasActive]
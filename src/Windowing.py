@@ -1,7 +1,11 @@
 from scipy import signal
+from collections import namedtuple
 
+import functools
+import numpy as np
 
-def hanningWindow(M):
+
+def hanningWindow(M, sym = True):
     """
     Returns a Hanning window.
 
@@ -9,6 +13,10 @@ def hanningWindow(M):
     ----------
         M : int
             Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
     
     Returns
     -------
@@ -16,10 +24,10 @@ def hanningWindow(M):
             Hann window.
     """
     assert M > 0, 'ERROR: Non-positive M value..'
-    return signal.windows.hann(M = M, sym = True)
+    return signal.windows.hann(M = M, sym = sym)
 
 
-def hammingWindow(M):
+def hammingWindow(M, sym = True):
     """
     Returns a Hamming window.
 
@@ -27,6 +35,10 @@ def hammingWindow(M):
     ----------
         M : int
             Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
     
     Returns
     -------
@@ -34,10 +46,10 @@ def hammingWindow(M):
             Hamming window.
     """
     assert M > 0, 'ERROR: Non-positive M value..'
-    return signal.windows.hamming(M = M, sym = True)
+    return signal.windows.hamming(M = M, sym = sym)
 
 
-def rectWindow(M):
+def rectWindow(M, sym = True):
     """
     Returns a rectangular (Dirichlet or boxcar) window. 
     Equivalent to no window at all.
@@ -46,6 +58,10 @@ def rectWindow(M):
     ----------
         M : int
             Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
     
     Returns
     -------
@@ -53,10 +69,10 @@ def rectWindow(M):
             Rectangular window.
     """
     assert M > 0, 'ERROR: Non-positive M value..'
-    return signal.windows.boxcar(M = M, sym = True)
+    return signal.windows.boxcar(M = M, sym = sym)
 
 
-def kaiserWindow(M, beta = 14):
+def kaiserWindow(M, beta = 14, sym = True):
     """
     Returns a Kaiser window.
 
@@ -69,6 +85,10 @@ def kaiserWindow(M, beta = 14):
             Shape parameter that determines trade-off between main lobe
             width and side lobe level. Higher the beta, narrow the window.
             The default value is 14.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
     
     Returns
     -------
@@ -78,10 +98,10 @@ def kaiserWindow(M, beta = 14):
     assert M > 0, 'ERROR: Non-positive M value..'
     assert beta > 0, 'ERROR: Non-positive beta value.'
 
-    return signal.windows.kaiser(M = M, beta = beta, sym = True)
+    return signal.windows.kaiser(M = M, beta = beta, sym = sym)
 
 
-def blackmanWindow(M):
+def blackmanWindow(M, sym = True):
     """
     Returns a Blackman window.
 
@@ -89,6 +109,10 @@ def blackmanWindow(M):
     ----------
         M : int
             Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
         
     Returns
     -------
@@ -96,10 +120,10 @@ def blackmanWindow(M):
             Blackman window.
     """
     assert M > 0, 'ERROR: Non-positive M value..'
-    return signal.windows.blackman(M = M, sym = True)
+    return signal.windows.blackman(M = M, sym = sym)
 
 
-def flattopWindow(M):
+def flattopWindow(M, sym = True):
     """
     Returns a Flattop window.
 
@@ -107,6 +131,10 @@ def flattopWindow(M):
     ----------
         M : int
             Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window (filter design), False
+            generates a periodic window (spectral analysis). Default is True.
         
     Returns
     -------
@@ -114,4 +142,88 @@ def flattopWindow(M):
             Flattop window.
     """
     assert M > 0, 'ERROR: Non-positive M value..'
-    return signal.windows.flattop(M = M, sym = True)
+    return signal.windows.flattop(M = M, sym = sym)
+
+
+# Window coefficients together with their amplitude correction factors.
+WindowInfo = namedtuple('WindowInfo', ['w', 'coherentGain', 'enbw'])
+
+# Window functions by the names used in the window combobox.
+WINDOW_FUNCTIONS = {
+    'Hann'        : hanningWindow,
+    'Hamming'     : hammingWindow,
+    'Rectangular' : rectWindow,
+    'Kaiser'      : kaiserWindow,
+    'Blackman'    : blackmanWindow,
+    'Flattop'     : flattopWindow
+}
+
+# Maximum number of window configurations kept in the cache.
+WINDOW_CACHE_SIZE = 32
+
+
+def getWindow(name, M, sym = True, **params):
+    """
+    Returns a window from the window registry. Windows are designed once
+    per (type, M, sym, params) configuration and then served from a
+    bounded cache, so the same read-only array is returned on every call.
+
+    Parameters
+    ----------
+        name : str
+            Window type (Hann, Hamming, Rectangular, Kaiser, Blackman,
+            Flattop).
+
+        M : int
+            Number of points in the output window.
+
+        sym : bool
+            True generates a symmetric window, False generates a periodic
+            window. Default is True.
+
+        params : dict
+            Shape parameters of the window such as Kaiser beta.
+
+    Returns
+    -------
+        info : WindowInfo
+            Read-only window coefficients (w), coherent gain and
+            equivalent noise bandwidth (enbw, in bins).
+    """
+    assert name in WINDOW_FUNCTIONS, 'ERROR: Unknown window type.'
+    return _designWindow(name, int(M), bool(sym), tuple(sorted(params.items())))
+
+
+@functools.lru_cache(maxsize = WINDOW_CACHE_SIZE)
+def _designWindow(name, M, sym, params):
+    """
+    Designs a window and computes its correction factors. Cached by
+    getWindow(); params is a sorted tuple of (key, value) pairs.
+
+    Parameters
+    ----------
+        name : str
+            Window type.
+
+        M : int
+            Number of points in the output window.
+
+        sym : bool
+            Symmetric or periodic window.
+
+        params : tuple
+            Shape parameters of the window.
+
+    Returns
+    -------
+        info : WindowInfo
+            Read-only window coefficients, coherent gain and ENBW.
+    """
+    w = WINDOW_FUNCTIONS[name](M, sym = sym, **dict(params))
+    w.flags.writeable = False
+
+    wSum = np.sum(w)
+    coherentGain = wSum / M
+    enbw = M * np.sum(w * w) / (wSum * wSum)
+
+    return WindowInfo(w, coherentGain, enbw)
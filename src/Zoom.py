@@ -0,0 +1,173 @@
+'''
+Zoom FFT: a narrow band around a center frequency is mixed down to 0 Hz,
+decimated as a complex baseband signal and transformed, so the band is
+analysed at a fine resolution with a short FFT.
+'''
+
+from Spectrum import AnalysisBuffer
+from Resampling import Decimator
+from Windowing import getWindow
+from Filtering import DECIMATION_PASSBAND
+
+import numpy as np
+import scipy.fft
+
+# FFT size of the zoom analysis.
+ZOOM_FFT_SIZE = 4096
+
+# Longest zoom frame (s). Limits the resolution to
+# 1 / ZOOM_MAX_FRAME_TIME Hz so the view still updates.
+ZOOM_MAX_FRAME_TIME = 10.0
+
+# Hop between zoom frames as a fraction of the frame (75% overlap).
+ZOOM_HOP_RATIO = 0.25
+
+
+class ZoomFFT:
+    def __init__(self, fs, blockSize, center, span, nfft = ZOOM_FFT_SIZE, workers = 1, scale = 1.0):
+        """
+        Constructs a zoom FFT for the band center +/- span / 2. The
+        decimation factor is the largest one that keeps the band inside
+        the passband of the anti-alias filter, within the limit given by
+        ZOOM_MAX_FRAME_TIME.
+
+        Parameters
+        ----------
+            fs : float
+                Sampling frequency.
+
+            blockSize : int
+                Largest block passed to push().
+
+            center : float
+                Center frequency of the band in Hz.
+
+            span : float
+                Width of the band in Hz.
+
+            nfft : int
+                FFT size. Default is ZOOM_FFT_SIZE.
+
+            workers : int
+                Number of FFT worker threads. Default is 1.
+
+            scale : float
+                Factor applied to the magnitude spectra. Default is 1.
+
+        Returns
+        -------
+            None
+        """
+        assert span > 0, 'ERROR: Non-positive zoom span.'
+        assert 0 <= center < fs / 2, 'ERROR: Zoom center frequency out of range.'
+
+        self.fs = fs
+        self.center = center
+        self.span = span
+        self.nfft = int(nfft)
+        self.workers = int(workers)
+        self.scale = scale
+
+        # The complex baseband rate must hold the band in the passband and
+        # must not make a frame longer than ZOOM_MAX_FRAME_TIME.
+        minRate = max(span / DECIMATION_PASSBAND, self.nfft / ZOOM_MAX_FRAME_TIME)
+        self.factor = max(2, int(fs // minRate))
+        self.rate = fs / self.factor
+
+        # Numerically controlled oscillator, one block of the complex
+        # exponential and the phase at the start of the next block
+        w = 2 * np.pi * center / fs
+        self.oscillator = np.exp(-1j * w * np.arange(int(blockSize)))
+        self.w = w
+        self.phasor = 1.0 + 0.0j
+        self.mixed = np.zeros(int(blockSize), dtype = np.complex128)
+
+        self.decimator = Decimator(self.factor, blockSize, dtype = np.complex128)
+
+        hopSize = max(1, int(self.nfft * ZOOM_HOP_RATIO))
+        maxFrames = 4
+        self.buffer = AnalysisBuffer(self.nfft, hopSize, blockSize // self.factor + 1,
+                                     maxFrames = maxFrames, dtype = np.complex128)
+
+        window = getWindow('Hann', self.nfft, sym = False)
+        self.window = window.w / window.coherentGain
+        self.frame = np.zeros(self.nfft, dtype = np.complex128)
+        self.mag = np.zeros(self.nfft)
+
+        # Frequency axis of the shifted spectrum and the bins of the band.
+        # The bins are contiguous, so the band is a slice (a view).
+        f = center + scipy.fft.fftshift(scipy.fft.fftfreq(self.nfft, d = 1 / self.rate))
+        bins = np.flatnonzero(np.abs(f - center) <= span / 2)
+        self.band = slice(bins[0], bins[-1] + 1)
+        self.f = f[self.band]
+
+
+    def push(self, x):
+        """
+        Mixes a block down to the baseband and decimates it.
+
+        Parameters
+        ----------
+            x : ndarray
+                New real samples (at most blockSize).
+
+        Returns
+        -------
+            None
+        """
+        n = len(x)
+        mixed = self.mixed[:n]
+        np.multiply(x, self.oscillator[:n], out = mixed)
+        mixed *= self.phasor
+
+        # Advance the oscillator phase; keep the phasor on the unit circle
+        self.phasor *= np.exp(-1j * self.w * n)
+        self.phasor /= abs(self.phasor)
+
+        self.buffer.push(self.decimator.process(mixed))
+
+
+    def process(self):
+        """
+        Transforms the newest complete frame, if any.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            mag : ndarray
+                Scaled magnitude of the bins within the band, or None if no
+                frame is ready. The array is overwritten by the next call.
+        """
+        count = self.buffer.available()
+
+        if count == 0:
+            return None
+
+        # Only the newest frame is shown
+        np.multiply(self.buffer.frames(count)[-1], self.window, out = self.frame)
+        self.buffer.consume(count)
+
+        spectrum = scipy.fft.fft(self.frame, workers = self.workers)
+        np.abs(scipy.fft.fftshift(spectrum), out = self.mag)
+        self.mag *= self.scale / self.nfft
+
+        return self.mag[self.band]
+
+
+    def frequencies(self):
+        """
+        Returns the frequency axis of the band.
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            f : ndarray
+                Bin frequencies in Hz.
+        """
+        return self.f
@@ -5,6 +5,9 @@ from PyQt5 import QtWidgets
 
 from pyqtgraph.Qt import QtGui
 from AudioAnalyzer import MainWindow
+from Spectrum import FFT_BACKENDS
+from Tones import parseTone
+from Resampling import DECIMATION_FACTORS
 
 import os
 import sys
@@ -76,6 +79,71 @@ parser.add_argument('-f', '--log-filename',
                     required = False,
                     help = 'File name of the log output.')
 
+parser.add_argument('-c', '--capture-mode',
+                    type = str,
+                    choices = ['callback', 'blocking'],
+                    default = 'callback',
+                    required = False,
+                    help = 'Audio capture mode. Callback mode fills a ring buffer from the audio thread.')
+
+parser.add_argument('--fft-backend',
+                    type = str,
+                    choices = FFT_BACKENDS,
+                    default = 'scipy',
+                    required = False,
+                    help = 'FFT backend used for the spectrum.')
+
+parser.add_argument('--fft-workers',
+                    type = int,
+                    default = 1,
+                    required = False,
+                    help = 'Number of FFT worker threads.')
+
+parser.add_argument('-b', '--block-size',
+                    type = int,
+                    default = 2048,
+                    required = False,
+                    help = 'Number of frames per capture block.')
+
+parser.add_argument('-N', '--fft-size',
+                    type = int,
+                    default = None,
+                    required = False,
+                    help = 'Analysis frame length. Defaults to the block size.')
+
+parser.add_argument('--hop-size',
+                    type = int,
+                    default = None,
+                    required = False,
+                    help = 'Samples between analysis frames. Defaults to the FFT size.')
+
+parser.add_argument('--zero-pad',
+                    type = int,
+                    default = 1,
+                    required = False,
+                    help = 'Zero-padding factor of the FFT.')
+
+parser.add_argument('-t', '--watch-tone',
+                    type = parseTone,
+                    action = 'append',
+                    default = None,
+                    required = False,
+                    metavar = 'FREQ[:BW[:THRESH]]',
+                    help = 'Tone to watch (Hz), with optional bandwidth (Hz) and threshold (dBFS). Can be repeated.')
+
+parser.add_argument('-C', '--channels',
+                    type = int,
+                    default = 1,
+                    required = False,
+                    help = 'Number of input channels captured from the device.')
+
+parser.add_argument('-d', '--decimate',
+                    type = int,
+                    choices = DECIMATION_FACTORS,
+                    default = 1,
+                    required = False,
+                    help = 'Decimation factor of the analysis chain.')
+
 group = parser.add_mutually_exclusive_group()
 group.add_argument('-q', '--quiet', action = 'store_true', help = 'Quiet mode.')
 group.add_argument('-v', '--verbose', action = 'store_true', help = 'Verbose mode.')
@@ -104,9 +172,56 @@ def main():
     arg_nologs    = cmd_args_dict['no_log_save']
     arg_rate      = cmd_args_dict['rate']
     arg_filename  = cmd_args_dict['log_filename']
+    arg_capture   = cmd_args_dict['capture_mode']
+    arg_fft_back  = cmd_args_dict['fft_backend']
+    arg_fft_work  = cmd_args_dict['fft_workers']
+    arg_block     = cmd_args_dict['block_size']
+    arg_fft_size  = cmd_args_dict['fft_size']
+    arg_hop_size  = cmd_args_dict['hop_size']
+    arg_zero_pad  = cmd_args_dict['zero_pad']
+    arg_tones     = cmd_args_dict['watch_tone']
+    arg_decimate  = cmd_args_dict['decimate']
+    arg_channels  = cmd_args_dict['channels']
+
+    # Ranges of the analysis arguments. The hop size is checked against
+    # the frame length actually used (the block size by default). Negative
+    # worker counts count back from the number of cores, as in scipy.fft.
+    if arg_fft_work == 0:
+        parser.error('--fft-workers must not be zero.')
+
+    if arg_fft_work < 0 and arg_fft_back == 'pyfftw':
+        parser.error('--fft-workers must be positive with the pyfftw backend.')
+
+    if arg_block <= 0:
+        parser.error('--block-size must be positive.')
+
+    if arg_fft_size is not None and arg_fft_size <= 0:
+        parser.error('--fft-size must be positive.')
+
+    frame_size = arg_fft_size if arg_fft_size else arg_block
+
+    if arg_hop_size is not None and not 0 < arg_hop_size <= frame_size:
+        parser.error(f'--hop-size must be between 1 and the FFT size ({frame_size}).')
+
+    if arg_zero_pad < 1:
+        parser.error('--zero-pad must be at least 1.')
+
+    if arg_channels < 1:
+        parser.error('--channels must be at least 1.')
+
+    # Watched tones must lie below the Nyquist frequency of the capture
+    # rate and have a positive bandwidth.
+    for freq, bw, thresh in arg_tones or []:
+        if freq is None or not 0 < freq < arg_rate / 2:
+            parser.error(f'--watch-tone frequency must be between 0 and {arg_rate / 2:g} Hz.')
+
+        if bw is not None and bw <= 0:
+            parser.error('--watch-tone bandwidth must be positive.')
     
     # List of arguments to be passed to main window:
-    args_list = [arg_quiet, arg_verbose, arg_nologs, arg_rate, arg_filename]
+    args_list = [arg_quiet, arg_verbose, arg_nologs, arg_rate, arg_filename, arg_capture,
+                 arg_fft_back, arg_fft_work, arg_block, arg_fft_size, arg_hop_size, arg_zero_pad,
+                 arg_tones, arg_decimate, arg_channels]
 
     main = MainWindow(cmd_args = args_list)
     main.show()